@@ -0,0 +1,12 @@
+"""Local runner for the generated TestSprite ``TCxxx_*.py`` scripts.
+
+Run from ``testsprite_tests/``::
+
+    python -m harness run --concurrency 4
+"""
+
+from .discovery import TestCase, discover, load_module
+from .results import TestResult
+from .runner import RunOptions, run_suite
+
+__all__ = ["RunOptions", "TestCase", "TestResult", "discover", "load_module", "run_suite"]
@@ -0,0 +1,1041 @@
+"""Command-line entry point: ``python -m harness <command>``."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+
+from .blocking import PROFILES, get_profile
+from .config import DEFAULT_CONCURRENCY, RESULTS_PATH, base_url, env_int
+from .coverage import CoverageRecorder, compare_coverage, coverage_reports, load_coverage
+from .crawl import Crawl, CrawlOptions, crawl_paths, write_crawl_report
+from .dataset import (
+    BENCH_PATH, SCALES, DatasetSpec, QueryBench, QueryResult, generate, growth, latest_by_scale, write_bench,
+)
+from .devices import DEVICES, compare_devices, device_timings_path, get_device, load_device_timings
+from .discovery import TestCase, discover
+from .fastpath import Check, FastPath, PageCheck, check_pages
+from .fixtures import FixtureError, FixtureSet, Namespace, cleanup, manifest_path, new_run_id, provision
+from .http import HttpError
+from .interactions import DEFAULT_FLOWS, INTERACTIONS_DIR, InteractionProfiler, write_interactions
+from .load import SPREAD_IPS_HELP, SPREAD_IPS_NOTE, LoadProfile, LoadTest, write_load_report
+from .netaudit import NetworkAudit, audit_reports, compare_audits, load_audit
+from .pageweight import VIEWPORTS, audit_page_weight, offenders, write_page_weight
+from .repeatvisit import OFFLINE_PATH, RepeatVisitOptions, repeat_visit, write_repeat_visit
+from .report import write_report
+from .results import TestResult, utc_now, write_results
+from .routes import load_routes, select_routes
+from .runner import RunOptions, run_suite
+from .searchbench import (
+    CASES, ROUTES, SearchBench, SearchBenchOptions, compare, load_search_bench, previous_revision, write_search_bench,
+)
+from .server import DEFAULT_SERVER_PORT, ManagedServers, ServerError, ensure_build
+from .sharding import ShardSpec, clear_shards, load_shards, run_processes, select_shard, write_shard
+from .soak import DEFAULT_PATHS, SoakError, SoakOptions, soak, write_soak
+from .standin import DEFAULT_STANDIN_PORT, MODES, StandInError, SupabaseStandIn
+from .timing import write_timings
+from .vitals import (
+    BASELINE_ROUTES, BUDGETS_PATH, HISTORY_DIR, audit_routes, load_budgets, seed_budgets, write_budgets, write_history,
+)
+from .waits import WaitPolicy
+from .warmup import ServerUnavailable, WarmupPolicy, warm_up
+
+
+def _add_selection(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--only", nargs="+", metavar="TCxxx", help="run only these test ids")
+
+
+def _print_summary(results: list[TestResult], destination: object) -> None:
+    for result in results:
+        mode = " (http)" if result.extra.get("executionMode") == "http" else ""
+        print(f"{result.status:<6} {result.duration_ms / 1000:7.1f}s  {result.title}{mode}")
+    failed = sum(not result.passed for result in results)
+    print(f"{len(results) - failed} passed, {failed} failed -> {destination}")
+
+
+def _print_run_summary(path: Path) -> None:
+    try:
+        summaries = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    for name, summary in summaries.items():
+        print(f"{name}: " + ", ".join(f"{key}={value}" for key, value in summary.items()))
+
+
+def _passthrough(args: argparse.Namespace) -> list[str]:
+    """Options a ``--processes`` parent forwards to each shard worker."""
+    forwarded = ["--concurrency", str(args.concurrency), "--test-timeout", str(args.test_timeout)]
+    if args.headed:
+        forwarded.append("--headed")
+    if args.no_auth_cache:
+        forwarded.append("--no-auth-cache")
+    if args.share_prefixes:
+        forwarded.append("--share-prefixes")
+    if args.static_cache:
+        forwarded.append("--static-cache")
+    if args.profile:
+        forwarded += ["--profile", args.profile]
+    if args.block_images:
+        forwarded.append("--block-images")
+    if args.fixtures:
+        forwarded.append("--fixtures")
+    if args.keep_fixtures:
+        forwarded.append("--keep-fixtures")
+    if args.fast_path:
+        forwarded.append("--fast-path")
+    if args.network_audit:
+        forwarded.append("--network-audit")
+    if args.coverage:
+        forwarded.append("--coverage")
+    if args.device:
+        forwarded += ["--device", args.device]
+    if args.fixed_waits:
+        forwarded.append("--fixed-waits")
+    else:
+        forwarded += ["--step-timeout", str(args.step_timeout)]
+    if args.only:
+        forwarded += ["--only", *args.only]
+    # The parent has already warmed the server up.
+    return [*forwarded, "--no-warmup"]
+
+
+def _describe_fixtures(fixtures: FixtureSet) -> str:
+    counts = f"{len(fixtures.users)} users, {len(fixtures.businesses)} businesses, {len(fixtures.reviews)} reviews"
+    timing = f"{fixtures.round_trips} round trips, {fixtures.elapsed_ms / 1000:.1f}s"
+    return f"fixtures: {fixtures.namespace}: {counts} ({timing})"
+
+
+def _write_outputs(results: list[TestResult], cases: dict[str, TestCase], device: str | None = None) -> None:
+    write_results(results, cases, RESULTS_PATH)
+    timings = {result.test_id: result.steps for result in results if result.steps}
+    write_timings(timings)
+    if device:
+        write_timings(timings, device_timings_path(device))
+    write_report(results)
+
+
+def _merge(device: str | None = None) -> list[TestResult]:
+    results = load_shards()
+    _write_outputs(results, {case.test_id: case for case in discover()}, device)
+    return results
+
+
+def _warm_up(args: argparse.Namespace) -> bool:
+    """Run the warm-up gate; False (after printing why) when the server is unusable."""
+    try:
+        report = asyncio.run(warm_up(base_url(), load_routes(), WarmupPolicy(health_timeout_s=args.warmup_timeout)))
+    except ServerUnavailable as exc:
+        print(exc, file=sys.stderr)
+        return False
+    slowest = report.slowest
+    detail = f", slowest {slowest.path} {slowest.elapsed_ms / 1000:.1f}s" if slowest else ""
+    print(f"warm-up: healthy after {report.health_ms / 1000:.1f}s, {len(report.routes)} routes compiled{detail}")
+    for route in report.routes:
+        if not isinstance(route.status, int) or route.status >= 400:
+            print(f"warm-up: {route.path} -> {route.status} {route.detail}".rstrip())
+    return True
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    if args.server != "managed":
+        if args.supabase:
+            print("--supabase needs --server managed (or run `python -m harness supabase` by hand).", file=sys.stderr)
+            return 2
+        return _run(args)
+    if args.supabase and args.network_audit and args.processes:
+        # Workers only know their own page windows, so the parent's stand-in calls could not be attributed.
+        print("--network-audit with --supabase needs a single process; drop --processes.", file=sys.stderr)
+        return 2
+    shard = ShardSpec.parse(args.shard) if args.shard else None
+    # Hand-started shards each get their own port, like --processes workers.
+    offset = shard.index - 1 if shard else 0
+    standin = None
+    try:
+        if args.supabase:
+            standin = SupabaseStandIn(args.supabase, port=args.supabase_port + offset)
+            standin.start_in_thread()
+            # Inlined into the client bundle, so switching to or from the stand-in rebuilds.
+            os.environ["NEXT_PUBLIC_SUPABASE_URL"] = standin.url
+            print(f"supabase: {args.supabase} on {standin.url}")
+        print("next build: " + ("built" if ensure_build(force=args.rebuild) else "up to date (cached .next)"))
+        with ManagedServers(count=args.processes or 1, port=args.server_port + offset) as servers:
+            print("next start: " + ", ".join(servers.origins))
+            os.environ["TESTSPRITE_BASE_URL"] = servers.origins[0]
+            return _run(args, servers.origins, standin)
+    except (ServerError, StandInError) as exc:
+        print(exc, file=sys.stderr)
+        return 3
+    finally:
+        if standin:
+            standin.stop_thread()
+            print("supabase: " + ", ".join(f"{key}={value}" for key, value in standin.summary().items()))
+
+
+def cmd_fixtures(args: argparse.Namespace) -> int:
+    try:
+        if args.action == "cleanup":
+            removed = asyncio.run(cleanup(args.prefix))
+            print(f"{args.prefix}: removed " + ", ".join(f"{count} {kind}" for kind, count in removed.items()))
+            return 0
+        namespace = Namespace(new_run_id(), args.worker)
+        counts = {"users": args.users, "pros": args.pros, "businesses": args.businesses}
+        fixtures = asyncio.run(provision(namespace, [], reviews_per_business=args.reviews, **counts))
+    except FixtureError as exc:
+        print(f"fixtures: {exc}", file=sys.stderr)
+        return 3
+    print(_describe_fixtures(fixtures))
+    print(f"manifest -> {manifest_path(fixtures.namespace)}")
+    return 0
+
+
+def cmd_supabase(args: argparse.Namespace) -> int:
+    try:
+        standin = SupabaseStandIn(args.mode, port=args.port, upstream=args.upstream)
+    except StandInError as exc:
+        print(exc, file=sys.stderr)
+        return 3
+
+    async def serve() -> None:
+        await standin.start()
+        print(f"supabase {args.mode} on {standin.url}; start the app with NEXT_PUBLIC_SUPABASE_URL={standin.url}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await standin.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    print(", ".join(f"{key}={value}" for key, value in standin.summary().items()))
+    return 0
+
+
+def _remove_fixtures(prefix: str) -> None:
+    """Clean up after a run; a failure is reported but must not replace the results."""
+    try:
+        removed = asyncio.run(cleanup(prefix))
+    except FixtureError as exc:
+        print(f"fixtures: cleanup of {prefix} failed: {exc}", file=sys.stderr)
+        print(f"fixtures: remove them later with `python -m harness fixtures cleanup {prefix}`", file=sys.stderr)
+        return
+    print("fixtures: removed " + ", ".join(f"{count} {kind}" for kind, count in removed.items()))
+
+
+def _run(
+    args: argparse.Namespace, origins: list[str] | None = None, standin: SupabaseStandIn | None = None
+) -> int:
+    if not args.no_warmup and not _warm_up(args):
+        return 3
+    if args.processes:
+        clear_shards()
+        # Workers namespace their fixtures under one run id.
+        os.environ.setdefault("TESTSPRITE_RUN_ID", new_run_id())
+        codes = asyncio.run(run_processes(args.processes, _passthrough(args), origins))
+        results = _merge(args.device)
+        _print_summary(results, RESULTS_PATH)
+        return max(codes, default=0)
+
+    cases = discover(only=args.only)
+    shard = ShardSpec.parse(args.shard) if args.shard else None
+    if shard:
+        cases = select_shard(cases, shard)
+    elif not cases:
+        print("No TC scripts matched.", file=sys.stderr)
+        return 2
+    device = get_device(args.device) if args.device else None
+    scale = device.timeout_scale if device else 1.0
+    options = RunOptions(
+        concurrency=args.concurrency,
+        headless=not args.headed,
+        test_timeout=args.test_timeout * scale,
+        wait_policy=None if args.fixed_waits else WaitPolicy(step_timeout_ms=args.step_timeout * 1000 * scale),
+        auth_cache=not args.no_auth_cache,
+        worker=f"shard{shard.index}" if shard else "local",
+        share_prefixes=args.share_prefixes,
+        static_cache=args.static_cache,
+        blocking=get_profile(args.profile, args.block_images) if args.profile else None,
+        fast_path=args.fast_path,
+        network_audit=NetworkAudit(standin) if args.network_audit else None,
+        coverage=CoverageRecorder() if args.coverage else None,
+        device=device,
+    )
+    if shard:
+        options.summary_path = shard.summary_path
+    if args.fixtures and cases:
+        try:
+            namespace = Namespace(new_run_id(), options.worker)
+            options.fixtures = asyncio.run(provision(namespace, [case.test_id for case in cases]))
+        except FixtureError as exc:
+            print(f"fixtures: {exc}", file=sys.stderr)
+            return 3
+        print(_describe_fixtures(options.fixtures))
+    try:
+        results = asyncio.run(run_suite(cases, options)) if cases else []
+    finally:
+        if options.fixtures and not args.keep_fixtures:
+            _remove_fixtures(options.fixtures.namespace)
+    if shard:
+        destination = write_shard(results, shard)
+    else:
+        _write_outputs(results, {case.test_id: case for case in cases}, args.device)
+        destination = RESULTS_PATH
+    _print_summary(results, destination)
+    _print_run_summary(options.summary_path)
+    return 1 if any(not result.passed for result in results) else 0
+
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    results = _merge()
+    if not results:
+        print("No shard results found.", file=sys.stderr)
+        return 2
+    _print_summary(results, RESULTS_PATH)
+    return 1 if any(not result.passed for result in results) else 0
+
+
+def cmd_vitals(args: argparse.Namespace) -> int:
+    routes = select_routes(load_routes(), args.routes, public_only=args.public_only)
+    if not routes:
+        print("No routes matched.", file=sys.stderr)
+        return 2
+    audited = asyncio.run(audit_routes(routes, runs=args.runs))
+    write_history(audited)
+    for result in audited:
+        if result.skipped:
+            print(f"SKIP   {result.route}: {result.skipped}")
+            continue
+        if result.error:
+            print(f"ERROR  {result.route}: {result.error}")
+            continue
+        metrics = ", ".join(f"{key}={value:g}" for key, value in result.median.items() if value is not None)
+        print(f"{'FAIL' if result.violations else 'OK':<6} {result.route}: {metrics}")
+        for violation in result.violations:
+            print(f"         over budget: {violation}")
+    print(f"history -> {HISTORY_DIR}")
+    if args.write_budgets:
+        print(f"budgets -> {write_budgets(audited, headroom=args.headroom)}")
+        return 0
+    seeded = seed_budgets(audited, headroom=args.headroom) if args.seed else []
+    if seeded:
+        print(f"baseline recorded for {', '.join(seeded)} -> {BUDGETS_PATH}; review and commit it")
+    missing = [route for route in BASELINE_ROUTES if route not in load_budgets().get("routes", {})]
+    if missing:
+        print(f"no per-route baseline yet for {', '.join(missing)}; record it with --seed", file=sys.stderr)
+    return 1 if any(result.violations or result.error for result in audited) else 0
+
+
+def cmd_page_weight(args: argparse.Namespace) -> int:
+    routes = select_routes(load_routes(), args.routes, public_only=True)
+    if not routes:
+        print("No public routes matched.", file=sys.stderr)
+        return 2
+    audited = asyncio.run(audit_page_weight(routes, args.viewports))
+    for result in audited:
+        if result.skipped:
+            print(f"SKIP   {result.route} [{result.viewport}]: {result.skipped}")
+            continue
+        if result.error:
+            print(f"ERROR  {result.route} [{result.viewport}]: {result.error}")
+            continue
+        weight = result.weight
+        print(
+            f"{'FAIL' if result.violations else 'OK':<6} {result.route} [{result.viewport}]: "
+            f"{weight['page_weight_bytes'] / 1024:.0f} kB in {weight['requests']} requests, "
+            f"images {weight['image_bytes'] / 1024:.0f} kB, fonts {weight['font_bytes'] / 1024:.0f} kB, "
+            f"{weight['after_scroll_bytes'] / 1024:.0f} kB after scrolling"
+        )
+        for violation in result.violations:
+            print(f"         over budget: {violation}")
+    worst = offenders(audited, args.show)
+    if worst:
+        print("\nlargest wasted image bytes:")
+    for image in worst:
+        print(
+            f"  {image['wasted_bytes'] / 1024:>6.0f} kB of {image['bytes'] / 1024:>5.0f}  {image['route']} "
+            f"[{image['viewport']}] {image['url']}"
+        )
+        print(f"         {'; '.join(image['reasons'])} (next/image: {image['next_image']})")
+    print(f"report -> {write_page_weight(audited)}")
+    return 1 if any(result.violations or result.error for result in audited) else 0
+
+
+def cmd_load(args: argparse.Namespace) -> int:
+    profile = LoadProfile(
+        users=args.users,
+        duration_s=args.duration,
+        ramp_up_s=args.ramp_up,
+        think_min_s=args.think_min,
+        think_max_s=args.think_max,
+        timeout_s=args.request_timeout,
+        seed=args.seed,
+        distinct_ips=args.spread_ips,
+    )
+    if args.spread_ips:
+        print(SPREAD_IPS_NOTE)
+    report = asyncio.run(LoadTest(args.origin or base_url(), profile).run())
+    print(f"{'endpoint':<26} {'reqs':>6} {'rps':>7} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, summary in [*report["endpoints"].items(), ("total", report["total"])]:
+        cells = [f"{summary[key]:.0f}" if summary[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms")]
+        print(
+            f"{endpoint:<26} {summary['requests']:>6} {summary['throughput_rps']:>7.2f} "
+            f"{summary['error_rate'] * 100:>5.1f}% " + " ".join(f"{cell:>8}" for cell in cells)
+        )
+    print(f"connections: {report['connections']} -> {write_load_report(report)}")
+    return 0
+
+
+def cmd_pages(args: argparse.Namespace) -> int:
+    paths = [args.template]
+    if args.values:
+        lines = Path(args.values).read_text(encoding="utf-8").splitlines()
+        paths = [args.template.replace("{value}", line.strip()) for line in lines if line.strip()]
+    checks = [Check("visible", f"text={text}") for text in args.expect_text or []]
+    checks += [Check("visible", selector) for selector in args.expect_selector or []]
+
+    async def run() -> list[PageCheck]:
+        fast = FastPath(args.origin, size=args.concurrency)
+        try:
+            return await check_pages(fast, paths, checks, concurrency=args.concurrency)
+        finally:
+            await fast.close()
+
+    checked = asyncio.run(run())
+    failed = [page for page in checked if not page.passed]
+    for page in failed:
+        print(f"FAIL   {page.path} ({page.status}): " + "; ".join(page.failures))
+    elapsed = sorted(page.elapsed_ms for page in checked)
+    median = elapsed[len(elapsed) // 2] if elapsed else 0.0
+    print(f"{len(checked) - len(failed)} passed, {len(failed)} failed; median fetch {median:.0f} ms")
+    return 1 if failed else 0
+
+
+def cmd_crawl(args: argparse.Namespace) -> int:
+    options = CrawlOptions(
+        concurrency=args.concurrency,
+        timeout_s=args.request_timeout,
+        top=args.top,
+        limit=args.limit,
+        include=args.include,
+        sitemap=args.sitemap,
+    )
+    crawl = Crawl(args.origin or base_url(), options)
+    pages_path, report_path = crawl_paths(utc_now())
+    try:
+        report = asyncio.run(crawl.run(pages_path))
+    except (HttpError, OSError, asyncio.TimeoutError, ElementTree.ParseError) as exc:
+        print(f"crawl: sitemap {crawl.sitemaps[-1] if crawl.sitemaps else args.sitemap}: {exc}", file=sys.stderr)
+        return 3
+    print(f"{'template':<44} {'pages':>6} {'p50':>7} {'p95':>7} {'max':>7} {'html kB':>8}  statuses")
+    for template, summary in report["templates"].items():
+        cells = [f"{summary[key]:.0f}" if summary[key] is not None else "-" for key in ("p50_ms", "p95_ms", "max_ms")]
+        statuses = ", ".join(f"{status}:{count}" for status, count in summary["statuses"].items())
+        print(
+            f"{template:<44} {summary['pages']:>6} " + " ".join(f"{cell:>7}" for cell in cells)
+            + f" {summary['mean_html_bytes'] / 1024:>8.1f}  {statuses}"
+        )
+    for title, key, unit in (("slowest", "total_ms", "ms"), ("largest", "html_bytes", "B")):
+        print(f"{title}:")
+        for page in report[title][: args.show]:
+            print(f"  {page[key]:>10.0f} {unit:<2} {page['status']}  {page['url']}")
+    print(
+        f"{report['pages']} pages in {report['elapsed_s']}s ({report['throughput_pps']}/s), "
+        f"{report['duplicates']} duplicates; connections: {report['connections']}"
+    )
+    print(f"pages -> {pages_path}\nreport -> {write_crawl_report(report, report_path)}")
+    return 1 if any(not status.isdigit() or int(status) >= 500 for status in report["statuses"]) else 0
+
+
+def _scale_rows(scale: str) -> int:
+    return SCALES.get(scale.lower()) or int(scale.lower().replace("k", "000").replace("m", "000000"))
+
+
+def cmd_dataset(args: argparse.Namespace) -> int:
+    if args.action == "generate":
+        for scale in args.scale:
+            spec = DatasetSpec(
+                businesses=_scale_rows(scale),
+                seed=args.seed,
+                reviews_per_business=args.reviews_per_business,
+                rating_skew=args.rating_skew,
+            )
+            manifest = generate(scale.lower(), spec)
+            ratings = ", ".join(f"{stars}★ {count}" for stars, count in manifest.ratings.items())
+            print(
+                f"{manifest.scale}: {manifest.businesses} businesses, {manifest.reviews} reviews "
+                f"({manifest.published_reviews} published: {ratings}) in {manifest.elapsed_s}s"
+            )
+        print("load with: psql \"$DATABASE_URL\" -f tmp/dataset/<scale>/load.sql")
+        return 0
+    try:
+        bench = QueryBench(args.supabase_url)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+
+    async def run() -> list[QueryResult]:
+        try:
+            return await bench.run(args.scale[0].lower(), runs=args.runs, only=args.only)
+        finally:
+            await bench.close()
+
+    results = asyncio.run(run())
+    write_bench(results)
+    print(f"{'query':<24} {'p50':>8} {'p95':>8} {'rows':>5} {'total':>8} {'kB':>7}")
+    for result in results:
+        cells = [f"{value:.0f}" if value is not None else "-" for value in (result.p50_ms, result.p95_ms)]
+        total = "-" if result.total is None else str(result.total)
+        print(
+            f"{result.query:<24} {cells[0]:>8} {cells[1]:>8} {result.rows:>5} {total:>8} "
+            f"{result.response_bytes / 1024:>7.1f}" + (f"  {result.error}" if result.error else "")
+        )
+    history = latest_by_scale()
+    scales = [scale for scale in SCALES if any(scale in by_scale for by_scale in history.values())]
+    if len(scales) > 1:
+        print("\np50 ms by scale (latest run each):")
+        print(f"{'query':<24} " + " ".join(f"{scale:>8}" for scale in scales) + "   growth")
+        for query, by_scale in history.items():
+            cells = [by_scale.get(scale, {}).get("p50_ms") for scale in scales]
+            slope = growth(by_scale)
+            print(
+                f"{query:<24} " + " ".join(f"{cell:>8.0f}" if cell is not None else f"{'-':>8}" for cell in cells)
+                + (f"   {slope:+.2f}" if slope is not None else "")
+            )
+    print(f"history -> {BENCH_PATH}")
+    return 1 if any(result.errors for result in results) else 0
+
+
+def cmd_network_audit(args: argparse.Namespace) -> int:
+    paths = [Path(path) for path in args.reports] or audit_reports()[-2:]
+    if not paths:
+        print("No audits yet: run `python -m harness run --network-audit` first.", file=sys.stderr)
+        return 2
+    report = load_audit(paths[-1])
+    captured = "captured" if report["server_calls_captured"] else "not captured (needs --supabase)"
+    print(f"{paths[-1].name} ({report['revision']}), server-side Supabase calls {captured}")
+    print(f"{'route':<40} {'visits':>6} {'req/visit':>9} {'kB':>8} {'supabase':>8}  findings")
+    for route, stats in report["routes"].items():
+        findings = ", ".join(f"{kind}:{count}" for kind, count in stats["findings"].items())
+        print(
+            f"{route:<40} {stats['visits']:>6} {stats['requests_per_visit']:>9} {stats['bytes'] / 1024:>8.0f} "
+            f"{stats['supabase_calls']:>8}  {findings}"
+        )
+    for finding in report["findings"][: args.show]:
+        detail = finding.get("url") or finding.get("shape") or " -> ".join(finding.get("chain", []))
+        sides = "/".join(finding["sides"])
+        print(f"  {finding['kind']:<12} {finding['page']:<32} {sides:<14} x{finding['count']}  {detail}")
+    if len(paths) > 1:
+        print(f"\nvs {paths[-2].name}:")
+        print(f"{'route':<40} {'req/visit':>17} {'kB/visit':>17} {'supabase':>13} {'findings':>13}")
+        for row in compare_audits(load_audit(paths[-2]), report):
+            cells = []
+            widths = {"requests_per_visit": 17, "bytes_per_visit": 17, "supabase_calls": 13, "findings": 13}
+            for key, width in widths.items():
+                old, new = row[key]
+                if key == "bytes_per_visit":
+                    old, new = (None if value is None else value / 1024 for value in (old, new))
+                cell = " -> ".join("-" if value is None else f"{value:.0f}" for value in (old, new))
+                cells.append(f"{cell:>{width}}")
+            print(f"{row['route']:<40} " + " ".join(cells))
+    return 0
+
+
+def _kb_change(old: int | None, new: int | None) -> str:
+    return " -> ".join("-" if value is None else f"{value / 1024:.0f}" for value in (old, new))
+
+
+def cmd_coverage(args: argparse.Namespace) -> int:
+    paths = [Path(path) for path in args.reports] or coverage_reports()[-2:]
+    if not paths:
+        print("No coverage yet: run `python -m harness run --coverage` first.", file=sys.stderr)
+        return 2
+    report = load_coverage(paths[-1])
+    totals = report["totals"]
+    print(
+        f"{paths[-1].name} ({report['revision']}): {totals['chunks']} chunks, {totals['mapped_chunks']} with source "
+        f"maps, {totals['js']['shipped'] / 1024:.0f} kB JS, {totals['js']['unused_pct']}% unused"
+    )
+    print(f"{'route':<40} {'visits':>6} {'JS kB':>8} {'unused':>7} {'CSS kB':>8} {'unused':>7}")
+    for route, stats in report["routes"].items():
+        js, css = stats["js"], stats["css"]
+        print(
+            f"{route:<40} {stats['visits']:>6} {js['shipped'] / 1024:>8.0f} {js['unused_pct']:>6}% "
+            f"{css['shipped'] / 1024:>8.0f} {css['unused_pct']:>6}%"
+        )
+    print("\nlargest unused modules:")
+    for module in report["unused_modules"][: args.show]:
+        chunks = len(module["chunks"])
+        where = f"{chunks} chunks" if chunks > 1 else module["chunks"][0]
+        sizes = f"{module['unused'] / 1024:>7.0f} kB of {module['shipped'] / 1024:>5.0f}"
+        print(f"  {sizes}  {module['module']}  ({where})")
+    for package, sizes in list(report["packages"].items())[: args.show]:
+        unused = sizes["shipped"] - sizes["used"]
+        print(f"  package {package:<40} {unused / 1024:>7.0f} kB unused of {sizes['shipped'] / 1024:.0f}")
+    if len(paths) > 1:
+        print(f"\nvs {paths[-2].name}:")
+        print(f"{'route':<40} {'JS shipped kB':>15} {'JS used kB':>15} {'CSS shipped kB':>15}")
+        for row in compare_coverage(load_coverage(paths[-2]), report):
+            cells = [f"{_kb_change(*row[key]):>15}" for key in ("js_shipped", "js_used", "css_shipped")]
+            print(f"{row['route']:<40} " + " ".join(cells))
+    return 0
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def cmd_devices(args: argparse.Namespace) -> int:
+    timings = load_device_timings(args.profiles)
+    if not timings:
+        print("No device timings yet: run `python -m harness run --device NAME` first.", file=sys.stderr)
+        return 2
+    names = list(timings)
+    for test_id, test in compare_devices(timings).items():
+        if args.only and test_id not in args.only:
+            continue
+        totals = ", ".join(f"{name} {test['totals'][name] / 1000:.1f}s" for name in names if name in test["totals"])
+        print(f"{test_id}: {totals}")
+        if args.totals:
+            continue
+        print(f"  {'#':>3} {'step':<40} " + " ".join(f"{name:>12}" for name in names))
+        for step in test["steps"]:
+            label = f"{step['action']} {step['target'] or ''}".strip()[:40]
+            print(f"  {step['index']:>3} {label:<40} " + " ".join(f"{_ms(step.get(name)):>12}" for name in names))
+    return 0
+
+
+def cmd_interactions(args: argparse.Namespace) -> int:
+    if not args.no_warmup and not _warm_up(args):
+        return 3
+    cases = discover(only=args.only)
+    if not cases:
+        print("No TC scripts matched.", file=sys.stderr)
+        return 2
+    profiler = InteractionProfiler()
+    options = RunOptions(
+        concurrency=args.concurrency,
+        headless=not args.headed,
+        # The login click is one of the interactions worth measuring.
+        auth_cache=args.auth_cache,
+        interactions=profiler,
+        summary_path=INTERACTIONS_DIR / "run_summary.json",
+    )
+    failed = 0
+    for iteration in range(1, args.iterations + 1):
+        profiler.iteration = iteration
+        results = asyncio.run(run_suite(cases, options))
+        failed += sum(not result.passed for result in results)
+        print(f"iteration {iteration}: " + ", ".join(f"{result.test_id} {result.status}" for result in results))
+    report = profiler.report(args.iterations)
+
+    def cell(values: dict[str, float | None]) -> str:
+        return "/".join("-" if values[key] is None else f"{values[key]:.0f}" for key in ("p50", "p95"))
+
+    for test_id, flow in report["flows"].items():
+        print(f"\n{test_id}: INP {cell(flow['inp_ms'])} ms, waiting on the UI {cell(flow['ui_wait_ms'])} ms (p50/p95)")
+        print(f"  {'step':<50} {'paint':>9} {'ui':>11} {'long':>9} {'round trip':>11} {'server':>11}")
+        for key, step in flow["steps"].items():
+            metrics = ("next_paint_ms", "ui_update_ms", "long_task_ms", "round_trip_ms", "server_ms")
+            widths = (9, 11, 9, 11, 11)
+            cells = " ".join(f"{cell(step[metric]):>{width}}" for metric, width in zip(metrics, widths))
+            calls = "  " + ", ".join(step["server_calls"]) if step["server_calls"] else ""
+            print(f"  {key[:50]:<50} {cells}{calls}")
+    print(f"\nreport -> {write_interactions(report)}")
+    return 1 if failed else 0
+
+
+def cmd_soak(args: argparse.Namespace) -> int:
+    options = SoakOptions(
+        iterations=args.iterations,
+        sample_every=args.sample_every,
+        warmup=args.warmup,
+        paths=tuple(args.paths),
+        role=args.role,
+        heap_threshold_kb=args.heap_threshold_kb,
+        node_threshold=args.node_threshold,
+        listener_threshold=args.listener_threshold,
+        snapshots=not args.no_snapshots,
+        confirm=args.confirm,
+        headless=not args.headed,
+    )
+    try:
+        result = asyncio.run(soak(options))
+    except SoakError as exc:
+        print(f"soak: {exc}", file=sys.stderr)
+        return 3
+    print(f"{'iteration':>9} {'heap MB':>8} {'nodes':>7} {'listeners':>9} {'docs':>5}")
+    for sample in result.samples:
+        print(
+            f"{sample.iteration:>9} {sample.heap_used / 2**20:>8.1f} {sample.nodes:>7} "
+            f"{sample.listeners:>9} {sample.documents:>5}"
+        )
+    for trend in result.trends:
+        unit = "kB" if trend.series == "heap_used" else ""
+        scale = 1024 if unit else 1
+        print(
+            f"{'LEAK' if trend.leaking else 'ok':<5} {trend.series:<10} {trend.slope / scale:+.2f}{unit}/iteration "
+            f"(limit {trend.threshold / scale:g}{unit}, r2 {trend.r2:.2f})"
+        )
+    navigations = ", ".join(f"{kind} {count}" for kind, count in result.navigations.items())
+    print(f"{result.elapsed_s:.0f}s, navigations: {navigations}")
+    if result.navigations.get("reload"):
+        print("warning: some sections were reached by full reloads, which reset the heap", file=sys.stderr)
+    for path in result.snapshots:
+        print(f"heap snapshot -> {path}")
+    print(f"report -> {write_soak(result)}")
+    return 1 if result.leaking else 0
+
+
+def cmd_repeat_visit(args: argparse.Namespace) -> int:
+    options = RepeatVisitOptions(
+        runs=args.runs,
+        keyword=args.keyword,
+        offline=not args.no_offline,
+        headless=not args.headed,
+        step_timeout_s=args.step_timeout,
+    )
+    result = asyncio.run(repeat_visit(options))
+    report = result.to_dict()
+    worker = "active" if result.service_worker else "not registered (sw.js is only registered by production builds)"
+    print(f"service worker: {worker}")
+    print(f"{'step':<10} {'TTFB ms':>17} {'ready ms':>17} {'network kB':>15} {'requests':>11}")
+    for name, row in report["comparison"]["steps"].items():
+        cells = []
+        for metric, width in (("ttfb_ms", 17), ("ready_ms", 17), ("network_bytes", 15), ("requests", 11)):
+            scale = 1024 if metric == "network_bytes" else 1
+            values = [row[metric][which] for which in ("cold", "warm")]
+            cell = " -> ".join("-" if value is None else f"{value / scale:.0f}" for value in values)
+            cells.append(f"{cell:>{width}}")
+        print(f"{name:<10} " + " ".join(cells))
+    totals = report["comparison"]["totals"]
+    cold, warm = totals["cold"], totals["warm"]
+    print(
+        f"journey: ready {cold.get('ready_ms', 0):.0f} -> {warm.get('ready_ms', 0):.0f} ms, "
+        f"network {cold.get('network_bytes', 0) / 1024:.0f} -> {warm.get('network_bytes', 0) / 1024:.0f} kB"
+    )
+    for kind, ratio in report["sw_hit_ratio"].items():
+        if ratio["worker"]:
+            hits = f"{ratio['cache_storage']}/{ratio['worker']}"
+            print(f"  sw {kind:<11} {hits} from Cache Storage ({ratio['ratio']:.0%})")
+    if result.offline:
+        route = result.offline_route
+        shows = "shows" if route.get("marker") else "lacks"
+        print(f"{OFFLINE_PATH} online: HTTP {route.get('status')}, {shows} the offline page")
+        for step in result.offline:
+            shown = "offline page" if step.offline_page else f"HTTP {step.status} from {step.document_source}"
+            print(f"  offline {step.step:<10} {step.error or shown}")
+        print(f"offline: {'OK' if result.offline_ok else 'FAIL'}")
+    print(f"report -> {write_repeat_visit(result)}")
+    return 1 if result.offline_ok is False else 0
+
+
+def cmd_search_bench(args: argparse.Namespace) -> int:
+    cases = tuple(case for case in CASES if not args.only or case.name in args.only)
+    options = SearchBenchOptions(
+        concurrency_levels=tuple(args.concurrency),
+        requests=args.requests,
+        db_runs=args.db_runs,
+        timeout_s=args.request_timeout,
+        routes=ROUTES if args.route == "both" else tuple(route for route in ROUTES if route.startswith(args.route)),
+        cases=cases,
+        database=not args.no_database,
+        distinct_ips=args.spread_ips,
+    )
+    if args.spread_ips:
+        print(SPREAD_IPS_NOTE)
+    report = asyncio.run(SearchBench(args.origin or base_url(), options).run(args.supabase_url))
+    print(f"{'case':<16} {'route':<26} {'c':>3} {'p50':>7} {'p95':>7} {'p99':>7} {'kB':>6} {'total':>7}  statuses")
+    for row in report["routes"]:
+        cells = [f"{row[key]:.0f}" if row[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms")]
+        statuses = ", ".join(f"{status}:{count}" for status, count in row["statuses"].items())
+        total = "-" if row["total"] is None else str(row["total"])
+        print(
+            f"{row['case']:<16} {row['route']:<26} {row['concurrency']:>3} " + " ".join(f"{cell:>7}" for cell in cells)
+            + f" {row['mean_bytes'] / 1024:>6.1f} {total:>7}  {statuses}"
+        )
+    if report["database"]:
+        print(f"\n{'database query':<20} {'exact p50':>10} {'none p50':>9} {'count +ms':>10} {'total':>8}")
+        for row in report["database"]:
+            cells = [
+                f"{row[key]:.0f}" if row[key] is not None else "-"
+                for key in ("exact_p50_ms", "none_p50_ms", "count_overhead_ms")
+            ]
+            total = "-" if row["total"] is None else str(row["total"])
+            print(
+                f"{row['case']:<20} {cells[0]:>10} {cells[1]:>9} {cells[2]:>10} {total:>8}"
+                + (f"  {row['error']}" if row["error"] else "")
+            )
+    elif report["database_error"]:
+        print(f"database layer skipped: {report['database_error']}")
+    path = write_search_bench(report)
+    baseline_revision = args.compare or previous_revision(report["revision"])
+    baseline = load_search_bench(baseline_revision) if baseline_revision else None
+    if baseline:
+        regressions = compare(baseline, report, args.threshold / 100)
+        print(f"\nvs {baseline_revision}: {len(regressions)} p50s slower by more than {args.threshold:g}%")
+        for regression in regressions:
+            print(
+                f"  {regression.key:<52} {regression.before_ms:>7.0f} -> {regression.after_ms:>7.0f} ms "
+                f"({regression.change:+.0%})"
+            )
+    elif args.compare:
+        print(f"no results for {args.compare} in {path.parent}", file=sys.stderr)
+    print(f"results -> {path}")
+    failed = any(row["unexpected"] for row in report["routes"]) or any(row["errors"] for row in report["database"])
+    return 1 if failed or (baseline and args.fail_on_regression and regressions) else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m harness", description="Local harness for the TestSprite TC scripts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run TC scripts concurrently in one shared browser")
+    _add_selection(run)
+    run.add_argument(
+        "--concurrency",
+        type=int,
+        default=env_int("TESTSPRITE_CONCURRENCY", DEFAULT_CONCURRENCY),
+        help="maximum tests in flight (default: $TESTSPRITE_CONCURRENCY or %(default)s)",
+    )
+    run.add_argument("--headed", action="store_true", help="show the browser window")
+    run.add_argument("--test-timeout", type=float, default=180.0, help="seconds before a test is failed")
+    run.add_argument(
+        "--fixed-waits", action="store_true", help="keep the scripts' fixed sleeps instead of readiness waits"
+    )
+    run.add_argument("--step-timeout", type=float, default=15.0, help="seconds a readiness wait may take")
+    run.add_argument(
+        "--no-auth-cache", action="store_true", help="log in through the UI in every test instead of reusing sessions"
+    )
+    run.add_argument(
+        "--share-prefixes", action="store_true", help="run shared opening steps once and start tests from a checkpoint"
+    )
+    run.add_argument(
+        "--static-cache", action="store_true", help="serve immutable static assets from tmp/static-cache"
+    )
+    run.add_argument("--profile", choices=sorted(PROFILES), help="request-filtering profile (default: none)")
+    run.add_argument("--block-images", action="store_true", help="with --profile functional, also block images")
+    run.add_argument(
+        "--server",
+        choices=("external", "managed"),
+        default="external",
+        help="external: test a running server (default); managed: build and start next start here",
+    )
+    run.add_argument(
+        "--server-port", type=int, default=DEFAULT_SERVER_PORT, help="first port for --server managed instances"
+    )
+    run.add_argument("--rebuild", action="store_true", help="with --server managed, run next build even if cached")
+    run.add_argument(
+        "--supabase", choices=MODES, help="with --server managed, point the app at a record/replay Supabase stand-in"
+    )
+    run.add_argument(
+        "--supabase-port", type=int, default=DEFAULT_STANDIN_PORT, help="port of the Supabase stand-in"
+    )
+    run.add_argument(
+        "--fixtures", action="store_true", help="give each test its own provisioned user and sign-up address"
+    )
+    run.add_argument("--keep-fixtures", action="store_true", help="leave --fixtures data in place after the run")
+    run.add_argument(
+        "--fast-path", action="store_true", help="decide fast_path.json tests over HTTP when they never interact"
+    )
+    run.add_argument(
+        "--network-audit",
+        action="store_true",
+        help="record every request; with --supabase, also the server's Supabase calls (tmp/network-audit)",
+    )
+    run.add_argument(
+        "--coverage", action="store_true", help="record JS/CSS coverage per route and map it to modules (tmp/coverage)"
+    )
+    run.add_argument(
+        "--device",
+        choices=list(DEVICES),
+        help="emulate this device's screen, CPU and network; timings also go to tmp/devices/NAME",
+    )
+    run.add_argument("--no-warmup", action="store_true", help="start tests without the health check and route warm-up")
+    run.add_argument(
+        "--warmup-timeout", type=float, default=120.0, help="seconds to wait for /api/health before aborting"
+    )
+    sharding = run.add_mutually_exclusive_group()
+    sharding.add_argument("--shard", metavar="i/N", help="run only shard i of N and write tmp/shards/")
+    sharding.add_argument("--processes", type=int, metavar="N", help="split the suite over N worker processes")
+    run.set_defaults(func=cmd_run)
+
+    merge = commands.add_parser("merge", help="combine tmp/shards/*.json into test_results.json and raw_report.md")
+    merge.set_defaults(func=cmd_merge)
+
+    vitals = commands.add_parser("vitals", help="measure Web Vitals per route and check perf_budgets.json")
+    vitals.add_argument("--routes", nargs="+", metavar="PATH", help="audit only these code_summary routes")
+    vitals.add_argument("--public-only", action="store_true", help="skip routes that need a login")
+    vitals.add_argument("--runs", type=int, default=3, help="loads per route; the median is kept")
+    vitals.add_argument(
+        "--write-budgets", action="store_true", help="store the measured medians (with headroom) as route budgets"
+    )
+    vitals.add_argument(
+        "--headroom", type=float, default=1.25, help="factor applied by --write-budgets and --seed"
+    )
+    vitals.add_argument(
+        "--seed", action="store_true", help="record a baseline in perf_budgets.json for routes that have none"
+    )
+    vitals.set_defaults(func=cmd_vitals)
+
+    page_weight = commands.add_parser(
+        "page-weight", help="list every image and font of the public routes and check page-weight budgets"
+    )
+    page_weight.add_argument("--routes", nargs="+", metavar="PATH", help="audit only these code_summary routes")
+    page_weight.add_argument(
+        "--viewports", nargs="+", choices=sorted(VIEWPORTS), help="default: all of %(choices)s"
+    )
+    page_weight.add_argument("--show", type=int, default=15, help="offending images printed")
+    page_weight.set_defaults(func=cmd_page_weight)
+
+    repeat = commands.add_parser(
+        "repeat-visit", help="walk home -> search -> business cold, warm (HTTP cache + sw.js) and offline"
+    )
+    repeat.add_argument("--runs", type=int, default=3, help="cold/warm pairs, each on a new profile; medians kept")
+    repeat.add_argument("--keyword", default="banque", help="search step keyword (default: %(default)s)")
+    repeat.add_argument("--no-offline", action="store_true", help="skip the offline pass")
+    repeat.add_argument("--headed", action="store_true", help="show the browser window")
+    repeat.add_argument("--step-timeout", type=float, default=20.0, help="seconds per navigation")
+    repeat.set_defaults(func=cmd_repeat_visit)
+
+    fixtures = commands.add_parser("fixtures", help="provision or remove namespaced test data in bulk")
+    fixture_actions = fixtures.add_subparsers(dest="action", required=True)
+    provision_parser = fixture_actions.add_parser("provision", help="create users, pros, businesses and reviews")
+    provision_parser.add_argument("--users", type=int, default=0)
+    provision_parser.add_argument("--pros", type=int, default=0, help="pro accounts, each owning a fixture business")
+    provision_parser.add_argument("--businesses", type=int, default=0)
+    provision_parser.add_argument("--reviews", type=int, default=0, help="reviews per business, by distinct users")
+    provision_parser.add_argument("--worker", default="local", help="namespace component (default: %(default)s)")
+    cleanup_parser = fixture_actions.add_parser("cleanup", help="delete everything under a namespace prefix")
+    cleanup_parser.add_argument("prefix", help="e.g. e2e-20261017120000 (a whole run) or one worker's namespace")
+    fixtures.set_defaults(func=cmd_fixtures)
+
+    supabase = commands.add_parser("supabase", help="serve the Supabase record/replay stand-in until interrupted")
+    supabase.add_argument("mode", choices=MODES)
+    supabase.add_argument("--port", type=int, default=DEFAULT_STANDIN_PORT, help="port to listen on")
+    supabase.add_argument("--upstream", help="real project URL to record from (default: NEXT_PUBLIC_SUPABASE_URL)")
+    supabase.set_defaults(func=cmd_supabase)
+
+    pages = commands.add_parser("pages", help="check text or selectors on many pages over HTTP, without a browser")
+    pages.add_argument("template", help="path, with {value} replaced by each --values line, e.g. /businesses/{value}")
+    pages.add_argument("--values", help="file with one value (e.g. a business slug) per line")
+    pages.add_argument("--expect-text", nargs="+", metavar="TEXT", help="text each page must show")
+    pages.add_argument("--expect-selector", nargs="+", metavar="SELECTOR", help="selector each page must match")
+    pages.add_argument("--origin", help="server to check (default: the suite's base URL)")
+    pages.add_argument("--concurrency", type=int, default=16, help="pages fetched at once")
+    pages.set_defaults(func=cmd_pages)
+
+    crawl = commands.add_parser("crawl", help="fetch every sitemap URL and survey latency, size and caching")
+    crawl.add_argument("--origin", help="server to crawl (default: the suite's base URL)")
+    crawl.add_argument("--sitemap", default="/sitemap.xml", help="sitemap or sitemap index path")
+    crawl.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    crawl.add_argument("--limit", type=int, help="stop after this many pages")
+    crawl.add_argument("--include", metavar="REGEX", help="only crawl paths matching this expression")
+    crawl.add_argument("--top", type=int, default=25, help="slowest and largest pages kept in the report")
+    crawl.add_argument("--show", type=int, default=10, help="slowest and largest pages printed")
+    crawl.add_argument("--request-timeout", type=float, default=30.0, help="seconds before a page counts as failed")
+    crawl.set_defaults(func=cmd_crawl)
+
+    dataset = commands.add_parser("dataset", help="generate synthetic businesses/reviews and benchmark queries")
+    dataset_actions = dataset.add_subparsers(dest="action", required=True)
+    generate_parser = dataset_actions.add_parser("generate", help="write COPY files and load.sql per scale")
+    generate_parser.add_argument("--scale", nargs="+", default=["10k"], help="10k, 100k, 1m or a business count")
+    generate_parser.add_argument("--seed", type=int, default=20260401)
+    generate_parser.add_argument("--reviews-per-business", type=float, default=3.0, help="mean; heavy-tailed")
+    generate_parser.add_argument(
+        "--rating-skew", type=float, default=1.0, help="0 centres ratings on 3 stars; higher values are kinder"
+    )
+    bench_parser = dataset_actions.add_parser("bench", help="time the search and listing queries at the loaded scale")
+    bench_parser.add_argument("--scale", nargs=1, required=True, help="scale currently loaded (labels the results)")
+    bench_parser.add_argument("--runs", type=int, default=10, help="timed requests per query")
+    bench_parser.add_argument("--only", nargs="+", metavar="QUERY", help="run only these queries")
+    bench_parser.add_argument("--supabase-url", help="PostgREST origin (default: NEXT_PUBLIC_SUPABASE_URL)")
+    dataset.set_defaults(func=cmd_dataset)
+
+    network_audit = commands.add_parser("network-audit", help="show the latest network audit and diff it with the last")
+    network_audit.add_argument("reports", nargs="*", metavar="REPORT", help="audit JSON files, older first")
+    network_audit.add_argument("--show", type=int, default=20, help="findings printed")
+    network_audit.set_defaults(func=cmd_network_audit)
+
+    coverage = commands.add_parser("coverage", help="show the latest JS/CSS coverage report and diff it with the last")
+    coverage.add_argument("reports", nargs="*", metavar="REPORT", help="coverage JSON files, older first")
+    coverage.add_argument("--show", type=int, default=15, help="modules and packages printed")
+    coverage.set_defaults(func=cmd_coverage)
+
+    devices = commands.add_parser("devices", help="compare per-step timings of the TC flows across device profiles")
+    devices.add_argument(
+        "--profiles", nargs="+", choices=list(DEVICES), default=list(DEVICES), help="default: all of %(choices)s"
+    )
+    devices.add_argument("--only", nargs="+", metavar="TCxxx", help="show only these test ids")
+    devices.add_argument("--totals", action="store_true", help="print only each test's total per profile")
+    devices.set_defaults(func=cmd_devices)
+
+    interactions = commands.add_parser("interactions", help="time clicks and fills from input to paint")
+    interactions.add_argument(
+        "--only", nargs="+", metavar="TCxxx", default=list(DEFAULT_FLOWS), help="flows to profile (default: TC020-22)"
+    )
+    interactions.add_argument("--iterations", type=int, default=10, help="passes through every flow")
+    interactions.add_argument("--concurrency", type=int, default=1, help="flows in flight; more skews the timings")
+    interactions.add_argument("--headed", action="store_true", help="show the browser window")
+    interactions.add_argument("--auth-cache", action="store_true", help="reuse saved logins instead of timing them")
+    interactions.add_argument("--no-warmup", action="store_true", help="skip the health check and route warm-up")
+    interactions.add_argument("--warmup-timeout", type=float, default=120.0, help="seconds to wait for /api/health")
+    interactions.set_defaults(func=cmd_interactions)
+
+    soak_parser = commands.add_parser("soak", help="loop dashboard navigation and detect JS heap or DOM growth")
+    soak_parser.add_argument("--iterations", type=int, default=200, help="passes through every section")
+    soak_parser.add_argument("--sample-every", type=int, default=10, help="iterations between heap samples")
+    soak_parser.add_argument("--warmup", type=int, default=20, help="iterations left out of the trend")
+    soak_parser.add_argument("--paths", nargs="+", default=list(DEFAULT_PATHS), help="sections, first one opened once")
+    soak_parser.add_argument("--role", default="pro", help="account role to sign in as")
+    soak_parser.add_argument("--heap-threshold-kb", type=float, default=50.0, help="heap growth per iteration")
+    soak_parser.add_argument("--node-threshold", type=float, default=5.0, help="DOM node growth per iteration")
+    soak_parser.add_argument("--listener-threshold", type=float, default=1.0, help="listener growth per iteration")
+    soak_parser.add_argument("--confirm", type=int, default=20, help="iterations between the two leak snapshots")
+    soak_parser.add_argument("--no-snapshots", action="store_true", help="never write heap snapshots")
+    soak_parser.add_argument("--headed", action="store_true", help="show the browser window")
+    soak_parser.set_defaults(func=cmd_soak)
+
+    search_bench = commands.add_parser("search-bench", help="benchmark both search routes per query shape")
+    search_bench.add_argument("--origin", help="server to benchmark (default: the suite's base URL)")
+    search_bench.add_argument(
+        "--route", choices=("both", "/api/businesses", "/api/v1"), default="both", help="which search route to time"
+    )
+    search_bench.add_argument("--only", nargs="+", metavar="CASE", help="run only these cases")
+    search_bench.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="concurrency levels")
+    search_bench.add_argument("--requests", type=int, default=20, help="requests per case and concurrency level")
+    search_bench.add_argument("--db-runs", type=int, default=10, help="timed PostgREST requests per query")
+    search_bench.add_argument("--no-database", action="store_true", help="skip the PostgREST count/sort layer")
+    search_bench.add_argument("--supabase-url", help="PostgREST origin (default: NEXT_PUBLIC_SUPABASE_URL)")
+    search_bench.add_argument("--compare", metavar="REV", help="revision to compare with (default: the previous run)")
+    search_bench.add_argument("--threshold", type=float, default=20.0, help="percent p50 growth reported")
+    search_bench.add_argument("--fail-on-regression", action="store_true", help="exit 1 when any p50 regressed")
+    search_bench.add_argument("--request-timeout", type=float, default=30.0, help="seconds before a request fails")
+    search_bench.add_argument("--spread-ips", action="store_true", help=SPREAD_IPS_HELP)
+    search_bench.set_defaults(func=cmd_search_bench)
+
+    load = commands.add_parser("load", help="replay weighted browse/search journeys with concurrent virtual users")
+    load.add_argument("--origin", help="server to load (default: the suite's base URL)")
+    load.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    load.add_argument("--duration", type=float, default=60.0, help="seconds at full load, after ramp-up")
+    load.add_argument("--ramp-up", type=float, default=10.0, help="seconds over which users start")
+    load.add_argument("--think-min", type=float, default=1.0, help="shortest pause between a user's requests")
+    load.add_argument("--think-max", type=float, default=3.0, help="longest pause between a user's requests")
+    load.add_argument("--request-timeout", type=float, default=30.0, help="seconds before a request counts as failed")
+    load.add_argument("--seed", type=int, help="make journey and parameter choices repeatable")
+    load.add_argument("--spread-ips", action="store_true", help=SPREAD_IPS_HELP)
+    load.set_defaults(func=cmd_load)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
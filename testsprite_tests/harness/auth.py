@@ -0,0 +1,204 @@
+"""Log in once per role and worker, then reuse the Supabase session.
+
+The review and dashboard scripts all sign in through the ``/login`` form
+before doing anything else, some of them two or three times. With the
+cache enabled, the first sign-in for a role performs the UI login once in a
+throwaway context and saves Playwright ``storage_state`` (the Supabase
+``sb-*-auth-token`` cookies) under ``tmp/auth/``. When a script then fills a
+known account's email into the login form, :class:`LoginShortcut` copies
+the saved session into the test's context, skips the form and goes where a
+successful login would have redirected.
+
+Saved states are reused across runs until the access token inside the
+cookie is about to expire, then refreshed by logging in again. Tests whose
+subject is authentication itself keep the real UI login.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+from .config import TMP_DIR, base_url
+
+AUTH_DIR = TMP_DIR / "auth"
+# Plan categories whose tests exercise the login form and must not skip it.
+UI_LOGIN_CATEGORIES = frozenset({"Authentication"})
+# Refresh a session this many seconds before its access token expires.
+EXPIRY_MARGIN_S = 120
+
+_AUTH_COOKIE_MARKER = "-auth-token"
+_BASE64_PREFIX = "base64-"
+
+
+class AuthError(RuntimeError):
+    """Logging in to build a cached session failed."""
+
+
+@dataclass(frozen=True)
+class Role:
+    name: str
+    email: str
+    password: str
+
+
+def configured_roles() -> dict[str, Role]:
+    """Roles with credentials: ``user`` always, ``pro``/``admin`` when set in the env."""
+    roles = {
+        "user": Role(
+            "user",
+            os.environ.get("TESTSPRITE_USER_EMAIL", "example@gmail.com"),
+            os.environ.get("TESTSPRITE_USER_PASSWORD", "password123"),
+        )
+    }
+    for name in ("pro", "admin"):
+        email = os.environ.get(f"TESTSPRITE_{name.upper()}_EMAIL")
+        password = os.environ.get(f"TESTSPRITE_{name.upper()}_PASSWORD")
+        if email and password:
+            roles[name] = Role(name, email, password)
+    return roles
+
+
+def session_expires_at(state: dict[str, Any]) -> float | None:
+    """``expires_at`` of the Supabase session stored in ``state``'s cookies.
+
+    ``@supabase/ssr`` may split the cookie into ``.0``, ``.1``… chunks and
+    prefix the value with ``base64-``; both forms are handled.
+    """
+    chunks: dict[str, list[tuple[str, str]]] = {}
+    for cookie in state.get("cookies", []):
+        name = cookie.get("name", "")
+        if _AUTH_COOKIE_MARKER not in name:
+            continue
+        base, _, suffix = name.partition(_AUTH_COOKIE_MARKER)
+        if suffix and not (suffix.startswith(".") and suffix[1:].isdigit()):
+            continue  # e.g. the PKCE "-code-verifier" cookie
+        chunks.setdefault(base, []).append((suffix, cookie.get("value", "")))
+    for parts in chunks.values():
+        raw = "".join(value for _, value in sorted(parts, key=lambda part: int(part[0][1:] or 0)))
+        raw = unquote(raw)
+        if raw.startswith(_BASE64_PREFIX):
+            encoded = raw[len(_BASE64_PREFIX) :]
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+        try:
+            session = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(session, list):  # legacy [access_token, refresh_token, ...] form
+            continue
+        if isinstance(session, dict) and isinstance(session.get("expires_at"), (int, float)):
+            return float(session["expires_at"])
+    return None
+
+
+def _is_fresh(state: dict[str, Any]) -> bool:
+    expires_at = session_expires_at(state)
+    return expires_at is not None and expires_at - EXPIRY_MARGIN_S > time.time()
+
+
+class AuthStateCache:
+    """Saved ``storage_state`` per role for one worker, refreshed on expiry."""
+
+    def __init__(self, browser: Browser, worker: str = "local", directory: Path = AUTH_DIR) -> None:
+        self._browser = browser
+        self._worker = worker
+        self._directory = directory
+        self._states: dict[str, dict[str, Any]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def path_for(self, role: Role) -> Path:
+        return self._directory / f"{self._worker}-{role.name}.json"
+
+    async def state(self, role: Role) -> dict[str, Any]:
+        async with self._locks.setdefault(role.name, asyncio.Lock()):
+            state = self._states.get(role.name)
+            if state is None:
+                try:
+                    state = json.loads(self.path_for(role).read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    state = None
+            if state is None or not _is_fresh(state):
+                state = await self._login(role)
+            self._states[role.name] = state
+            return state
+
+    async def _login(self, role: Role) -> dict[str, Any]:
+        path = self.path_for(role)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        context = await self._browser.new_context()
+        try:
+            page = await context.new_page()
+            await page.goto(f"{base_url()}/login", wait_until="domcontentloaded", timeout=60_000)
+            await page.locator('form input[type="email"], form input[name="email"]').first.fill(role.email)
+            await page.locator('form input[type="password"]').first.fill(role.password)
+            await page.locator('form button[type="submit"]').first.click()
+            await page.wait_for_url(lambda url: urlsplit(url).path.rstrip("/") != "/login", timeout=30_000)
+            state = await context.storage_state(path=str(path))
+        except Exception as exc:
+            raise AuthError(f"could not log in as {role.name} ({role.email}): {exc}") from exc
+        finally:
+            await context.close()
+        if session_expires_at(state) is None:
+            raise AuthError(f"logging in as {role.name} ({role.email}) left no Supabase session cookie")
+        return state
+
+
+async def apply_state(context: BrowserContext, state: dict[str, Any]) -> None:
+    """Copy cookies and localStorage from ``state`` into an existing context."""
+    await context.add_cookies(state.get("cookies", []))
+    for origin in state.get("origins", []):
+        items = [[item["name"], item["value"]] for item in origin.get("localStorage", [])]
+        if items:
+            await context.add_init_script(
+                script=f"if (location.origin === {json.dumps(origin['origin'])}) "
+                f"for (const [k, v] of {json.dumps(items)}) localStorage.setItem(k, v);"
+            )
+
+
+def _login_destination(url: str) -> str:
+    """Where the login page sends the browser after a successful sign-in."""
+    parts = urlsplit(url)
+    if parts.path.rstrip("/") != "/login":
+        return url
+    next_path = parse_qs(parts.query).get("next", ["/"])[0]
+    return f"{parts.scheme}://{parts.netloc}{next_path if next_path.startswith('/') else '/'}"
+
+
+class LoginShortcut:
+    """Replaces one test's login-form steps with a cached session."""
+
+    def __init__(self, cache: AuthStateCache, roles: dict[str, Role] | None = None) -> None:
+        self._cache = cache
+        self._roles = {role.email.lower(): role for role in (roles or configured_roles()).values()}
+        self._applied: set[str] = set()
+        self._pending: Page | None = None
+
+    async def intercept(
+        self, page: Page, action: str, args: tuple, navigate: Callable[[str], Awaitable[Any]]
+    ) -> bool:
+        """Handle ``action`` if it is part of a login; True means it was skipped."""
+        if action == "fill" and args:
+            role = self._roles.get(str(args[0]).strip().lower())
+            on_login_page = urlsplit(page.url).path.rstrip("/") == "/login"
+            if role and (on_login_page or role.name in self._applied):
+                if role.name not in self._applied:
+                    await apply_state(page.context, await self._cache.state(role))
+                    self._applied.add(role.name)
+                self._pending = page
+                return True
+            # The password field of a form already being skipped.
+            return self._pending is page
+        if self._pending is page and action in ("click", "press"):
+            self._pending = None
+            await navigate(_login_destination(page.url))
+            return True
+        return False
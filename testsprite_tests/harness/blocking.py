@@ -0,0 +1,157 @@
+"""Named request-filtering profiles for functional runs.
+
+The app pulls in Google Analytics, AdSense, Facebook and other third-party
+scripts that no TC script asserts on, yet every ``goto`` and network-quiet
+wait pays for them. A :class:`RequestFilter` attached with a profile
+aborts matching requests before they leave the browser:
+
+``functional``
+    Blocks analytics and ad hosts and any other third-party origin except
+    Supabase (the app's backend) and hosts listed in
+    ``TESTSPRITE_ALLOWED_HOSTS``. ``--block-images`` also blocks images.
+``full``
+    Blocks nothing. Requests ``functional`` would have blocked are still
+    counted, and their sizes are remembered in ``tmp/blocking-sizes.json``
+    so later ``functional`` runs can report the bytes they avoided.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Request, Route
+
+from .config import TMP_DIR, base_url
+
+SIZES_PATH = TMP_DIR / "blocking-sizes.json"
+
+ANALYTICS_HOSTS = (
+    "googletagmanager.com",
+    "google-analytics.com",
+    "analytics.google.com",
+    "connect.facebook.net",
+    "facebook.com",
+    "vercel.live",
+)
+AD_HOSTS = (
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adtrafficquality.google",
+)
+# Third-party origins the app cannot work without.
+ESSENTIAL_HOSTS = ("supabase.co", "supabase.in")
+
+
+def _host_matches(host: str, suffixes: tuple[str, ...]) -> bool:
+    return any(host == suffix or host.endswith("." + suffix) for suffix in suffixes)
+
+
+def _allowed_hosts() -> tuple[str, ...]:
+    extra = os.environ.get("TESTSPRITE_ALLOWED_HOSTS", "")
+    supabase = urlsplit(os.environ.get("NEXT_PUBLIC_SUPABASE_URL", "")).hostname
+    return ESSENTIAL_HOSTS + tuple(host.strip() for host in extra.split(",") if host.strip()) + ((supabase,) if supabase else ())
+
+
+@dataclass(frozen=True)
+class BlockingProfile:
+    name: str
+    enforce: bool
+    block_third_party: bool = True
+    block_images: bool = False
+
+
+PROFILES = {
+    "functional": BlockingProfile("functional", enforce=True),
+    "full": BlockingProfile("full", enforce=False),
+}
+
+
+def get_profile(name: str, block_images: bool = False) -> BlockingProfile:
+    try:
+        profile = PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown blocking profile {name!r}; choose from {', '.join(PROFILES)}") from None
+    return replace(profile, block_images=block_images) if block_images else profile
+
+
+class RequestFilter:
+    """Context hook that aborts, or just counts, non-essential requests."""
+
+    name = "request_filter"
+
+    def __init__(self, profile: BlockingProfile, origin: str | None = None, sizes_path: Path = SIZES_PATH) -> None:
+        self.profile = profile
+        self._app_host = urlsplit(origin or base_url()).hostname or "localhost"
+        self._allowed = _allowed_hosts()
+        self._sizes_path = sizes_path
+        try:
+            self._sizes: dict[str, int] = json.loads(sizes_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._sizes = {}
+        self.counts: Counter[str] = Counter()
+        self.bytes: Counter[str] = Counter()
+        self.hosts: Counter[str] = Counter()
+
+    def classify(self, request: Request) -> str | None:
+        """Why ``request`` is non-essential, or None if it must go through."""
+        host = urlsplit(request.url).hostname or ""
+        if _host_matches(host, AD_HOSTS):
+            return "ads"
+        if _host_matches(host, ANALYTICS_HOSTS):
+            return "analytics"
+        third_party = host != self._app_host and not _host_matches(host, self._allowed)
+        if self.profile.block_third_party and third_party and request.url.startswith("http"):
+            return "third_party"
+        if self.profile.block_images and request.resource_type == "image":
+            return "images"
+        return None
+
+    def _record(self, reason: str, request: Request) -> None:
+        self.counts[reason] += 1
+        self.bytes[reason] += self._sizes.get(request.url, 0)
+        self.hosts[urlsplit(request.url).hostname or "?"] += 1
+
+    async def _handle(self, route: Route, request: Request) -> None:
+        reason = self.classify(request)
+        if reason is None:
+            await route.fallback()
+            return
+        self._record(reason, request)
+        await route.abort("blockedbyclient")
+
+    async def _measure(self, request: Request) -> None:
+        reason = self.classify(request)
+        if reason is None:
+            return
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self._sizes[request.url] = sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        self._record(reason, request)
+
+    async def attach(self, context: BrowserContext) -> None:
+        if self.profile.enforce:
+            await context.route("**/*", self._handle)
+        else:
+            context.on("requestfinished", self._measure)
+
+    def summary(self) -> dict[str, Any]:
+        if not self.profile.enforce:
+            self._sizes_path.parent.mkdir(parents=True, exist_ok=True)
+            self._sizes_path.write_text(json.dumps(self._sizes, indent=0, sort_keys=True), encoding="utf-8")
+        return {
+            "profile": self.profile.name,
+            "enforced": self.profile.enforce,
+            "requests": sum(self.counts.values()),
+            "bytes": sum(self.bytes.values()),
+            "by_reason": {reason: {"requests": self.counts[reason], "bytes": self.bytes[reason]} for reason in sorted(self.counts)},
+            "top_hosts": dict(self.hosts.most_common(10)),
+        }
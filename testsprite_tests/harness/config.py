@@ -0,0 +1,99 @@
+"""Paths and settings shared by the TestSprite suite harness."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+SUITE_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = SUITE_DIR.parent
+TMP_DIR = SUITE_DIR / "tmp"
+
+RESULTS_PATH = TMP_DIR / "test_results.json"
+REPORT_PATH = TMP_DIR / "raw_report.md"
+TEST_PLAN_PATH = SUITE_DIR / "testsprite_frontend_test_plan.json"
+CODE_SUMMARY_PATH = TMP_DIR / "code_summary.yaml"
+TESTSPRITE_CONFIG_PATH = TMP_DIR / "config.json"
+
+DEFAULT_BASE_URL = "http://localhost:9002"
+DEFAULT_CONCURRENCY = 4
+
+# The generated scripts launch with --single-process, which is fine for one
+# context per browser but crashes renderers once several contexts share it.
+BROWSER_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+]
+
+
+def _read_json(path: Path) -> Any:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def testsprite_config() -> dict[str, Any]:
+    data = _read_json(TESTSPRITE_CONFIG_PATH)
+    return data if isinstance(data, dict) else {}
+
+
+def script_origin() -> str:
+    """Origin hard-coded into the generated TC scripts."""
+    return (testsprite_config().get("localEndpoint") or DEFAULT_BASE_URL).rstrip("/")
+
+
+def base_url() -> str:
+    """Origin of the app under test, without a trailing slash."""
+    return (os.environ.get("TESTSPRITE_BASE_URL") or script_origin()).rstrip("/")
+
+
+def rebase(url: str) -> str:
+    """Point a script URL at the app under test when it runs elsewhere (another port, a managed server)."""
+    origin, target = script_origin(), base_url()
+    if origin != target and url.startswith(origin):
+        return target + url[len(origin) :]
+    return url
+
+
+def dotenv(name: str) -> str | None:
+    """``name`` from the environment, else from the app's ``.env.local`` / ``.env``."""
+    if os.environ.get(name):
+        return os.environ[name]
+    for filename in (".env.local", ".env"):
+        try:
+            lines = (REPO_ROOT / filename).read_text(encoding="utf-8").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            key, _, value = line.partition("=")
+            if key.strip() == name and value.strip():
+                return value.strip().strip("\"'")
+    return None
+
+
+def env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise SystemExit(f"{name} must be an integer, got {raw!r}")
+
+
+@lru_cache(maxsize=None)
+def git_revision() -> str:
+    """Short commit hash of the checkout, or ``"unknown"`` outside git."""
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    return completed.stdout.strip() or "unknown"
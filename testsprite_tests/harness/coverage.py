@@ -0,0 +1,601 @@
+"""JS and CSS coverage per route: what each page ships against what it runs.
+
+``next dev`` compiles thousands of modules for ``/`` alone, and
+``optimizePackageImports`` in ``next.config.ts`` only trims what it knows
+about. :class:`CoverageRecorder` is a context hook that measures the
+result while the TC flows run. Every page gets its own CDP session with
+V8 precise block coverage (``Profiler.startPreciseCoverage``) and CSS rule
+usage tracking. Each time the main frame navigates or changes its URL
+client-side, the coverage so far is taken. It is then credited to the
+route template the page was on.
+
+Per route, a chunk is *shipped* when its script or stylesheet was loaded
+in the page during a visit. A byte is *used* when a visit ran it (JS) or a
+rule from it matched (CSS). Counts are characters of the served source.
+For minified bundles, that is the uncompressed byte size. Only the app's
+own ``/_next/`` chunks are counted, plus the ``webpack-internal://``
+modules that ``next dev`` evaluates one by one; inline RSC payload
+scripts are left out.
+
+Chunks are attributed to source modules through their source maps, which
+are fetched when the report is written. ``next dev`` serves them. Production
+builds serve them only with ``productionBrowserSourceMaps``. Chunks without
+a map are reported as a single module named after the chunk.
+
+The report is written to ``tmp/coverage/coverage-<stamp>.json``:
+
+- used and shipped bytes per route and chunk,
+- the largest unused modules,
+- bytes per npm package.
+
+One line per run is appended to ``history.jsonl``. :func:`compare_coverage`
+diffs two reports.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import re
+import urllib.request
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import unquote, urljoin, urlsplit
+
+from playwright.async_api import BrowserContext, CDPSession, Page
+
+from .config import TMP_DIR, base_url, git_revision
+from .results import utc_now
+from .routes import TemplateMatcher
+
+COVERAGE_DIR = TMP_DIR / "coverage"
+HISTORY_PATH = COVERAGE_DIR / "history.jsonl"
+DEV_MODULE_PREFIX = "webpack-internal://"
+DEV_CHUNK = "(dev modules)"
+UNMAPPED = "(unmapped)"
+_BASE64 = {char: index for index, char in enumerate(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+)}
+_SOURCE_PREFIXES = re.compile(r"^(webpack-internal:///|webpack://[^/]*/|turbopack://(\[project\]/)?)")
+_LAYER = re.compile(r"^\([^)]*\)/")
+
+Range = tuple[int, int]
+
+
+def merge_ranges(ranges: Iterable[Range]) -> list[Range]:
+    merged: list[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        elif end > start:
+            merged.append((start, end))
+    return merged
+
+
+def executed_ranges(functions: list[dict[str, Any]]) -> list[Range]:
+    """Offsets V8 block coverage reports as run, as disjoint sorted ranges.
+
+    Block ranges nest, and an inner range overrides the count of the one
+    around it, so each stretch of source takes the innermost count.
+    """
+    blocks = sorted(
+        ((block["startOffset"], block["endOffset"], block["count"]) for function in functions
+         for block in function["ranges"]),
+        key=lambda block: (block[0], -block[1]),
+    )
+    used: list[Range] = []
+    stack: list[tuple[int, int]] = []
+    position = 0
+
+    def emit(start: int, end: int, count: int) -> None:
+        if end > start and count > 0:
+            used.append((start, end))
+
+    for start, end, count in blocks:
+        while stack and stack[-1][0] <= start:
+            closing, closing_count = stack.pop()
+            emit(position, closing, closing_count)
+            position = max(position, closing)
+        if stack:
+            emit(position, start, stack[-1][1])
+        position = start
+        stack.append((end, count))
+    while stack:
+        closing, closing_count = stack.pop()
+        emit(position, closing, closing_count)
+        position = max(position, closing)
+    return merge_ranges(used)
+
+
+def decode_vlq(segment: str) -> list[int]:
+    values, shift, value = [], 0, 0
+    for char in segment:
+        digit = _BASE64[char]
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+            continue
+        values.append(-(value >> 1) if value & 1 else value >> 1)
+        shift = value = 0
+    return values
+
+
+def mapping_points(data: dict[str, Any], line_offset: int = 0, column_offset: int = 0) -> list[tuple[int, int, str]]:
+    """``(generated line, column, source)`` of every mapping, index maps (``sections``) included."""
+    if "sections" in data:
+        points = []
+        for section in data["sections"]:
+            offset = section["offset"]
+            column = offset["column"] + (column_offset if offset["line"] == 0 else 0)
+            points += mapping_points(section["map"], line_offset + offset["line"], column)
+        return points
+    root = data.get("sourceRoot") or ""
+    sources = [root + (source or "") for source in data.get("sources", [])]
+    points = []
+    source = 0
+    for line, text in enumerate(data.get("mappings", "").split(";")):
+        column = 0
+        for segment in text.split(","):
+            if not segment:
+                continue
+            values = decode_vlq(segment)
+            column += values[0]
+            name = UNMAPPED
+            if len(values) >= 4:
+                source += values[1]
+                name = sources[source] if 0 <= source < len(sources) else UNMAPPED
+            points.append((line + line_offset, column + (column_offset if line == 0 else 0), name))
+    return points
+
+
+def source_spans(text: str, points: list[tuple[int, int, str]]) -> list[tuple[int, int, str]]:
+    """Offsets of ``text`` covered by each mapping, up to the next one."""
+    starts = [0]
+    index = text.find("\n")
+    while index != -1:
+        starts.append(index + 1)
+        index = text.find("\n", index + 1)
+    located = sorted(
+        (starts[line] + column, source) for line, column, source in points
+        if line < len(starts) and starts[line] + column <= len(text)
+    )
+    spans: list[tuple[int, int, str]] = []
+    if located and located[0][0] > 0:
+        spans.append((0, located[0][0], UNMAPPED))
+    for position, (start, source) in enumerate(located):
+        end = located[position + 1][0] if position + 1 < len(located) else len(text)
+        if end <= start:
+            continue
+        if spans and spans[-1][2] == source and spans[-1][1] == start:
+            spans[-1] = (spans[-1][0], end, source)
+        else:
+            spans.append((start, end, source))
+    return spans
+
+
+def attribute(spans: list[tuple[int, int, str]], used: list[Range]) -> dict[str, list[int]]:
+    """``{source: [shipped, used]}`` from sorted ``spans`` and merged ``used`` ranges."""
+    totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    first = 0
+    for start, end, source in spans:
+        totals[source][0] += end - start
+        while first < len(used) and used[first][1] <= start:
+            first += 1
+        index = first
+        while index < len(used) and used[index][0] < end:
+            totals[source][1] += min(end, used[index][1]) - max(start, used[index][0])
+            index += 1
+    return totals
+
+
+def module_name(source: str) -> str:
+    """``webpack://_N_E/./src/app/page.tsx?1a2b`` -> ``src/app/page.tsx``."""
+    name = _LAYER.sub("", _SOURCE_PREFIXES.sub("", unquote(source)))
+    name = name.split("?", 1)[0]
+    while name.startswith("./"):
+        name = name[2:]
+    return name or source
+
+
+def package_of(module: str) -> str | None:
+    if "node_modules/" not in module:
+        return None
+    parts = module.rsplit("node_modules/", 1)[1].split("/")
+    return "/".join(parts[:2]) if parts[0].startswith("@") and len(parts) > 1 else parts[0]
+
+
+def chunk_label(url: str) -> str:
+    return DEV_CHUNK if url.startswith(DEV_MODULE_PREFIX) else urlsplit(url).path
+
+
+@dataclass
+class Asset:
+    """A script or stylesheet as the page parsed it."""
+
+    url: str
+    size: int
+    source_map: str = ""
+
+
+@dataclass
+class Usage:
+    size: int
+    used: list[Range] = field(default_factory=list)
+
+    def add(self, ranges: Iterable[Range]) -> None:
+        self.used = merge_ranges([*self.used, *ranges])
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(end - start for start, end in self.used)
+
+
+@dataclass
+class Visit:
+    route: str
+    path: str
+
+
+@dataclass
+class RouteCoverage:
+    visits: int = 0
+    paths: set[str] = field(default_factory=set)
+    js: dict[str, Usage] = field(default_factory=dict)
+    css: dict[str, Usage] = field(default_factory=dict)
+
+    def credit(self, kind: str, asset: Asset, ranges: Iterable[Range] = ()) -> None:
+        usage = getattr(self, kind).setdefault(asset.url, Usage(asset.size))
+        usage.add(ranges)
+
+
+@dataclass
+class _PageState:
+    cdp: CDPSession | None = None
+    frame_id: str = ""
+    visit: Visit | None = None
+    # Assets of the current document, by CDP script or stylesheet id.
+    scripts: dict[str, Asset] = field(default_factory=dict)
+    sheets: dict[str, Asset] = field(default_factory=dict)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    ready: asyncio.Future | None = None
+    flushes: list[asyncio.Future] = field(default_factory=list)
+
+
+def _totals(usages: Iterable[Usage]) -> dict[str, Any]:
+    usages = list(usages)
+    shipped = sum(usage.size for usage in usages)
+    used = sum(usage.used_bytes for usage in usages)
+    unused_pct = round(100 * (shipped - used) / shipped, 1) if shipped else 0
+    return {"shipped": shipped, "used": used, "unused_pct": unused_pct}
+
+
+class SourceMaps:
+    """Chunk -> source module spans, fetched once per chunk URL."""
+
+    def __init__(self, timeout_s: float = 30.0) -> None:
+        self.timeout_s = timeout_s
+        self._spans: dict[str, list[tuple[int, int, str]] | None] = {}
+
+    def _get(self, url: str) -> str:
+        if url.startswith("data:"):
+            header, _, payload = url.partition(",")
+            raw = base64.b64decode(payload) if header.endswith(";base64") else unquote(payload).encode()
+            return raw.decode("utf-8", errors="replace")
+        with urllib.request.urlopen(url, timeout=self.timeout_s) as response:
+            return response.read().decode("utf-8", errors="replace")
+
+    def spans(self, asset: Asset) -> list[tuple[int, int, str]] | None:
+        """Source spans of ``asset``; None when it has no readable source map."""
+        if asset.url.startswith(DEV_MODULE_PREFIX):
+            return [(0, asset.size, asset.url)]
+        if asset.url not in self._spans:
+            self._spans[asset.url] = None
+            if asset.source_map:
+                try:
+                    data = json.loads(self._get(urljoin(asset.url, asset.source_map)))
+                    self._spans[asset.url] = source_spans(self._get(asset.url), mapping_points(data))
+                except (OSError, ValueError, KeyError, IndexError):
+                    pass  # reported as an unmapped chunk
+        return self._spans[asset.url]
+
+
+class CoverageRecorder:
+    """Context hook that records JS and CSS coverage per route template."""
+
+    name = "coverage"
+
+    def __init__(
+        self,
+        origin: str | None = None,
+        directory: Path = COVERAGE_DIR,
+        matcher: TemplateMatcher | None = None,
+        top_modules: int = 30,
+        min_unused_bytes: int = 10 * 1024,
+    ) -> None:
+        self.directory = directory
+        self.matcher = matcher or TemplateMatcher()
+        self.top_modules = top_modules
+        self.min_unused_bytes = min_unused_bytes
+        self.started_at = utc_now()
+        self._app_host = urlsplit(origin or base_url()).hostname or "localhost"
+        self._pages: dict[Page, _PageState] = {}
+        self.routes: dict[str, RouteCoverage] = defaultdict(RouteCoverage)
+        self.assets: dict[str, Asset] = {}
+
+    def _counted(self, url: str) -> bool:
+        if url.startswith(DEV_MODULE_PREFIX):
+            return True
+        parts = urlsplit(url)
+        return parts.hostname == self._app_host and parts.path.startswith("/_next/")
+
+    def _on_page(self, page: Page) -> None:
+        state = self._pages[page] = _PageState()
+        # Event handlers cannot block the script; ``prepare`` waits for this on
+        # pages the script opens. On popups the first requests may go out
+        # before coverage starts; the script-level code still counts.
+        state.ready = asyncio.ensure_future(self._start(page, state))
+
+    async def prepare(self, page: Page) -> None:
+        state = self._pages.get(page)
+        if state and state.ready:
+            try:
+                await state.ready
+            except Exception:
+                pass  # the page closed first; detach skips it
+
+    async def _start(self, page: Page, state: _PageState) -> None:
+        cdp = state.cdp = await page.context.new_cdp_session(page)
+
+        def script_parsed(params: dict[str, Any]) -> None:
+            if self._counted(params.get("url", "")):
+                asset = Asset(params["url"], params.get("length") or 0, params.get("sourceMapURL") or "")
+                if not asset.size:
+                    asset.size = params.get("endOffset", 0)
+                state.scripts[params["scriptId"]] = self.assets.setdefault(asset.url, asset)
+
+        def sheet_added(params: dict[str, Any]) -> None:
+            header = params["header"]
+            if header.get("origin") == "regular" and not header.get("isInline"):
+                url = header.get("sourceURL", "")
+                if self._counted(url):
+                    asset = Asset(url, int(header.get("length", 0)), header.get("sourceMapURL") or "")
+                    state.sheets[header["styleSheetId"]] = self.assets.setdefault(url, asset)
+
+        def frame_navigated(params: dict[str, Any]) -> None:
+            frame = params["frame"]
+            if not frame.get("parentId"):
+                state.frame_id = frame["id"]
+                self._navigated(state, frame["url"], document=True)
+
+        def navigated_within_document(params: dict[str, Any]) -> None:
+            if params["frameId"] == state.frame_id:
+                self._navigated(state, params["url"], document=False)
+
+        cdp.on("Debugger.scriptParsed", script_parsed)
+        cdp.on("CSS.styleSheetAdded", sheet_added)
+        cdp.on("Page.frameNavigated", frame_navigated)
+        cdp.on("Page.navigatedWithinDocument", navigated_within_document)
+        for method in ("Page.enable", "Debugger.enable", "DOM.enable", "CSS.enable", "Profiler.enable"):
+            await cdp.send(method)
+        state.frame_id = state.frame_id or (await cdp.send("Page.getFrameTree"))["frameTree"]["frame"]["id"]
+        # Debugger is only on for script lengths and source map URLs; never stop at ``debugger;``.
+        await cdp.send("Debugger.setSkipAllPauses", {"skip": True})
+        await cdp.send("Profiler.startPreciseCoverage", {"callCount": False, "detailed": True})
+        await cdp.send("CSS.startRuleUsageTracking")
+        if state.visit is None and page.url.startswith("http"):
+            self._navigated(state, page.url, document=True)
+
+    def _navigated(self, state: _PageState, url: str, document: bool) -> None:
+        if not url.startswith("http"):
+            return
+        path = urlsplit(url).path or "/"
+        previous = state.visit
+        if previous and not document and previous.path == path:
+            return  # query or hash change on the same page
+        scripts, sheets = state.scripts, state.sheets
+        if document:
+            state.scripts, state.sheets = {}, {}
+        else:
+            scripts, sheets = dict(scripts), dict(sheets)
+        state.visit = Visit(self.matcher.match(path), path)
+        route = self.routes[state.visit.route]
+        route.visits += 1
+        route.paths.add(path)
+        if previous:
+            flush = self._flush(state, previous, scripts, sheets, state.visit)
+            state.flushes.append(asyncio.ensure_future(flush))
+
+    async def _flush(
+        self, state: _PageState, visit: Visit, scripts: dict[str, Asset], sheets: dict[str, Asset], current: Visit
+    ) -> None:
+        """Credit coverage since the last flush to ``visit``; assets of a newer document go to ``current``."""
+        async with state.lock:
+            try:
+                js = await state.cdp.send("Profiler.takePreciseCoverage")
+                css = await state.cdp.send("CSS.stopRuleUsageTracking")
+                await state.cdp.send("CSS.startRuleUsageTracking")
+            except Exception:  # the page closed first
+                return
+        route = self.routes[visit.route]
+        for asset in scripts.values():
+            route.credit("js", asset)
+        for asset in sheets.values():
+            route.credit("css", asset)
+        for entry in js["result"]:
+            asset, owner = scripts.get(entry["scriptId"]), route
+            if asset is None:
+                asset, owner = state.scripts.get(entry["scriptId"]), self.routes[current.route]
+            if asset is not None:
+                owner.credit("js", asset, executed_ranges(entry["functions"]))
+        used: dict[str, list[Range]] = defaultdict(list)
+        for rule in css["ruleUsage"]:
+            if rule["used"]:
+                used[rule["styleSheetId"]].append((int(rule["startOffset"]), int(rule["endOffset"])))
+        for sheet, ranges in used.items():
+            asset, owner = sheets.get(sheet), route
+            if asset is None:
+                asset, owner = state.sheets.get(sheet), self.routes[current.route]
+            if asset is not None:
+                owner.credit("css", asset, ranges)
+
+    async def attach(self, context: BrowserContext) -> None:
+        context.on("page", self._on_page)
+
+    async def detach(self, context: BrowserContext) -> None:
+        """Credit each open page's last visit before the context closes."""
+        for page, state in list(self._pages.items()):
+            if page.context != context:
+                continue
+            del self._pages[page]
+            if state.ready is None:
+                continue
+            try:
+                await state.ready
+            except Exception:
+                continue  # the page closed before coverage started
+            if state.visit:
+                state.flushes.append(asyncio.ensure_future(
+                    self._flush(state, state.visit, state.scripts, state.sheets, state.visit)
+                ))
+            await asyncio.gather(*state.flushes, return_exceptions=True)
+
+    def _modules(self, usages: dict[str, Usage], maps: SourceMaps) -> dict[str, dict[str, Any]]:
+        modules: dict[str, dict[str, Any]] = {}
+        for url, usage in usages.items():
+            asset = self.assets[url]
+            spans = maps.spans(asset)
+            if spans is None:
+                parts = [(chunk_label(url), usage.size, usage.used_bytes)]
+            else:
+                parts = [(module_name(source), *sizes) for source, sizes in attribute(spans, usage.used).items()]
+            for name, shipped, used in parts:
+                module = modules.setdefault(name, {"shipped": 0, "used": 0, "chunks": set(), "mapped": False})
+                module["mapped"] = module["mapped"] or spans is not None
+                module["shipped"] += shipped
+                module["used"] += used
+                module["chunks"].add(chunk_label(url))
+        return modules
+
+    def _unused(self, modules: dict[str, dict[str, Any]], limit: int) -> list[dict[str, Any]]:
+        ranked = sorted(modules.items(), key=lambda item: item[1]["used"] - item[1]["shipped"])
+        return [
+            {
+                "module": name,
+                "package": package_of(name),
+                "shipped": module["shipped"],
+                "used": module["used"],
+                "unused": module["shipped"] - module["used"],
+                "chunks": sorted(module["chunks"]),
+                "mapped": module["mapped"],
+            }
+            for name, module in ranked[:limit]
+            if module["shipped"] - module["used"] >= self.min_unused_bytes
+        ]
+
+    def report(self) -> dict[str, Any]:
+        maps = SourceMaps()
+        run_js: dict[str, Usage] = {}
+        routes = {}
+        for name, route in sorted(self.routes.items()):
+            if not route.js and not route.css:
+                continue
+            chunks = [
+                {"chunk": chunk_label(url), "type": kind, "shipped": usage.size, "used": usage.used_bytes}
+                for kind in ("js", "css") for url, usage in getattr(route, kind).items()
+            ]
+            dev_modules = [chunk for chunk in chunks if chunk["chunk"] == DEV_CHUNK]
+            if dev_modules:
+                chunks = [chunk for chunk in chunks if chunk["chunk"] != DEV_CHUNK] + [{
+                    "chunk": DEV_CHUNK,
+                    "type": "js",
+                    "shipped": sum(chunk["shipped"] for chunk in dev_modules),
+                    "used": sum(chunk["used"] for chunk in dev_modules),
+                }]
+            routes[name] = {
+                "visits": route.visits,
+                "paths": sorted(route.paths)[:5],
+                "js": _totals(route.js.values()),
+                "css": _totals(route.css.values()),
+                "chunks": sorted(chunks, key=lambda chunk: chunk["used"] - chunk["shipped"]),
+                "unused_modules": self._unused(self._modules(route.js, maps), 10),
+            }
+            for url, usage in route.js.items():
+                run_js.setdefault(url, Usage(usage.size)).add(usage.used)
+        modules = self._modules(run_js, maps)
+        packages: dict[str, dict[str, int]] = defaultdict(lambda: {"shipped": 0, "used": 0})
+        for name, module in modules.items():
+            package = package_of(name)
+            if package:
+                packages[package]["shipped"] += module["shipped"]
+                packages[package]["used"] += module["used"]
+        mapped = [url for url in run_js if maps.spans(self.assets[url]) is not None]
+        return {
+            "started_at": self.started_at,
+            "revision": git_revision(),
+            "totals": {
+                "routes": len(routes),
+                "js": _totals(run_js.values()),
+                "chunks": len(run_js),
+                "mapped_chunks": len(mapped),
+                "modules": len(modules),
+            },
+            "routes": routes,
+            "unused_modules": self._unused(modules, self.top_modules),
+            "packages": dict(sorted(packages.items(), key=lambda item: item[1]["used"] - item[1]["shipped"])),
+        }
+
+    def summary(self) -> dict[str, Any]:
+        report = self.report()
+        path = coverage_path(self.started_at, self.directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        history = {
+            "started_at": report["started_at"],
+            "revision": report["revision"],
+            "routes": {
+                name: {"js_shipped": route["js"]["shipped"], "js_used": route["js"]["used"],
+                       "css_shipped": route["css"]["shipped"], "css_used": route["css"]["used"]}
+                for name, route in report["routes"].items()
+            },
+        }
+        with (self.directory / HISTORY_PATH.name).open("a", encoding="utf-8") as out:
+            out.write(json.dumps(history) + "\n")
+        totals = report["totals"]
+        return {
+            "routes": totals["routes"],
+            "js_shipped_kb": round(totals["js"]["shipped"] / 1024),
+            "js_unused_pct": totals["js"]["unused_pct"],
+            "mapped_chunks": f"{totals['mapped_chunks']}/{totals['chunks']}",
+            "report": str(path),
+        }
+
+
+def coverage_path(started_at: str, directory: Path = COVERAGE_DIR) -> Path:
+    stamp = started_at.replace(":", "").replace("-", "").split(".")[0]
+    return directory / f"coverage-{stamp}.json"
+
+
+def coverage_reports(directory: Path = COVERAGE_DIR) -> list[Path]:
+    """Saved reports, oldest first."""
+    return sorted(directory.glob("coverage-*.json"))
+
+
+def load_coverage(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare_coverage(before: dict[str, Any], after: dict[str, Any]) -> list[dict[str, Any]]:
+    """Per route: JS and CSS shipped and used bytes in both reports."""
+    rows = []
+    for route in sorted(before["routes"].keys() | after["routes"].keys()):
+        old, new = before["routes"].get(route, {}), after["routes"].get(route, {})
+        row: dict[str, Any] = {"route": route}
+        for kind in ("js", "css"):
+            for key in ("shipped", "used"):
+                row[f"{kind}_{key}"] = (old.get(kind, {}).get(key), new.get(kind, {}).get(key))
+        rows.append(row)
+    return rows
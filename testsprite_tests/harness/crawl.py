@@ -0,0 +1,318 @@
+"""Sitemap crawler: status, latency, size and caching of every public page.
+
+The E2E suite visits a handful of pages; ``src/app/sitemap.ts`` lists all
+of them (static pages, every business, category, city, city×category,
+blog and salary page). :class:`Crawl` reads ``/sitemap.xml`` (following a
+sitemap index if there is one) and fetches each URL over one keep-alive
+pool with at most ``concurrency`` requests in flight.
+
+The pass is streaming. The sitemap is read off the socket in pieces that
+go straight into an incremental XML parser, so memory does not grow with
+its size and pages are fetched while it is still downloading. URLs are
+handed to the workers through a bounded queue. Each page's record
+(status, TTFB, total time, HTML and wire size, cache headers) is appended
+to ``tmp/crawl/pages-<stamp>.jsonl`` as soon as it completes, and only the
+aggregates stay in memory:
+
+* per route template (``/businesses/[slug]``, matched against the app's
+  ``page.tsx`` files): status counts, latency percentiles, a fixed-bucket
+  latency histogram and cache states,
+* the ``top`` slowest and largest pages.
+
+Sitemap URLs carry the production host; they are fetched from ``origin``
+with their path and query unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, TextIO
+from urllib.parse import urlsplit
+
+from .config import TMP_DIR, git_revision
+from .http import ConnectionPool, HttpError, HttpResponse
+from .load import percentile
+from .results import utc_now
+from .routes import TemplateMatcher
+
+CRAWL_DIR = TMP_DIR / "crawl"
+DEFAULT_SITEMAP = "/sitemap.xml"
+CACHE_HEADERS = (
+    "cache-control", "x-nextjs-cache", "x-nextjs-prerender", "x-vercel-cache", "age", "etag", "last-modified",
+)
+# Upper bounds in ms; the last bucket counts everything slower.
+LATENCY_BUCKETS_MS = (100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+
+
+def cache_state(headers: dict[str, str]) -> str:
+    """How the response was cached: Next/Vercel's own verdict, else what Cache-Control allows."""
+    for name in ("x-nextjs-cache", "x-vercel-cache"):
+        if headers.get(name):
+            return headers[name].upper()
+    if headers.get("x-nextjs-prerender"):
+        return "PRERENDER"
+    control = headers.get("cache-control", "").lower()
+    if not control:
+        return "none"
+    if "no-store" in control or "private" in control or "max-age=0" in control and "s-maxage" not in control:
+        return "dynamic"
+    return "cacheable"
+
+
+def _local_path(url: str) -> str:
+    parts = urlsplit(url)
+    return (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+
+@dataclass
+class PageResult:
+    url: str
+    template: str
+    status: int | str
+    ttfb_ms: float | None = None
+    total_ms: float | None = None
+    html_bytes: int = 0
+    wire_bytes: int = 0
+    cache: dict[str, str] = field(default_factory=dict)
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        for key in ("ttfb_ms", "total_ms"):
+            if data[key] is not None:
+                data[key] = round(data[key], 1)
+        return data
+
+
+@dataclass
+class TemplateStats:
+    statuses: Counter = field(default_factory=Counter)
+    ttfb_ms: list[float] = field(default_factory=list)
+    total_ms: list[float] = field(default_factory=list)
+    html_bytes: int = 0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    cache: Counter = field(default_factory=Counter)
+
+    def record(self, page: PageResult) -> None:
+        self.statuses[str(page.status)] += 1
+        if page.total_ms is None:
+            return
+        self.ttfb_ms.append(page.ttfb_ms or 0.0)
+        self.total_ms.append(page.total_ms)
+        self.html_bytes += page.html_bytes
+        bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS_MS) if page.total_ms <= bound), None)
+        self.histogram[len(LATENCY_BUCKETS_MS) if bucket is None else bucket] += 1
+        self.cache[cache_state(page.cache)] += 1
+
+    def summary(self) -> dict[str, Any]:
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            "pages": sum(self.statuses.values()),
+            "statuses": dict(sorted(self.statuses.items())),
+            "ttfb_p50_ms": percentile(self.ttfb_ms, 50),
+            "ttfb_p95_ms": percentile(self.ttfb_ms, 95),
+            "p50_ms": percentile(self.total_ms, 50),
+            "p95_ms": percentile(self.total_ms, 95),
+            "max_ms": round(max(self.total_ms), 1) if self.total_ms else None,
+            "mean_html_bytes": round(self.html_bytes / len(self.total_ms)) if self.total_ms else 0,
+            "histogram_ms": dict(zip(labels, self.histogram)),
+            "cache": dict(self.cache.most_common()),
+        }
+
+
+class _Top:
+    """The ``size`` largest items by key, without keeping the rest."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._heap: list[tuple[float, int, dict[str, Any]]] = []
+        self._seq = 0
+
+    def push(self, key: float, item: dict[str, Any]) -> None:
+        self._seq += 1
+        entry = (key, self._seq, item)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def sorted(self) -> list[dict[str, Any]]:
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))]
+
+
+@dataclass
+class CrawlOptions:
+    concurrency: int = 16
+    timeout_s: float = 30.0
+    top: int = 25
+    limit: int | None = None
+    # Only crawl URLs whose path matches this regular expression.
+    include: str | None = None
+    sitemap: str = DEFAULT_SITEMAP
+
+
+class Crawl:
+    def __init__(
+        self, origin: str, options: CrawlOptions | None = None, matcher: TemplateMatcher | None = None
+    ) -> None:
+        self.origin = origin.rstrip("/")
+        self.options = options or CrawlOptions()
+        self.matcher = matcher or TemplateMatcher()
+        self.templates: dict[str, TemplateStats] = {}
+        self.slowest = _Top(self.options.top)
+        self.largest = _Top(self.options.top)
+        self.sitemaps: list[str] = []
+        self.duplicates = 0
+        self.skipped = 0
+
+    async def _entries(self, pool: ConnectionPool, sitemap: str) -> AsyncIterator[tuple[str, str]]:
+        """``("url", loc)`` and, in a sitemap index, ``("sitemap", loc)`` entries in document order."""
+        self.sitemaps.append(sitemap)
+        async with pool.stream(_local_path(sitemap), headers={"accept": "application/xml,text/xml"}) as response:
+            if not response.ok:
+                raise HttpError(f"HTTP {response.status}")
+            parser = ElementTree.XMLPullParser(events=("end",))
+            loc = ""
+            async for chunk in response.chunks:
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    tag = element.tag.rsplit("}", 1)[-1]
+                    if tag == "loc":
+                        loc = (element.text or "").strip()
+                    elif tag in ("url", "sitemap"):
+                        if loc:
+                            yield tag, loc
+                        loc = ""
+                        element.clear()
+            parser.close()
+
+    async def urls(self, pool: ConnectionPool) -> AsyncIterator[str]:
+        """Page URLs in sitemap order, across a sitemap index, deduplicated and filtered."""
+        pending = [self.options.sitemap]
+        seen: set[str] = set()
+        include = re.compile(self.options.include) if self.options.include else None
+        while pending:
+            entries = self._entries(pool, pending.pop(0))
+            try:
+                async for kind, loc in entries:
+                    if kind == "sitemap":
+                        pending.append(loc)
+                        continue
+                    path = _local_path(loc)
+                    if path in seen:
+                        self.duplicates += 1
+                        continue
+                    seen.add(path)
+                    if include and not include.search(path):
+                        self.skipped += 1
+                        continue
+                    yield path
+                    if self.options.limit and len(seen) - self.skipped >= self.options.limit:
+                        return
+            finally:
+                # Stopping early must close the sitemap's connection now, not at garbage collection.
+                await entries.aclose()
+
+    async def _fetch(self, pool: ConnectionPool, path: str) -> PageResult:
+        template = self.matcher.match(path)
+        url = self.origin + path
+        try:
+            response: HttpResponse = await pool.get(path)
+        except asyncio.TimeoutError:
+            return PageResult(url, template, "timeout", error=f"no response within {self.options.timeout_s:g}s")
+        except (HttpError, OSError) as exc:
+            return PageResult(url, template, type(exc).__name__, error=str(exc))
+        try:
+            html_bytes = len(response.content())
+        except Exception:  # zlib.error on a truncated body; keep the wire size
+            html_bytes = len(response.body)
+        return PageResult(
+            url,
+            template,
+            response.status,
+            ttfb_ms=response.ttfb_ms,
+            total_ms=response.total_ms,
+            html_bytes=html_bytes,
+            wire_bytes=response.wire_bytes,
+            cache={name: response.header(name) for name in CACHE_HEADERS if response.header(name)},
+        )
+
+    def _record(self, page: PageResult, out: TextIO) -> None:
+        record = page.to_dict()
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.templates.setdefault(page.template, TemplateStats()).record(page)
+        if page.total_ms is not None:
+            self.slowest.push(page.total_ms, record)
+            self.largest.push(page.html_bytes, record)
+
+    async def run(self, pages_path: Path) -> dict[str, Any]:
+        options = self.options
+        started_at = utc_now()
+        start = time.perf_counter()
+        queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=options.concurrency * 4)
+        statuses: Counter = Counter()
+        pages_path.parent.mkdir(parents=True, exist_ok=True)
+        async with ConnectionPool(self.origin, size=options.concurrency, timeout=options.timeout_s) as pool:
+            with pages_path.open("w", encoding="utf-8") as out:
+
+                async def produce() -> None:
+                    try:
+                        async for path in self.urls(pool):
+                            await queue.put(path)
+                    finally:
+                        for _ in range(options.concurrency):
+                            await queue.put(None)
+
+                async def work() -> None:
+                    while (path := await queue.get()) is not None:
+                        page = await self._fetch(pool, path)
+                        statuses[str(page.status)] += 1
+                        self._record(page, out)
+
+                await asyncio.gather(produce(), *(work() for _ in range(options.concurrency)))
+            connections = pool.stats.to_dict()
+        elapsed = time.perf_counter() - start
+        crawled = sum(statuses.values())
+        return {
+            "started_at": started_at,
+            "revision": git_revision(),
+            "origin": self.origin,
+            "sitemaps": self.sitemaps,
+            "concurrency": options.concurrency,
+            "pages": crawled,
+            "duplicates": self.duplicates,
+            "skipped": self.skipped,
+            "elapsed_s": round(elapsed, 1),
+            "throughput_pps": round(crawled / elapsed, 2) if elapsed else 0.0,
+            "statuses": dict(sorted(statuses.items())),
+            "connections": connections,
+            "pages_file": str(pages_path),
+            "slowest": self.slowest.sorted(),
+            "largest": self.largest.sorted(),
+            "templates": {
+                template: stats.summary()
+                for template, stats in sorted(
+                    self.templates.items(), key=lambda item: -(percentile(item[1].total_ms, 95) or 0.0)
+                )
+            },
+        }
+
+
+def crawl_paths(started_at: str, directory: Path = CRAWL_DIR) -> tuple[Path, Path]:
+    """``(pages .jsonl, report .json)`` for a crawl started at ``started_at``."""
+    stamp = started_at.replace(":", "").replace("-", "").split(".")[0]
+    return directory / f"pages-{stamp}.jsonl", directory / f"crawl-{stamp}.json"
+
+
+def write_crawl_report(report: dict[str, Any], path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
@@ -0,0 +1,489 @@
+"""Synthetic businesses and reviews at 10k / 100k / 1M scale, and a query benchmark.
+
+The hand-written seeds cover about a hundred companies, too few to see
+how ``searchBusinesses`` (``ilike '%q%'`` on name and description, exact
+count, offset pagination) or the listing pages (ordered by rating and
+review count) behave as the table grows. :func:`generate` streams rows in
+PostgreSQL ``COPY`` text format into ``tmp/dataset/<scale>/``:
+
+``categories.copy``
+    the categories of ``src/lib/location-discovery.ts`` (merged into
+    ``public.categories`` by slug),
+``businesses.copy``
+    businesses spread over the same categories, subcategories, cities and
+    quartiers, weighted towards Casablanca, Rabat and the larger sectors,
+    with ``average_rating``/``review_count`` already aggregated,
+``reviews.copy``
+    a heavy-tailed number of published reviews per business (most have a
+    few, some hundreds), with ratings skewed positive by ``rating_skew``,
+``load.sql``
+    a psql script that replaces every ``syn-*`` business and review in one
+    transaction, with triggers off (the aggregates are precomputed), then
+    analyzes both tables.
+
+Each business is generated from its own seeded RNG, so the 10k dataset is
+the first tenth of the 100k one and scales stay comparable. Only one
+business and its reviews are in memory at a time.
+
+:class:`QueryBench` then sends the PostgREST requests the app builds for
+search and listing pages and records latency per query and scale in
+``tmp/dataset/bench.jsonl``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, TextIO
+from urllib.parse import quote, urlencode
+
+from .config import REPO_ROOT, TMP_DIR, dotenv, git_revision
+from .http import ConnectionPool, HttpError
+from .load import percentile
+from .results import utc_now
+
+DATASET_DIR = TMP_DIR / "dataset"
+BENCH_PATH = DATASET_DIR / "bench.jsonl"
+LOCATION_SOURCE = REPO_ROOT / "src" / "lib" / "location-discovery.ts"
+ID_PREFIX = "syn-"
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Relative weight of each city's business count (roughly urban population,
+# with Casablanca and Rabat over-represented as business centres).
+CITY_WEIGHTS = {
+    "Casablanca": 34, "Rabat": 12, "Marrakech": 9, "Tanger": 9, "Fès": 8, "Agadir": 5, "Meknès": 4,
+    "Oujda": 3, "Kenitra": 3, "Tétouan": 3, "Safi": 2, "El Jadida": 2,
+}
+CATEGORY_WEIGHTS = {
+    "Distribution & Commerce": 16, "Services Professionnels": 14, "Technologie & IT": 11, "Banque & Finance": 9,
+    "Santé & Bien-être": 9, "Immobilier & Construction": 9, "Hôtels & Hébergement": 8,
+    "Transport & Logistique": 7, "Éducation & Formation": 6, "Industrie & Chimie": 5,
+    "Centres d’Appel & BPO": 4, "Télécommunications": 2, "Énergie & Environnement": 2,
+}
+NAME_WORDS = [
+    "Atlas", "Anfa", "Menara", "Majorelle", "Argane", "Oasis", "Sebou", "Bouregreg", "Tafilalet", "Chaouia",
+    "Zitoun", "Nour", "Yasmine", "Al Amal", "Al Baraka", "Al Manar", "Assafa", "Rif", "Souss", "Draa",
+    "Medina", "Kasbah", "Sahara", "Ifrane", "Toubkal", "Ourika", "Mogador", "Tingis", "Volubilis", "Dakhla",
+]
+NAME_FORMS = [
+    "Groupe", "Société", "Maroc", "Services", "Holding", "Conseil", "Solutions", "Partners", "& Fils", "SARL",
+]
+FIRST_NAMES = [
+    "Youssef", "Mohamed", "Fatima", "Khadija", "Amine", "Salma", "Omar", "Imane", "Hamza", "Sara", "Mehdi",
+    "Nadia", "Karim", "Hajar", "Anas", "Meryem", "Reda", "Zineb", "Ayoub", "Houda", "Ilyas", "Soukaina",
+]
+REVIEW_TITLES = {
+    1: ["Très décevant", "À éviter", "Mauvaise expérience"],
+    2: ["Peut mieux faire", "Décevant", "Pas convaincu"],
+    3: ["Correct", "Moyen", "Sans plus"],
+    4: ["Bonne expérience", "Très bien", "Je recommande"],
+    5: ["Excellent", "Parfait", "Une référence"],
+}
+REVIEW_PHRASES = [
+    "Accueil {tone} et équipe {tone2}.", "Délais {tone} pour un dossier à {city}.",
+    "Le service {sub} est {tone}.", "Rapport qualité-prix {tone}.", "Communication {tone2} avec la direction.",
+    "Ambiance de travail {tone}.", "Locaux à {quartier} {tone2}.",
+]
+TONES = {
+    1: ("catastrophique", "absente"), 2: ("insuffisant", "lente"), 3: ("correct", "moyenne"),
+    4: ("agréable", "réactive"), 5: ("remarquable", "exemplaire"),
+}
+STATUS_WEIGHTS = {"published": 92, "pending": 6, "rejected": 2}
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+SPAN_DAYS = 3 * 365
+
+BUSINESS_COLUMNS = (
+    "id", "slug", "name", "type", "category", "subcategory", "location", "city", "quartier", "description",
+    "tags", "status", "tier", "is_premium", "is_sponsored", "overall_rating", "average_rating", "review_count",
+    "created_at", "updated_at",
+)
+REVIEW_COLUMNS = (
+    "business_id", "author_name", "rating", "title", "content", "date", "status", "created_at", "updated_at",
+)
+CATEGORY_COLUMNS = ("name", "slug", "position")
+
+
+def _ts_strings(text: str) -> list[str]:
+    return [match.replace("\\'", "'") for match in re.findall(r"'((?:[^'\\]|\\.)*)'", text)]
+
+
+def _ts_string_lists(source: str, constant: str) -> dict[str, list[str]]:
+    """``export const NAME ... = { 'Key': ['a', 'b'], ... }`` as a dict."""
+    match = re.search(rf"export const {constant}\b[^=]*=\s*\{{(.*?)\n\}};", source, re.S)
+    if not match:
+        return {}
+    entries = re.findall(r"'((?:[^'\\]|\\.)*)'\s*:\s*\[(.*?)\]", match.group(1), re.S)
+    return {key.replace("\\'", "'"): _ts_strings(values) for key, values in entries}
+
+
+@dataclass(frozen=True)
+class Taxonomy:
+    categories: list[tuple[str, str]]  # (slug, name)
+    subcategories: dict[str, list[str]]
+    cities: dict[str, list[str]]  # city -> quartiers
+
+    @classmethod
+    def from_source(cls, path: Path = LOCATION_SOURCE) -> "Taxonomy":
+        """The app's own category and city lists, so generated values match its filters."""
+        source = path.read_text(encoding="utf-8")
+        categories = re.findall(r"\{\s*id:\s*'([^']+)',\s*name:\s*'((?:[^'\\]|\\.)*)'", source)
+        return cls(
+            categories=[(slug, name.replace("\\'", "'")) for slug, name in categories],
+            subcategories=_ts_string_lists(source, "SUBCATEGORIES"),
+            cities=_ts_string_lists(source, "CITIES"),
+        )
+
+
+@dataclass
+class DatasetSpec:
+    businesses: int
+    seed: int = 20260401
+    # Mean reviews per business; the distribution is heavy-tailed.
+    reviews_per_business: float = 3.0
+    # 0 centres business quality on 3 stars; higher values push ratings towards 5.
+    rating_skew: float = 1.0
+    max_reviews: int = 2000
+
+
+def _copy_value(value: Any) -> str:
+    """One field in COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (list, tuple)):
+        escaped = (str(item).replace("\\", "\\\\").replace('"', '\\"') for item in value)
+        value = "{" + ",".join(f'"{item}"' for item in escaped) + "}"
+    text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _write_row(out: TextIO, row: Iterable[Any]) -> None:
+    out.write("\t".join(_copy_value(value) for value in row) + "\n")
+
+
+def _slugify(text: str) -> str:
+    ascii_text = unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_text.lower()).strip("-")
+
+
+class Generator:
+    def __init__(self, spec: DatasetSpec, taxonomy: Taxonomy | None = None) -> None:
+        self.spec = spec
+        self.taxonomy = taxonomy or Taxonomy.from_source()
+        self.city_names = list(self.taxonomy.cities) or list(CITY_WEIGHTS)
+        self.city_weights = [CITY_WEIGHTS.get(city, 1) for city in self.city_names]
+        self.category_names = [name for _, name in self.taxonomy.categories] or list(CATEGORY_WEIGHTS)
+        self.category_weights = [CATEGORY_WEIGHTS.get(name, 1) for name in self.category_names]
+        # Beta(alpha, 2) business quality: mean 0.5 at skew 0, ~0.67 at 1, ~0.8 at 3.
+        self.quality_alpha = 2.0 + 2.0 * max(0.0, spec.rating_skew)
+
+    def _review_count(self, rng: random.Random) -> int:
+        # Pareto(1.5) - 1 has mean 2; scale it to the requested mean.
+        count = round((rng.paretovariate(1.5) - 1.0) * self.spec.reviews_per_business / 2.0)
+        return min(count, self.spec.max_reviews)
+
+    def _rating(self, rng: random.Random, quality: float) -> int:
+        # Review sites are J-shaped: a share of angry 1-star reviews on top of a quality-driven binomial.
+        if rng.random() < 0.08 * (1.0 - quality):
+            return 1
+        return 1 + sum(rng.random() < quality for _ in range(4))
+
+    def business(self, index: int) -> tuple[list[Any], list[list[Any]]]:
+        """Row ``index`` of the businesses table and its reviews, reproducibly."""
+        rng = random.Random(f"{self.spec.seed}:{index}")
+        category = rng.choices(self.category_names, self.category_weights)[0]
+        subcategory = rng.choice(self.taxonomy.subcategories.get(category) or [category])
+        city = rng.choices(self.city_names, self.city_weights)[0]
+        quartier = rng.choice(self.taxonomy.cities.get(city) or ["Centre Ville"])
+        name = f"{rng.choice(NAME_WORDS)} {subcategory.split(' ')[0]} {rng.choice(NAME_FORMS)} {index}"
+        business_id = f"{ID_PREFIX}{index:07d}"
+        created = EPOCH + timedelta(days=rng.uniform(0, SPAN_DAYS))
+        quality = rng.betavariate(self.quality_alpha, 2.0)
+        tier = rng.choices(["none", "standard", "growth", "gold"], [85, 8, 5, 2])[0]
+
+        reviews = []
+        published = []
+        for _ in range(self._review_count(rng)):
+            rating = self._rating(rng, quality)
+            tone, tone2 = TONES[rating]
+            phrases = rng.sample(REVIEW_PHRASES, 3)
+            content = " ".join(
+                phrase.format(tone=tone, tone2=tone2, city=city, sub=subcategory.lower(), quartier=quartier)
+                for phrase in phrases
+            )
+            status = rng.choices(list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values()))[0]
+            posted = created + timedelta(days=rng.uniform(0, max(1.0, (EPOCH + timedelta(SPAN_DAYS) - created).days)))
+            stamp = posted.isoformat()
+            if status == "published":
+                published.append(rating)
+            reviews.append([
+                business_id, f"{rng.choice(FIRST_NAMES)} {rng.choice('ABCDEFGHIJKLMNOPRSTZ')}.", rating,
+                rng.choice(REVIEW_TITLES[rating]), content, posted.date().isoformat(), status, stamp, stamp,
+            ])
+        average = round(sum(published) / len(published), 2) if published else 0
+        row = [
+            business_id, business_id, name, "company", category, subcategory, city, city, quartier,
+            f"{name} : {subcategory.lower()} à {city} ({quartier}). Secteur {category}.",
+            [subcategory, city], "active", tier, tier != "none", tier == "gold" and rng.random() < 0.3,
+            average, average, len(published), created.isoformat(), created.isoformat(),
+        ]
+        return row, reviews
+
+
+@dataclass
+class DatasetManifest:
+    scale: str
+    spec: dict[str, Any]
+    businesses: int = 0
+    reviews: int = 0
+    published_reviews: int = 0
+    ratings: dict[str, int] = field(default_factory=dict)
+    cities: dict[str, int] = field(default_factory=dict)
+    categories: dict[str, int] = field(default_factory=dict)
+    # Business with the most published reviews, for the reviews query.
+    busiest_business: str | None = None
+    busiest_reviews: int = 0
+    elapsed_s: float = 0.0
+    generated_at: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _load_script(directory: Path) -> str:
+    def copy(table: str, columns: tuple[str, ...], filename: str) -> str:
+        return f"\\copy {table} ({', '.join(columns)}) from '{(directory / filename).as_posix()}'"
+
+    return "\n".join([
+        "-- Generated by `python -m harness dataset generate`; replaces every syn-* business and review.",
+        "\\set ON_ERROR_STOP on",
+        "begin;",
+        "-- Aggregates are precomputed: skip the per-review rating trigger and FK checks while loading.",
+        "set local session_replication_role = replica;",
+        f"delete from public.reviews where starts_with(business_id, '{ID_PREFIX}');",
+        f"delete from public.businesses where starts_with(id, '{ID_PREFIX}');",
+        "create temp table syn_categories (name text, slug text, position int) on commit drop;",
+        copy("syn_categories", CATEGORY_COLUMNS, "categories.copy"),
+        "insert into public.categories (name, slug, position)",
+        "  select name, slug, position from syn_categories on conflict (slug) do nothing;",
+        copy("public.businesses", BUSINESS_COLUMNS, "businesses.copy"),
+        copy("public.reviews", REVIEW_COLUMNS, "reviews.copy"),
+        "commit;",
+        "analyze public.businesses;",
+        "analyze public.reviews;",
+        "",
+    ])
+
+
+def generate(scale: str, spec: DatasetSpec, directory: Path | None = None) -> DatasetManifest:
+    """Write the COPY files, ``load.sql`` and ``manifest.json`` for ``scale``."""
+    directory = directory or DATASET_DIR / scale
+    directory.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    generator = Generator(spec)
+    manifest = DatasetManifest(scale, asdict(spec))
+    ratings: dict[int, int] = {rating: 0 for rating in range(1, 6)}
+    cities: dict[str, int] = {}
+    categories: dict[str, int] = {}
+    with (directory / "categories.copy").open("w", encoding="utf-8") as out:
+        for position, (slug, name) in enumerate(generator.taxonomy.categories):
+            _write_row(out, [name, slug or _slugify(name), position])
+    with (directory / "businesses.copy").open("w", encoding="utf-8") as businesses, (
+        directory / "reviews.copy"
+    ).open("w", encoding="utf-8") as reviews:
+        for index in range(1, spec.businesses + 1):
+            row, review_rows = generator.business(index)
+            _write_row(businesses, row)
+            for review in review_rows:
+                _write_row(reviews, review)
+                if review[6] == "published":
+                    ratings[review[2]] += 1
+            manifest.businesses += 1
+            manifest.reviews += len(review_rows)
+            cities[row[7]] = cities.get(row[7], 0) + 1
+            categories[row[4]] = categories.get(row[4], 0) + 1
+            if row[17] > manifest.busiest_reviews:
+                manifest.busiest_business, manifest.busiest_reviews = row[0], row[17]
+    manifest.published_reviews = sum(ratings.values())
+    manifest.ratings = {str(rating): count for rating, count in ratings.items()}
+    manifest.cities = dict(sorted(cities.items(), key=lambda item: -item[1]))
+    manifest.categories = dict(sorted(categories.items(), key=lambda item: -item[1]))
+    (directory / "load.sql").write_text(_load_script(directory.resolve()), encoding="utf-8")
+    manifest.elapsed_s = round(time.perf_counter() - start, 1)
+    manifest.generated_at = utc_now()
+    (directory / "manifest.json").write_text(json.dumps(manifest.to_dict(), indent=2, ensure_ascii=False) + "\n")
+    return manifest
+
+
+def load_manifest(scale: str) -> dict[str, Any]:
+    try:
+        return json.loads((DATASET_DIR / scale / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+# PostgREST requests mirroring src/lib/server-search.ts (search_*) and
+# getFilteredBusinesses in src/lib/data/businesses.ts (listing_*); `*` is
+# PostgREST's URL-safe spelling of the `%` wildcard supabase-js sends.
+SEARCH_SELECT = "id,name,average_rating,review_count,location,image_url,description"
+RATING_ORDER = "average_rating.desc,review_count.desc"
+RELEVANCE_ORDER = "is_sponsored.desc,tier.asc,is_premium.desc,overall_rating.desc"
+
+
+def _search(term: str, **params: str) -> dict[str, str]:
+    return {"select": SEARCH_SELECT, "or": f"(name.ilike.*{term}*,description.ilike.*{term}*)", **params}
+
+
+def _listing(term: str | None = None, **params: str) -> dict[str, str]:
+    query = {"select": "*,business_hours(day_of_week)", **params}
+    if term:
+        fields = ("name", "description", "category", "subcategory", "city", "quartier")
+        query["or"] = "(" + ",".join(f"{name}.ilike.*{term}*" for name in fields) + f",tags.cs.{{{term}}})"
+    return query
+
+
+@dataclass(frozen=True)
+class BenchQuery:
+    name: str
+    table: str
+    params: dict[str, str]
+    page_size: int = 20
+    offset: int = 0
+    count: bool = True
+
+
+def bench_queries(manifest: dict[str, Any]) -> list[BenchQuery]:
+    city = next(iter(manifest.get("cities") or {"Casablanca": 0}))
+    category = next(iter(manifest.get("categories") or {"Banque & Finance": 0}))
+    busiest = manifest.get("busiest_business") or f"{ID_PREFIX}0000001"
+    return [
+        BenchQuery("search_common", "businesses", _search("Atlas", order=RATING_ORDER)),
+        BenchQuery("search_rare", "businesses", _search("Volubilis Banque", order=RATING_ORDER)),
+        BenchQuery("search_no_match", "businesses", _search("zzqxj", order=RATING_ORDER)),
+        BenchQuery("search_city", "businesses", _search("Services", location=f"eq.{city}", order=RATING_ORDER)),
+        BenchQuery("search_recent", "businesses", _search("Atlas", order="created_at.desc")),
+        BenchQuery("search_deep_page", "businesses", _search("Maroc", order=RATING_ORDER), offset=2000),
+        BenchQuery("search_browse_all", "businesses", {"select": SEARCH_SELECT, "order": RATING_ORDER}),
+        BenchQuery("listing_category", "businesses", _listing(category=f"eq.{category}", order=RELEVANCE_ORDER)),
+        BenchQuery("listing_city_rating", "businesses", _listing(city=f"eq.{city}", order="overall_rating.desc")),
+        BenchQuery("listing_search", "businesses", _listing("Atlas", order=RELEVANCE_ORDER)),
+        BenchQuery("listing_most_reviewed", "businesses", _listing(order="review_count.desc")),
+        BenchQuery(
+            "business_reviews", "reviews", {"select": "*", "business_id": f"eq.{busiest}", "order": "date.desc"},
+            page_size=50, count=False,
+        ),
+    ]
+
+
+@dataclass
+class QueryResult:
+    scale: str
+    query: str
+    runs: int
+    p50_ms: float | None
+    p95_ms: float | None
+    max_ms: float | None
+    rows: int
+    total: int | None
+    response_bytes: int
+    errors: int
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class QueryBench:
+    """Times the app's PostgREST queries against the project in ``NEXT_PUBLIC_SUPABASE_URL``."""
+
+    def __init__(self, url: str | None = None, key: str | None = None, timeout: float = 60.0) -> None:
+        url = url or dotenv("NEXT_PUBLIC_SUPABASE_URL")
+        key = key or dotenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+        if not url or not key:
+            raise ValueError("the benchmark needs NEXT_PUBLIC_SUPABASE_URL and NEXT_PUBLIC_SUPABASE_ANON_KEY")
+        self.pool = ConnectionPool(url, size=1, timeout=timeout)
+        self.headers = {"apikey": key, "authorization": f"Bearer {key}", "accept": "application/json"}
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def run_query(self, scale: str, query: BenchQuery, runs: int) -> QueryResult:
+        params = {**query.params, "offset": str(query.offset), "limit": str(query.page_size)}
+        path = f"/rest/v1/{query.table}?" + urlencode(params, safe="(),.*:{}", quote_via=quote)
+        headers = {**self.headers, **({"prefer": "count=exact"} if query.count else {})}
+        timings: list[float] = []
+        rows, total, size, errors, error = 0, None, 0, 0, None
+        # One unmeasured request warms the connection and PostgREST's schema cache.
+        for attempt in range(runs + 1):
+            try:
+                response = await self.pool.get(path, headers=headers)
+            except (HttpError, OSError, asyncio.TimeoutError) as exc:
+                errors += attempt > 0
+                error = f"{type(exc).__name__}: {exc}"
+                continue
+            if not response.ok:
+                errors += attempt > 0
+                error = f"HTTP {response.status}: {response.text()[:200]}"
+                continue
+            if attempt == 0:
+                continue
+            timings.append(response.total_ms)
+            size = len(response.content())
+            rows = len(json.loads(response.text() or "[]"))
+            content_range = response.header("content-range")  # "0-19/12345"
+            if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+                total = int(content_range.rsplit("/", 1)[1])
+        return QueryResult(
+            scale, query.name, len(timings), percentile(timings, 50), percentile(timings, 95),
+            round(max(timings), 1) if timings else None, rows, total, size, errors, error,
+        )
+
+    async def run(self, scale: str, runs: int = 10, only: list[str] | None = None) -> list[QueryResult]:
+        queries = [query for query in bench_queries(load_manifest(scale)) if not only or query.name in only]
+        return [await self.run_query(scale, query, runs) for query in queries]
+
+
+def write_bench(results: list[QueryResult], path: Path = BENCH_PATH) -> Path:
+    """Append one line per query, tagged with the time and git revision."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stamp, revision = utc_now(), git_revision()
+    with path.open("a", encoding="utf-8") as out:
+        for result in results:
+            out.write(json.dumps({"at": stamp, "revision": revision, **result.to_dict()}, ensure_ascii=False) + "\n")
+    return path
+
+
+def latest_by_scale(path: Path = BENCH_PATH) -> dict[str, dict[str, dict[str, Any]]]:
+    """``{query: {scale: latest result}}`` from the benchmark history."""
+    table: dict[str, dict[str, dict[str, Any]]] = {}
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return table
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        table.setdefault(entry["query"], {})[entry["scale"]] = entry
+    return table
+
+
+def growth(by_scale: dict[str, dict[str, Any]]) -> float | None:
+    """Slope of log(p50) over log(rows) between the smallest and largest scale: ~0 flat, ~1 linear."""
+    points = sorted(
+        (SCALES[scale], entry["p50_ms"]) for scale, entry in by_scale.items() if scale in SCALES and entry.get("p50_ms")
+    )
+    if len(points) < 2 or points[0][0] == points[-1][0]:
+        return None
+    (small, small_ms), (large, large_ms) = points[0], points[-1]
+    return round(math.log(large_ms / small_ms) / math.log(large / small), 2)
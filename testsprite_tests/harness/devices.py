@@ -0,0 +1,201 @@
+"""Named device profiles: run any TC flow as a phone on a mobile network.
+
+The TC scripts run at 1280×720 on an unthrottled local link. Most visitors
+use mid-range Android phones on 3G/4G. ``run --device NAME`` gives every
+context the profile's viewport, pixel ratio, touch and user agent. Every
+page gets, over CDP, the profile's CPU slowdown
+(``Emulation.setCPUThrottlingRate``) and its latency and throughput
+(``Network.emulateNetworkConditions``). Both are applied before the script
+gets the page, so the first navigation is throttled too.
+
+``low-end-3g``
+    an entry-level phone (6× CPU slowdown) on DevTools' "Fast 3G":
+    562.5 ms latency, 1.47 Mbit/s down, 675 kbit/s up,
+``mid-4g``
+    a mid-range phone (4× CPU slowdown) on DevTools' "Fast 4G":
+    165 ms latency, 8.1 Mbit/s down, 1.35 Mbit/s up,
+``desktop``
+    the 1920×1080 viewport of ``config.json``, unthrottled.
+
+Throttled runs are slower, so Playwright timeouts given by the scripts
+and the harness's own test and step timeouts are multiplied by the
+profile's ``timeout_scale``. Step timings of each profile are also written
+to ``tmp/devices/<name>/test_timings.json``; :func:`compare_devices`
+lines them up step by step.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import BrowserContext, Page
+
+from .config import TMP_DIR
+
+DEVICES_DIR = TMP_DIR / "devices"
+LOW_END_UA = (
+    "Mozilla/5.0 (Linux; Android 11; SM-A025F) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Mobile Safari/537.36"
+)
+MOBILE_UA = (
+    "Mozilla/5.0 (Linux; Android 13; SM-A245F) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Mobile Safari/537.36"
+)
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    name: str
+    description: str
+    # Browser context options: viewport, pixel ratio, touch, user agent.
+    context: dict[str, Any] = field(default_factory=dict)
+    cpu_slowdown: float = 1.0
+    # None leaves the network unthrottled.
+    latency_ms: float | None = None
+    download_kbps: float | None = None
+    upload_kbps: float | None = None
+    timeout_scale: float = 1.0
+
+    @property
+    def throttles_network(self) -> bool:
+        return self.latency_ms is not None
+
+    def network_conditions(self) -> dict[str, Any]:
+        """``Network.emulateNetworkConditions`` parameters; throughput in bytes per second."""
+        return {
+            "offline": False,
+            "latency": self.latency_ms or 0,
+            "downloadThroughput": (self.download_kbps or 0) * 1000 / 8 or -1,
+            "uploadThroughput": (self.upload_kbps or 0) * 1000 / 8 or -1,
+        }
+
+
+DEVICES = {
+    "low-end-3g": DeviceProfile(
+        "low-end-3g",
+        "entry-level Android on 3G",
+        {
+            "viewport": {"width": 360, "height": 800},
+            "device_scale_factor": 2,
+            "is_mobile": True,
+            "has_touch": True,
+            "user_agent": LOW_END_UA,
+        },
+        cpu_slowdown=6,
+        latency_ms=562.5,
+        download_kbps=1474.56,
+        upload_kbps=675,
+        timeout_scale=6,
+    ),
+    "mid-4g": DeviceProfile(
+        "mid-4g",
+        "mid-range Android on 4G",
+        {
+            "viewport": {"width": 412, "height": 915},
+            "device_scale_factor": 2.625,
+            "is_mobile": True,
+            "has_touch": True,
+            "user_agent": MOBILE_UA,
+        },
+        cpu_slowdown=4,
+        latency_ms=165,
+        download_kbps=8100,
+        upload_kbps=1350,
+        timeout_scale=3,
+    ),
+    "desktop": DeviceProfile(
+        "desktop",
+        "desktop browser on a fast link",
+        {"viewport": {"width": 1920, "height": 1080}, "device_scale_factor": 1},
+    ),
+}
+
+
+def get_device(name: str) -> DeviceProfile:
+    try:
+        return DEVICES[name]
+    except KeyError:
+        raise ValueError(f"unknown device profile {name!r}; choose from {', '.join(DEVICES)}") from None
+
+
+class DeviceEmulation:
+    """Context hook that throttles the CPU and network of every page."""
+
+    name = "device"
+
+    def __init__(self, profile: DeviceProfile) -> None:
+        self.profile = profile
+        self._pages: dict[Page, asyncio.Future] = {}
+        self.pages = 0
+        self.failures = 0
+
+    def _throttle(self, page: Page) -> asyncio.Future:
+        if page not in self._pages:
+            self._pages[page] = asyncio.ensure_future(self._apply(page))
+        return self._pages[page]
+
+    async def _apply(self, page: Page) -> None:
+        try:
+            cdp = await page.context.new_cdp_session(page)
+            if self.profile.cpu_slowdown > 1:
+                await cdp.send("Emulation.setCPUThrottlingRate", {"rate": self.profile.cpu_slowdown})
+            if self.profile.throttles_network:
+                await cdp.send("Network.enable")
+                await cdp.send("Network.emulateNetworkConditions", self.profile.network_conditions())
+            self.pages += 1
+        except Exception:  # the page closed first
+            self.failures += 1
+
+    async def attach(self, context: BrowserContext) -> None:
+        # Pages the script does not open itself, such as popups.
+        context.on("page", self._throttle)
+
+    async def prepare(self, page: Page) -> None:
+        await self._throttle(page)
+
+    async def detach(self, context: BrowserContext) -> None:
+        for page in [page for page in self._pages if page.context == context]:
+            del self._pages[page]
+
+    def summary(self) -> dict[str, Any]:
+        return {"profile": self.profile.name, "pages": self.pages, "not_throttled": self.failures}
+
+
+def device_timings_path(name: str, directory: Path = DEVICES_DIR) -> Path:
+    return directory / name / "test_timings.json"
+
+
+def load_device_timings(names: list[str], directory: Path = DEVICES_DIR) -> dict[str, dict[str, Any]]:
+    """``{profile: {test_id: {"totals", "steps"}}}`` for the profiles that have timings."""
+    timings = {}
+    for name in names:
+        try:
+            timings[name] = json.loads(device_timings_path(name, directory).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+    return timings
+
+
+def compare_devices(timings: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Per test, each step's total ms under every profile, matched by step index."""
+    tests: dict[str, dict[str, Any]] = {}
+    for test_id in sorted({test_id for per_test in timings.values() for test_id in per_test}):
+        runs = {name: per_test[test_id] for name, per_test in timings.items() if test_id in per_test}
+        steps = []
+        for index in range(max(len(run["steps"]) for run in runs.values())):
+            reference = next(run["steps"][index] for run in runs.values() if index < len(run["steps"]))
+            row: dict[str, Any] = {"index": index, "action": reference["action"], "target": reference["selector"]}
+            row["target"] = row["target"] or reference["url"]
+            for name, run in runs.items():
+                step = run["steps"][index] if index < len(run["steps"]) else None
+                row[name] = round(step["wait_ms"] + step["act_ms"] + step["assert_ms"], 1) if step else None
+            steps.append(row)
+        tests[test_id] = {
+            "totals": {name: round(sum(run["totals"].values()), 1) for name, run in runs.items()},
+            "steps": steps,
+        }
+    return tests
@@ -0,0 +1,114 @@
+"""Find the generated ``TCxxx_*.py`` scripts and load them without running them.
+
+Every generated script ends with a module-level ``asyncio.run(run_test())``,
+so a plain import would start a browser immediately. The loader parses the
+source, drops that trailing call and executes the rest into a fresh module,
+leaving ``run_test`` for the runner to await on its own event loop.
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import re
+import types
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+from .config import SUITE_DIR, TEST_PLAN_PATH
+
+TC_FILE_PATTERN = re.compile(r"^(TC\d{3})_(\w+)\.py$")
+
+
+@dataclass(frozen=True)
+class TestCase:
+    test_id: str
+    title: str
+    path: Path
+    description: str = ""
+    priority: str = ""
+    category: str = ""
+
+    @property
+    def name(self) -> str:
+        return self.path.stem
+
+    @property
+    def report_title(self) -> str:
+        """Title in the ``TC001-Sign up ...`` form used by TestSprite results."""
+        return f"{self.test_id}-{self.title}"
+
+    def source(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def _plan_entries() -> dict[str, dict[str, Any]]:
+    try:
+        plan = json.loads(TEST_PLAN_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return {entry["id"]: entry for entry in plan if isinstance(entry, dict) and "id" in entry}
+
+
+def plan_entry(test_id: str) -> dict[str, Any]:
+    return _plan_entries().get(test_id, {})
+
+
+def discover(suite_dir: Path = SUITE_DIR, only: Iterable[str] | None = None) -> list[TestCase]:
+    """Return the TC scripts in ``suite_dir`` sorted by id, optionally filtered."""
+    wanted = {test_id.upper() for test_id in only} if only else None
+    cases = []
+    for path in sorted(suite_dir.glob("TC*.py")):
+        match = TC_FILE_PATTERN.match(path.name)
+        if not match:
+            continue
+        test_id = match.group(1)
+        if wanted is not None and test_id not in wanted:
+            continue
+        entry = plan_entry(test_id)
+        cases.append(
+            TestCase(
+                test_id=test_id,
+                title=entry.get("title") or match.group(2).replace("_", " "),
+                path=path,
+                description=entry.get("description", ""),
+                priority=entry.get("priority", ""),
+                category=entry.get("category", ""),
+            )
+        )
+    return cases
+
+
+def _is_entry_call(node: ast.stmt) -> bool:
+    """True for ``asyncio.run(...)`` statements and ``if __name__ == "__main__"`` blocks."""
+    if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+        func = node.value.func
+        return (
+            isinstance(func, ast.Attribute)
+            and func.attr == "run"
+            and isinstance(func.value, ast.Name)
+            and func.value.id == "asyncio"
+        )
+    if isinstance(node, ast.If) and isinstance(node.test, ast.Compare):
+        left = node.test.left
+        return isinstance(left, ast.Name) and left.id == "__name__"
+    return False
+
+
+def load_module(case: TestCase) -> types.ModuleType:
+    """Execute ``case`` into a new module object with its entry call removed.
+
+    Each call returns an independent module, so concurrently running tests
+    never share globals and the runner can patch them per test.
+    """
+    tree = ast.parse(case.source(), filename=str(case.path))
+    tree.body = [node for node in tree.body if not _is_entry_call(node)]
+    module = types.ModuleType(f"testsprite_tests.{case.name}")
+    module.__file__ = str(case.path)
+    exec(compile(tree, str(case.path), "exec"), module.__dict__)
+    if not callable(getattr(module, "run_test", None)):
+        raise LookupError(f"{case.path.name} does not define run_test()")
+    return module
@@ -0,0 +1,504 @@
+"""Browser-free fast path for tests that only navigate and read the page.
+
+Some scripts never interact: they ``goto`` public pages and assert that
+text such as "Business results list" or "Paris" is visible. For those a
+Chromium context is pure overhead. :func:`compile_plan` reads a script's
+AST and, when every statement is a ``goto``, a locator ``expect`` or a
+``'...' in frame.url`` assertion, returns a :class:`FastPlan` that
+:class:`FastPath` executes over a pooled keep-alive HTTP client:
+
+* each page is fetched once (redirects followed on the same origin),
+* the server-rendered HTML is parsed into a small element tree, skipping
+  ``<script>``, ``<template>`` and hidden subtrees,
+* ``text=``, ``contains(normalize-space(.), ...)`` xpaths and simple CSS
+  selectors are evaluated against it.
+
+Only rendered, visible SSR elements count. Text that exists only in the
+React Server Components payload (``self.__next_f.push``) may never be
+rendered, so it does not satisfy a ``to_be_visible`` check here; such a
+test fails over HTTP and is confirmed in the browser.
+
+Tests opt in through ``fast_path.json``. A script that clicks, fills or
+uses a selector the evaluator does not understand runs in the browser as
+usual, and so does an opted-in test whose HTTP checks fail: text rendered
+only after hydration is invisible to the fast path, so a failure there is
+confirmed by the browser before it is reported.
+"""
+
+from __future__ import annotations
+
+import ast
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Iterator
+from urllib.parse import urljoin, urlsplit
+
+from .config import SUITE_DIR, base_url, rebase
+from .discovery import TestCase
+from .http import ConnectionPool, HttpError, HttpResponse
+from .prefix import constant_str, locator_selector, script_statements
+from .timing import StepRecorder
+
+FAST_PATH_CONFIG = SUITE_DIR / "fast_path.json"
+MAX_REDIRECTS = 5
+HTML_HEADERS = {"accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8"}
+
+# Statements a script may contain without needing a browser.
+_IGNORED_CALLS = frozenset({"wait_for_timeout", "set_default_timeout", "set_default_navigation_timeout", "sleep"})
+_ASSERTIONS = frozenset({"to_be_visible", "to_contain_text", "to_have_text"})
+_INVISIBLE_TAGS = frozenset({"head", "script", "style", "template", "noscript", "title", "meta", "link"})
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+})
+_XPATH_CONTAINS = re.compile(r"""^(?:xpath=)?//\*\[contains\((?:normalize-space\(\.?\)|\.),\s*(['"])(.*)\1\)\]$""")
+_XPATH_EQUALS = re.compile(r"""^(?:xpath=)?//\*\[(normalize-space\(\.?\)|\.)\s*=\s*(['"])(.*)\2\]$""")
+_XPATH_OWN_TEXT = re.compile(r"""^(?:xpath=)?//\*\[(?:normalize-space\(text\(\)\)|text\(\))\s*=\s*(['"])(.*)\1\]$""")
+_CSS_COMPOUND = re.compile(
+    r"""^(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:[#.][\w-]+|\[[\w-]+(?:[~^$*|]?=(?:"[^"]*"|'[^']*'|[^\]]*))?\])*)$"""
+)
+_CSS_PART = re.compile(r"""#([\w-]+)|\.([\w-]+)|\[([\w-]+)(?:([~^$*|]?=)(?:"([^"]*)"|'([^']*)'|([^\]]*)))?\]""")
+_SPACE = re.compile(r"\s+")
+
+
+class Unsupported(Exception):
+    """The plan or a selector needs a real browser."""
+
+
+def normalize_space(text: str) -> str:
+    return _SPACE.sub(" ", text).strip()
+
+
+@dataclass(frozen=True)
+class Check:
+    kind: str  # "visible", "contains", "equals" or "url"
+    selector: str | None
+    value: str | None = None
+
+
+@dataclass
+class FastPlan:
+    # Ordered ("goto", url) and ("check", Check) operations.
+    operations: list[tuple[str, Any]] = field(default_factory=list)
+    # Why the script needs the browser; None when the plan is complete.
+    unsupported: str | None = None
+
+    @property
+    def eligible(self) -> bool:
+        return self.unsupported is None and any(kind == "goto" for kind, _ in self.operations)
+
+
+def opted_in(path: Path = FAST_PATH_CONFIG) -> set[str]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return set()
+    return {str(test_id) for test_id in data.get("tests", [])}
+
+
+def _await_call(node: ast.AST) -> ast.Call | None:
+    node = node.value if isinstance(node, ast.Await) else node
+    return node if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) else None
+
+
+def _expect_check(call: ast.Call, selectors: dict[str, str]) -> Check | None:
+    """``expect(<locator>).to_be_visible()``-style assertions."""
+    method, subject = call.func.attr, call.func.value
+    if method not in _ASSERTIONS:
+        return None
+    if not (isinstance(subject, ast.Call) and isinstance(subject.func, ast.Name) and subject.func.id == "expect"):
+        return None
+    if not subject.args:
+        return None
+    target = subject.args[0]
+    # .first/.last/.nth(i) pick among matches; any visible match will do here.
+    while isinstance(target, ast.Attribute) or (
+        isinstance(target, ast.Call) and isinstance(target.func, ast.Attribute) and target.func.attr == "nth"
+    ):
+        target = target.value if isinstance(target, ast.Attribute) else target.func.value
+    selector = locator_selector(target)
+    if selector is None and isinstance(target, ast.Name):
+        selector = selectors.get(target.id)
+    if selector is None:
+        return None
+    if method == "to_be_visible":
+        return Check("visible", selector)
+    value = constant_str(call.args[0]) if call.args else None
+    if value is None:
+        return None
+    return Check("contains" if method == "to_contain_text" else "equals", selector, value)
+
+
+def _url_check(statement: ast.Assert) -> Check | None:
+    """``assert '/business' in frame.url``."""
+    test = statement.test
+    if not (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.In)):
+        return None
+    comparator = test.comparators[0]
+    if not (isinstance(comparator, ast.Attribute) and comparator.attr == "url"):
+        return None
+    value = constant_str(test.left)
+    return Check("url", None, value) if value is not None else None
+
+
+def compile_plan(case: TestCase) -> FastPlan:
+    """The script as fetches and checks, or the reason it needs a browser."""
+    plan = FastPlan()
+    selectors: dict[str, str] = {}
+    for statement in script_statements(case):
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+            target = statement.targets[0]
+            selector = locator_selector(statement.value)
+            if isinstance(target, ast.Name) and selector is not None:
+                selectors[target.id] = selector
+            continue  # playwright/browser/context/page bookkeeping
+        if isinstance(statement, ast.Assert):
+            check = _url_check(statement)
+            if check is None:
+                plan.unsupported = f"line {statement.lineno}: assertion the fast path cannot evaluate"
+                return plan
+            plan.operations.append(("check", check))
+            continue
+        call = _await_call(statement.value) if isinstance(statement, ast.Expr) else None
+        if call is None:
+            plan.unsupported = f"line {statement.lineno}: {type(statement).__name__} statement"
+            return plan
+        method = call.func.attr
+        if method in _IGNORED_CALLS:
+            continue
+        if method == "goto" and call.args and constant_str(call.args[0]) is not None:
+            plan.operations.append(("goto", constant_str(call.args[0])))
+            continue
+        check = _expect_check(call, selectors)
+        if check is None:
+            plan.unsupported = f"line {statement.lineno}: {method}() needs a browser"
+            return plan
+        plan.operations.append(("check", check))
+    return plan
+
+
+@dataclass
+class Element:
+    tag: str
+    attrs: dict[str, str]
+    parent: "Element | None" = None
+    children: list["Element | str"] = field(default_factory=list)
+    hidden: bool = False
+
+    def text(self) -> str:
+        parts: list[str] = []
+        stack: list[Element | str] = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            elif not node.hidden:
+                stack.extend(reversed(node.children))
+        return normalize_space(" ".join(parts))
+
+    def own_text(self) -> str:
+        """Direct text children only, like xpath ``text()``."""
+        return normalize_space(" ".join(child for child in self.children if isinstance(child, str)))
+
+    def iter(self) -> Iterator["Element"]:
+        stack: list[Element] = [self]
+        while stack:
+            node = stack.pop()
+            if node.hidden:
+                continue
+            yield node
+            stack.extend(reversed([child for child in node.children if isinstance(child, Element)]))
+
+
+def _hidden(tag: str, attrs: dict[str, str]) -> bool:
+    if tag in _INVISIBLE_TAGS:
+        return True
+    # Includes streamed Suspense content (<div hidden id="S:n">): it is only shown once a script
+    # moves it into place, so the browser has to confirm it.
+    if "hidden" in attrs:
+        return True
+    style = attrs.get("style", "").replace(" ", "").lower()
+    return "display:none" in style or "visibility:hidden" in style
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document", {})
+        self._current = self.root
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        values = {name: value or "" for name, value in attrs}
+        element = Element(tag, values, self._current, hidden=_hidden(tag, values))
+        self._current.children.append(element)
+        if tag not in _VOID_TAGS:
+            self._current = element
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        values = {name: value or "" for name, value in attrs}
+        self._current.children.append(Element(tag, values, self._current, hidden=_hidden(tag, values)))
+
+    def handle_endtag(self, tag: str) -> None:
+        node: Element | None = self._current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self._current = node.parent
+
+    def handle_data(self, data: str) -> None:
+        self._current.children.append(data)
+
+
+@dataclass
+class Document:
+    url: str
+    status: int
+    root: Element
+
+    @classmethod
+    def parse(cls, url: str, status: int, html: str) -> "Document":
+        builder = _TreeBuilder()
+        builder.feed(html)
+        builder.close()
+        return cls(url, status, builder.root)
+
+    def elements(self) -> Iterator[Element]:
+        return self.root.iter()
+
+    def matches(self, selector: str) -> list[str]:
+        """Normalized text of every visible element ``selector`` matches."""
+        kind, value = _classify(selector)
+        if kind == "css":
+            return [element.text() for element in _select(self.root, value)]
+        if kind in ("text", "xpath-contains"):
+            fold = kind == "text"
+            needle = value.lower() if fold else value
+            return [element.text() for element in self._innermost(needle, fold)]
+        if kind == "xpath-own-text":
+            return [text for text in (element.own_text() for element in self.elements()) if text == value]
+        # "text-exact" and "xpath-equals"
+        return [text for text in (element.text() for element in self.elements()) if text == value]
+
+    def _innermost(self, needle: str, fold: bool) -> list[Element]:
+        matched = []
+        for element in self.elements():
+            text = element.text()
+            if needle in (text.lower() if fold else text):
+                matched.append(element)
+        # Every ancestor of a match matches too; keep the deepest ones.
+        ancestors = {id(element.parent) for element in matched}
+        return [element for element in matched if id(element) not in ancestors]
+
+
+def _classify(selector: str) -> tuple[str, str]:
+    selector = selector.strip()
+    if selector.startswith("text="):
+        value = selector[5:]
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            return "text-exact", normalize_space(value[1:-1])
+        return "text", normalize_space(value)
+    match = _XPATH_CONTAINS.match(selector)
+    if match:
+        return "xpath-contains", normalize_space(match.group(2))
+    match = _XPATH_EQUALS.match(selector)
+    if match:
+        return "xpath-equals", normalize_space(match.group(3))
+    match = _XPATH_OWN_TEXT.match(selector)
+    if match:
+        return "xpath-own-text", normalize_space(match.group(2))
+    if selector.startswith(("xpath=", "//", "/")) or "=" in selector.split("[", 1)[0] or ">>" in selector:
+        raise Unsupported(f"selector needs a browser: {selector}")
+    selector = selector.removeprefix("css=")
+    compounds = selector.split()
+    if not compounds or not all(_CSS_COMPOUND.match(part) for part in compounds):
+        raise Unsupported(f"selector needs a browser: {selector}")
+    return "css", selector
+
+
+def _compound_matches(element: Element, compound: str) -> bool:
+    match = _CSS_COMPOUND.match(compound)
+    assert match is not None
+    tag = match.group("tag")
+    if tag and tag != "*" and element.tag != tag.lower():
+        return False
+    classes = element.attrs.get("class", "").split()
+    for part in _CSS_PART.finditer(match.group("rest")):
+        element_id, class_name, attribute, operator = part.group(1), part.group(2), part.group(3), part.group(4)
+        if element_id is not None and element.attrs.get("id") != element_id:
+            return False
+        if class_name is not None and class_name not in classes:
+            return False
+        if attribute is not None:
+            if attribute not in element.attrs:
+                return False
+            expected = next((group for group in part.groups()[4:] if group is not None), "")
+            actual = element.attrs[attribute]
+            tests = {
+                "=": actual == expected,
+                "~=": expected in actual.split(),
+                "^=": actual.startswith(expected),
+                "$=": actual.endswith(expected),
+                "*=": expected in actual,
+                "|=": actual == expected or actual.startswith(expected + "-"),
+            }
+            if operator and not tests[operator]:
+                return False
+    return True
+
+
+def _select(root: Element, selector: str) -> list[Element]:
+    """Descendant-combinator CSS: ``main section.results a[href^="/businesses/"]``."""
+    *ancestors, last = selector.split()
+    selected = []
+    for element in root.iter():
+        if not _compound_matches(element, last):
+            continue
+        node, pending = element.parent, list(ancestors)
+        while pending and node is not None:
+            if _compound_matches(node, pending[-1]):
+                pending.pop()
+            node = node.parent
+        if not pending:
+            selected.append(element)
+    return selected
+
+
+def evaluate(document: Document, check: Check) -> str | None:
+    """None when ``check`` holds on ``document``, else why it does not."""
+    if check.kind == "url":
+        return None if check.value in document.url else f"{check.value!r} not in {document.url}"
+    texts = document.matches(check.selector or "")
+    if check.kind == "visible":
+        return None if texts else f"no visible match for {check.selector}"
+    if check.kind == "contains":
+        expected = normalize_space(check.value or "")
+        return None if any(expected in text for text in texts) else f"{check.selector} does not contain {expected!r}"
+    expected = normalize_space(check.value or "")
+    return None if expected in texts else f"{check.selector} does not have text {expected!r}"
+
+
+@dataclass
+class FastOutcome:
+    passed: bool
+    # Why the test was not (or could not be) decided over HTTP.
+    reason: str | None = None
+    pages: list[dict[str, Any]] = field(default_factory=list)
+    steps: list[dict[str, Any]] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+class FastPath:
+    """Runs :class:`FastPlan` fetches and checks over one keep-alive pool."""
+
+    def __init__(self, origin: str | None = None, size: int = 8, timeout: float = 30.0) -> None:
+        self.origin = origin or base_url()
+        self.pool = ConnectionPool(self.origin, size=size, timeout=timeout, headers=HTML_HEADERS)
+        # A page is fetched once per run, however many tests read it.
+        self._documents: dict[str, asyncio.Future[Document]] = {}
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def fetch(self, url: str) -> Document:
+        """GET ``url`` and parse it, without the per-run page cache."""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if f"{parts.scheme}://{parts.netloc}" != self.pool.origin:
+                raise Unsupported(f"navigation leaves {self.pool.origin}: {url}")
+            response: HttpResponse = await self.pool.get(parts.path + (f"?{parts.query}" if parts.query else "") or "/")
+            location = response.header("location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return Document.parse(url, response.status, response.text())
+        raise Unsupported(f"more than {MAX_REDIRECTS} redirects from {url}")
+
+    async def document(self, url: str) -> Document:
+        if url not in self._documents:
+            self._documents[url] = asyncio.ensure_future(self.fetch(url))
+        return await asyncio.shield(self._documents[url])
+
+    async def run(self, plan: FastPlan) -> FastOutcome:
+        if not plan.eligible:
+            return FastOutcome(False, plan.unsupported or "no navigation")
+        start = time.perf_counter()
+        recorder = StepRecorder()
+        outcome = FastOutcome(False)
+        document: Document | None = None
+        try:
+            for kind, operation in plan.operations:
+                if kind == "goto":
+                    url = rebase(operation)
+                    async with recorder.step("goto", None, url) as step:
+                        with recorder.phase(step, "act"):
+                            document = await self.document(url)
+                    outcome.pages.append({"url": document.url, "status": document.status})
+                    if document.status >= 400:
+                        outcome.reason = f"GET {document.url} -> {document.status}"
+                        return outcome
+                    continue
+                if document is None:
+                    outcome.reason = "assertion before any navigation"
+                    return outcome
+                async with recorder.step("expect", operation.selector, document.url) as step:
+                    with recorder.phase(step, "assert"):
+                        failure = evaluate(document, operation)
+                    step.note = "http"
+                if failure:
+                    outcome.reason = failure
+                    return outcome
+            outcome.passed = True
+            return outcome
+        except Unsupported as exc:
+            outcome.reason = str(exc)
+            return outcome
+        except (HttpError, OSError, asyncio.TimeoutError) as exc:
+            outcome.reason = f"{type(exc).__name__}: {exc}"
+            return outcome
+        finally:
+            outcome.steps = recorder.finish()
+            outcome.elapsed_ms = (time.perf_counter() - start) * 1000
+
+
+@dataclass
+class PageCheck:
+    path: str
+    status: int | str
+    elapsed_ms: float
+    failures: list[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+
+async def check_pages(
+    fast: FastPath, paths: list[str], checks: list[Check], concurrency: int = 16
+) -> list[PageCheck]:
+    """Fetch ``paths`` (e.g. every business slug) and run ``checks`` on each."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(path: str) -> PageCheck:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                document = await fast.fetch(urljoin(fast.origin + "/", path.lstrip("/")))
+            except (Unsupported, HttpError, OSError, asyncio.TimeoutError) as exc:
+                elapsed = (time.perf_counter() - start) * 1000
+                return PageCheck(path, type(exc).__name__, elapsed, [str(exc) or type(exc).__name__])
+            elapsed = (time.perf_counter() - start) * 1000
+            failures = [f"HTTP {document.status}"] if document.status >= 400 else []
+            for check in checks:
+                try:
+                    failure = evaluate(document, check)
+                except Unsupported as exc:
+                    failure = str(exc)
+                if failure:
+                    failures.append(failure)
+            return PageCheck(path, document.status, elapsed, failures)
+
+    return list(await asyncio.gather(*(one(path) for path in paths)))
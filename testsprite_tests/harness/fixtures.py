@@ -0,0 +1,312 @@
+"""Namespaced test data provisioned in bulk before a run and removed after it.
+
+The scripts share fixed accounts (``example@gmail.com`` for every review
+test, ``new.user+e2e@example.com`` for sign-up), so parallel or repeated
+runs collide: the sign-up address is already registered and a second
+review of the same business is refused. With fixtures enabled each worker
+provisions its own data under the namespace ``e2e-<run>-<worker>``:
+
+* users and pro accounts in one call to the ``e2e_provision_users`` RPC
+  (auth user, identity, profile role and business link created in SQL),
+* businesses in one bulk PostgREST insert,
+* reviews in one bulk PostgREST insert,
+
+so provisioning 100 fixtures costs three round trips whatever the count.
+``e2e_cleanup_fixtures`` deletes everything under a prefix in one call.
+Both RPCs come from the test-only ``supabase/sql/e2e_fixture_functions.sql``,
+applied by hand to local and CI projects (never a migration), and need the
+service-role key (``SUPABASE_SERVICE_ROLE_KEY``). Cleanup only accepts a
+whole run (``e2e-<run>``) or one worker's namespace, never a partial run id.
+
+During the run each test's fill values are rewritten: the shared account's
+email becomes that test's own fixture user (same password) and the sign-up
+address becomes a fresh address inside the namespace. Tests that edit an
+existing review (``REVIEW_OWNER_TESTS``) get a published review for their
+user, since a fresh fixture user has none.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .config import TMP_DIR, dotenv
+from .http import ConnectionPool, HttpError
+
+FIXTURES_DIR = TMP_DIR / "fixtures"
+SHARED_USER_EMAIL = "example@gmail.com"
+SIGNUP_EMAIL = "new.user+e2e@example.com"
+FIXTURE_PASSWORD = "password123"
+EMAIL_DOMAIN = "example.com"
+# Mirrors the checks in e2e_fixture_functions.sql.
+RUN_ID_PATTERN = re.compile(r"[a-z0-9]{8,40}")
+WORKER_PATTERN = re.compile(r"[a-z0-9]+")
+PREFIX_PATTERN = re.compile(r"e2e-[a-z0-9]{8,40}(-[a-z0-9]+)?")
+# Tests that open the dashboard to edit a review their user already wrote.
+REVIEW_OWNER_TESTS = {"TC022"}
+
+CATEGORIES = ["Restaurants & Cafés", "Banque & Finance", "Santé & Bien-être", "Hôtellerie", "Commerce"]
+CITIES = ["Casablanca", "Rabat", "Marrakech", "Fès", "Tanger"]
+
+
+class FixtureError(RuntimeError):
+    """Provisioning or cleanup failed."""
+
+
+def new_run_id() -> str:
+    """Shared by every worker of a run: ``TESTSPRITE_RUN_ID`` or a timestamp."""
+    return os.environ.get("TESTSPRITE_RUN_ID") or time.strftime("%Y%m%d%H%M%S")
+
+
+def check_prefix(prefix: str) -> str:
+    if not PREFIX_PATTERN.fullmatch(prefix):
+        raise FixtureError(f"refusing to clean up {prefix!r}: expected e2e-<run> or e2e-<run>-<worker>")
+    return prefix
+
+
+@dataclass(frozen=True)
+class Namespace:
+    run_id: str
+    worker: str
+
+    def __post_init__(self) -> None:
+        if not RUN_ID_PATTERN.fullmatch(self.run_id.lower()):
+            raise FixtureError(f"run id {self.run_id!r} must be 8-40 letters or digits (TESTSPRITE_RUN_ID)")
+        if not WORKER_PATTERN.fullmatch(self.worker.lower()):
+            raise FixtureError(f"worker {self.worker!r} must be letters or digits")
+
+    @property
+    def prefix(self) -> str:
+        return f"e2e-{self.run_id}-{self.worker}".lower()
+
+    def email(self, kind: str, index: int | str) -> str:
+        return f"{self.prefix}-{kind}-{index}@{EMAIL_DOMAIN}"
+
+    def business_id(self, index: int) -> str:
+        return f"{self.prefix}-biz-{index:04d}"
+
+
+@dataclass
+class FixtureSet:
+    namespace: str
+    users: list[dict[str, Any]] = field(default_factory=list)
+    businesses: list[dict[str, Any]] = field(default_factory=list)
+    reviews: list[dict[str, Any]] = field(default_factory=list)
+    round_trips: int = 0
+    elapsed_ms: float = 0.0
+    # test id -> email of the user that test logs in as
+    assignments: dict[str, str] = field(default_factory=dict)
+
+    def users_with_role(self, role: str) -> list[dict[str, Any]]:
+        return [user for user in self.users if user["role"] == role]
+
+    def substitutions(self, test_id: str) -> dict[str, str]:
+        """Fill values to rewrite for ``test_id``."""
+        rewrites = {SIGNUP_EMAIL: f"{self.namespace}-signup-{test_id.lower()}@{EMAIL_DOMAIN}"}
+        if test_id in self.assignments:
+            rewrites[SHARED_USER_EMAIL] = self.assignments[test_id]
+        return rewrites
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class AdminClient:
+    """PostgREST calls with the service-role key."""
+
+    def __init__(self, url: str | None = None, service_key: str | None = None) -> None:
+        url = url or dotenv("NEXT_PUBLIC_SUPABASE_URL")
+        service_key = service_key or dotenv("SUPABASE_SERVICE_ROLE_KEY")
+        if not url or not service_key:
+            raise FixtureError("fixtures need NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY")
+        self._pool = ConnectionPool(url, size=4, timeout=120.0)
+        self._headers = {
+            "apikey": service_key,
+            "authorization": f"Bearer {service_key}",
+            "content-type": "application/json",
+            "accept": "application/json",
+        }
+        self.round_trips = 0
+
+    async def close(self) -> None:
+        await self._pool.close()
+
+    async def _post(self, path: str, payload: Any, prefer: str | None = None) -> Any:
+        headers = {**self._headers, **({"prefer": prefer} if prefer else {})}
+        self.round_trips += 1
+        try:
+            response = await self._pool.request("POST", path, headers=headers, body=json.dumps(payload).encode())
+        except (HttpError, OSError, asyncio.TimeoutError) as exc:
+            raise FixtureError(f"POST {path}: {exc}") from exc
+        if not response.ok:
+            raise FixtureError(f"POST {path}: HTTP {response.status}: {response.text()[:300]}")
+        text = response.text()
+        return json.loads(text) if text else None
+
+    async def rpc(self, name: str, params: dict[str, Any]) -> Any:
+        return await self._post(f"/rest/v1/rpc/{name}", params)
+
+    async def insert(self, table: str, rows: list[dict[str, Any]], returning: str = "*") -> list[dict[str, Any]]:
+        if not rows:
+            return []
+        return await self._post(f"/rest/v1/{table}?select={returning}", rows, prefer="return=representation")
+
+
+class FixtureFactory:
+    def __init__(self, client: AdminClient, namespace: Namespace, seed: int | None = None) -> None:
+        self.client = client
+        self.namespace = namespace
+        self.rng = random.Random(seed)
+
+    def _business_rows(self, count: int) -> list[dict[str, Any]]:
+        rows = []
+        for index in range(1, count + 1):
+            business_id = self.namespace.business_id(index)
+            rows.append({
+                "id": business_id,
+                "slug": business_id,
+                "name": f"E2E Business {index} ({self.namespace.prefix})",
+                "category": self.rng.choice(CATEGORIES),
+                "city": self.rng.choice(CITIES),
+                "location": self.rng.choice(CITIES),
+                "description": "Fixture created by the E2E harness; removed after the run.",
+                "status": "active",
+            })
+        return rows
+
+    def _user_rows(self, users: int, pros: int, businesses: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        rows = [
+            {
+                "email": self.namespace.email("user", index),
+                "password": FIXTURE_PASSWORD,
+                "full_name": f"E2E User {index}",
+            }
+            for index in range(1, users + 1)
+        ]
+        for index in range(1, pros + 1):
+            row = {"email": self.namespace.email("pro", index), "password": FIXTURE_PASSWORD, "role": "pro"}
+            if businesses:
+                row["business_id"] = businesses[(index - 1) % len(businesses)]["id"]
+            rows.append({**row, "full_name": f"E2E Pro {index}"})
+        return rows
+
+    def _review_rows(
+        self, per_business: int, businesses: list[dict[str, Any]], users: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        reviewers = [user for user in users if user["role"] == "user"]
+        rows = []
+        for business in businesses:
+            # One review per user and business, like the app enforces.
+            for reviewer in self.rng.sample(reviewers, min(per_business, len(reviewers))):
+                rows.append(self._review_row(business, reviewer))
+        return rows
+
+    def _review_row(self, business: dict[str, Any], reviewer: dict[str, Any]) -> dict[str, Any]:
+        rating = self.rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 5])[0]
+        return {
+            "business_id": business["id"],
+            "user_id": reviewer["id"],
+            "author_name": reviewer["email"].split("@")[0],
+            "rating": rating,
+            "title": f"E2E review ({rating}/5)",
+            "content": "Fixture review created by the E2E harness.",
+            "status": "published",
+        }
+
+    async def provision(
+        self, users: int = 0, pros: int = 0, businesses: int = 0, reviews_per_business: int = 0
+    ) -> FixtureSet:
+        start = time.perf_counter()
+        fixtures = FixtureSet(self.namespace.prefix)
+        # Businesses first so pro accounts can be linked to them in the same user call.
+        business_rows = self._business_rows(businesses)
+        fixtures.businesses = await self.client.insert("businesses", business_rows, "id,slug,name,city")
+        user_rows = self._user_rows(users, pros, fixtures.businesses)
+        if user_rows:
+            created = await self.client.rpc("e2e_provision_users", {"p_users": user_rows})
+            requested = {row["email"]: row for row in user_rows}
+            fixtures.users = [
+                {**user, "password": FIXTURE_PASSWORD, "business_id": requested[user["email"]].get("business_id")}
+                for user in created
+            ]
+        if reviews_per_business and fixtures.businesses and fixtures.users:
+            rows = self._review_rows(reviews_per_business, fixtures.businesses, fixtures.users)
+            fixtures.reviews = await self.client.insert("reviews", rows, "id,business_id,user_id,rating")
+        fixtures.round_trips = self.client.round_trips
+        fixtures.elapsed_ms = (time.perf_counter() - start) * 1000
+        return fixtures
+
+    async def give_reviews(self, fixtures: FixtureSet, emails: list[str]) -> None:
+        """One review on the first fixture business for each of ``emails`` that has none yet."""
+        reviewed = {review["user_id"] for review in fixtures.reviews}
+        owners = [user for user in fixtures.users if user["email"] in emails and user["id"] not in reviewed]
+        if not owners:
+            return
+        if not fixtures.businesses:
+            raise FixtureError("reviews for existing-review tests need at least one fixture business")
+        rows = [self._review_row(fixtures.businesses[0], owner) for owner in owners]
+        fixtures.reviews += await self.client.insert("reviews", rows, "id,business_id,user_id,rating")
+        fixtures.round_trips = self.client.round_trips
+
+    async def cleanup(self) -> dict[str, int]:
+        return await remove(self.client, self.namespace.prefix)
+
+
+def assign_users(fixtures: FixtureSet, test_ids: list[str]) -> None:
+    """Give each test its own fixture user, in order."""
+    users = fixtures.users_with_role("user")
+    if len(users) < len(test_ids):
+        raise FixtureError(f"{len(test_ids)} tests need a user, only {len(users)} provisioned")
+    fixtures.assignments = {test_id: user["email"] for test_id, user in zip(test_ids, users)}
+
+
+def manifest_path(prefix: str) -> Path:
+    return FIXTURES_DIR / f"{prefix}.json"
+
+
+def write_manifest(fixtures: FixtureSet) -> Path:
+    path = manifest_path(fixtures.namespace)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(fixtures.to_dict(), indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
+
+
+async def provision(namespace: Namespace, test_ids: list[str], **counts: int) -> FixtureSet:
+    """One user per test (plus ``counts``), assigned and written to the manifest."""
+    owners = [test_id for test_id in test_ids if test_id in REVIEW_OWNER_TESTS]
+    client = AdminClient()
+    try:
+        factory = FixtureFactory(client, namespace)
+        counts["users"] = max(counts.get("users", 0), len(test_ids))
+        if owners:
+            counts["businesses"] = max(counts.get("businesses", 0), 1)
+        fixtures = await factory.provision(**counts)
+        assign_users(fixtures, test_ids)
+        await factory.give_reviews(fixtures, [fixtures.assignments[test_id] for test_id in owners])
+    finally:
+        await client.close()
+    write_manifest(fixtures)
+    return fixtures
+
+
+async def remove(client: AdminClient, prefix: str) -> dict[str, int]:
+    """Delete everything under ``prefix`` with the ``e2e_cleanup_fixtures`` RPC."""
+    return await client.rpc("e2e_cleanup_fixtures", {"p_prefix": check_prefix(prefix)})
+
+
+async def cleanup(prefix: str) -> dict[str, int]:
+    check_prefix(prefix)
+    client = AdminClient()
+    try:
+        removed = await remove(client, prefix)
+    finally:
+        await client.close()
+    manifest_path(prefix).unlink(missing_ok=True)
+    return removed
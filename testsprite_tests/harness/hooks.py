@@ -0,0 +1,41 @@
+"""Extension point for per-context features such as caches and filters.
+
+A hook is attached to every ``BrowserContext`` the runner creates, before
+the test script sees it, and reports one JSON-serialisable summary for the
+whole run. Run summaries are written next to ``tmp/test_results.json``.
+A hook may also define ``async detach(context)``; it is awaited just
+before the context closes, whether the script or the runner closes it.
+An optional ``async prepare(page)`` is awaited for every page the script
+opens with ``context.new_page()``, before the script gets it.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Protocol
+
+from playwright.async_api import BrowserContext
+
+from .config import TMP_DIR
+
+RUN_SUMMARY_PATH = TMP_DIR / "run_summary.json"
+
+
+class ContextHook(Protocol):
+    name: str
+
+    async def attach(self, context: BrowserContext) -> None:
+        """Install routes or listeners on a freshly created context."""
+
+    def summary(self) -> dict[str, Any]:
+        """Totals for the run so far."""
+
+
+def write_summaries(hooks: list[ContextHook], path: Path = RUN_SUMMARY_PATH) -> Path | None:
+    if not hooks:
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {hook.name: hook.summary() for hook in hooks}
+    path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    return path
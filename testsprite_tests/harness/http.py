@@ -0,0 +1,333 @@
+"""Minimal asyncio HTTP/1.1 client with a keep-alive connection pool.
+
+The browser-free tools (load generation, crawling, benchmarks) issue many
+small GETs against one origin. Playwright's request API opens a context
+per caller and hides connection reuse, so this client keeps up to ``size``
+sockets open per origin and measures time to first byte and total time of
+each request itself. Only what the app under test needs is supported:
+``Content-Length`` and chunked bodies, gzip/deflate decoding, plain http
+and https. :meth:`ConnectionPool.stream` hands a large body (a sitemap)
+to the caller piece by piece as it arrives, instead of buffering it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ssl
+import time
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator
+from urllib.parse import quote, urlsplit
+
+DEFAULT_HEADERS = {
+    "user-agent": "testsprite-harness/1.0",
+    "accept": "*/*",
+    "accept-encoding": "gzip, deflate",
+}
+STREAM_CHUNK = 64 * 1024
+# Characters left as they are in a request target; everything else (Arabic or accented slugs) is UTF-8 %-encoded.
+TARGET_SAFE = "/?&=%:@,;+*!$'()~"
+
+
+class HttpError(Exception):
+    """The server closed the connection or sent something unparseable."""
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    ttfb_ms: float
+    total_ms: float
+    reused: bool = False
+    wire_bytes: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def header(self, name: str, default: str = "") -> str:
+        return self.headers.get(name.lower(), default)
+
+    def content(self) -> bytes:
+        """The body with any gzip/deflate content encoding removed."""
+        encoding = self.header("content-encoding").lower()
+        if encoding == "gzip":
+            return zlib.decompress(self.body, 16 + zlib.MAX_WBITS)
+        if encoding == "deflate":
+            return zlib.decompress(self.body)
+        return self.body
+
+    def text(self) -> str:
+        return self.content().decode("utf-8", errors="replace")
+
+
+@dataclass
+class StreamedResponse:
+    status: int
+    headers: dict[str, str]
+    ttfb_ms: float
+    # Decoded body pieces, read from the socket as they are consumed.
+    chunks: AsyncIterator[bytes]
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    requests: int = 0
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+@dataclass
+class PoolStats:
+    opened: int = 0
+    reused: int = 0
+    requests: int = 0
+    errors: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class ConnectionPool:
+    """Up to ``size`` keep-alive connections to one origin."""
+
+    def __init__(self, origin: str, size: int = 10, timeout: float = 30.0, headers: dict[str, str] | None = None) -> None:
+        parts = urlsplit(origin)
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.netloc = parts.netloc
+        self._ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.timeout = timeout
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.stats = PoolStats()
+        self._idle: list[_Connection] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+        await asyncio.gather(*(connection.writer.wait_closed() for connection in idle), return_exceptions=True)
+
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+        self.stats.opened += 1
+        return _Connection(reader, writer)
+
+    async def get(self, path: str, headers: dict[str, str] | None = None) -> HttpResponse:
+        return await self.request("GET", path, headers=headers)
+
+    async def request(
+        self, method: str, path: str, headers: dict[str, str] | None = None, body: bytes | None = None
+    ) -> HttpResponse:
+        """Send one request; a stale keep-alive socket is retried once on a fresh one."""
+        async with self._slots:
+            self.stats.requests += 1
+            for attempt in range(2):
+                connection = self._idle.pop() if self._idle else await self._connect()
+                reused = connection.requests > 0
+                try:
+                    response = await asyncio.wait_for(
+                        self._exchange(connection, method, path, headers or {}, body), self.timeout
+                    )
+                except (HttpError, ConnectionError, asyncio.IncompleteReadError) as exc:
+                    connection.close()
+                    if reused and attempt == 0:
+                        continue  # the server dropped an idle socket; not the request's fault
+                    self.stats.errors += 1
+                    raise HttpError(f"{method} {path}: {exc}") from exc
+                except BaseException:
+                    connection.close()
+                    self.stats.errors += 1
+                    raise
+                response.reused = reused
+                self.stats.reused += reused
+                connection.requests += 1
+                if response.header("connection").lower() == "close":
+                    connection.close()
+                else:
+                    self._idle.append(connection)
+                return response
+        raise AssertionError("unreachable")
+
+    @asynccontextmanager
+    async def stream(self, path: str, headers: dict[str, str] | None = None) -> AsyncIterator[StreamedResponse]:
+        """GET ``path`` and read its body incrementally through ``response.chunks``.
+
+        The request gets a connection of its own, outside the pool's slots, so
+        a long download does not hold back the other requests; the connection
+        is closed on exit. ``timeout`` applies to each read, not the whole body.
+        """
+        self.stats.requests += 1
+        connection = await self._connect()
+        try:
+            status, response_headers, ttfb_ms, _ = await asyncio.wait_for(
+                self._send(connection, "GET", path, headers or {}, None), self.timeout
+            )
+            chunks = _decoded(iter_body(connection.reader, response_headers, self.timeout), response_headers)
+            yield StreamedResponse(status, response_headers, ttfb_ms, chunks)
+        except (HttpError, ConnectionError, asyncio.IncompleteReadError) as exc:
+            self.stats.errors += 1
+            if isinstance(exc, HttpError):
+                raise
+            raise HttpError(f"GET {path}: {exc}") from exc
+        finally:
+            connection.close()
+
+    async def _send(
+        self, connection: _Connection, method: str, path: str, headers: dict[str, str], body: bytes | None
+    ) -> tuple[int, dict[str, str], float, int]:
+        """Write the request and read the response head: status, headers, TTFB in ms and head bytes."""
+        merged = {"host": self.netloc, **self.headers, **{key.lower(): value for key, value in headers.items()}}
+        if body is not None:
+            merged["content-length"] = str(len(body))
+        target = quote(path or "/", safe=TARGET_SAFE)
+        head = f"{method} {target} HTTP/1.1\r\n" + "".join(f"{key}: {value}\r\n" for key, value in merged.items())
+        try:
+            encoded = head.encode("latin-1")
+        except UnicodeEncodeError as exc:
+            raise HttpError(f"header not encodable as latin-1: {exc}") from exc
+        start = time.perf_counter()
+        connection.writer.write(encoded + b"\r\n" + (body or b""))
+        await connection.writer.drain()
+
+        status_line = await connection.reader.readline()
+        ttfb_ms = (time.perf_counter() - start) * 1000
+        if not status_line:
+            raise HttpError("connection closed before a response")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f"bad status line {status_line!r}")
+        response_headers, head_bytes = await read_headers(connection.reader)
+        return status, response_headers, ttfb_ms, len(status_line) + head_bytes
+
+    async def _exchange(
+        self, connection: _Connection, method: str, path: str, headers: dict[str, str], body: bytes | None
+    ) -> HttpResponse:
+        start = time.perf_counter()
+        status, response_headers, ttfb_ms, wire = await self._send(connection, method, path, headers, body)
+        payload = await self._read_body(connection.reader, method, status, response_headers)
+        return HttpResponse(
+            status=status,
+            headers=response_headers,
+            body=payload,
+            ttfb_ms=ttfb_ms,
+            total_ms=(time.perf_counter() - start) * 1000,
+            wire_bytes=wire + len(payload),
+        )
+
+    async def _read_body(
+        self, reader: asyncio.StreamReader, method: str, status: int, headers: dict[str, str]
+    ) -> bytes:
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return b""
+        if "chunked" not in headers.get("transfer-encoding", "").lower() and "content-length" not in headers:
+            # No framing: the body runs to the end of the connection.
+            headers["connection"] = "close"
+            return await reader.read()
+        return await read_body(reader, headers)
+
+
+async def read_headers(reader: asyncio.StreamReader) -> tuple[dict[str, str], int]:
+    """Header block up to the blank line, with lower-cased names, and its size in bytes."""
+    headers: dict[str, str] = {}
+    size = 0
+    while True:
+        line = await reader.readline()
+        size += len(line)
+        if line in (b"\r\n", b"\n", b""):
+            return headers, size
+        name, _, value = line.decode("latin-1").partition(":")
+        key = name.strip().lower()
+        value = value.strip()
+        # Repeated headers (set-cookie, vary) are joined like a browser's Headers object does.
+        headers[key] = f"{headers[key]}, {value}" if key in headers else value
+
+
+async def read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+    """A chunked or ``Content-Length`` body; empty when neither is given."""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise HttpError(f"bad chunk size {size_line!r}")
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+    return b""
+
+
+async def iter_body(
+    reader: asyncio.StreamReader, headers: dict[str, str], timeout: float, size: int = STREAM_CHUNK
+) -> AsyncIterator[bytes]:
+    """Like :func:`read_body`, but yields the body in pieces of at most ``size`` bytes as they arrive."""
+
+    async def pieces(remaining: int) -> AsyncIterator[bytes]:
+        while remaining:
+            piece = await asyncio.wait_for(reader.read(min(size, remaining)), timeout)
+            if not piece:
+                raise HttpError(f"connection closed with {remaining} body bytes missing")
+            remaining -= len(piece)
+            yield piece
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size_line = await asyncio.wait_for(reader.readline(), timeout)
+            try:
+                remaining = int(size_line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise HttpError(f"bad chunk size {size_line!r}")
+            if remaining == 0:
+                return
+            async for piece in pieces(remaining):
+                yield piece
+            await asyncio.wait_for(reader.readexactly(2), timeout)
+    elif "content-length" in headers:
+        async for piece in pieces(int(headers["content-length"])):
+            yield piece
+    else:
+        while piece := await asyncio.wait_for(reader.read(size), timeout):
+            yield piece
+
+
+async def _decoded(chunks: AsyncIterator[bytes], headers: dict[str, str]) -> AsyncIterator[bytes]:
+    """``chunks`` with any gzip/deflate content encoding removed incrementally."""
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding not in ("gzip", "deflate"):
+        async for chunk in chunks:
+            yield chunk
+        return
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS)
+    try:
+        async for chunk in chunks:
+            yield decoder.decompress(chunk)
+        yield decoder.flush()
+    except zlib.error as exc:
+        raise HttpError(f"bad {encoding} body: {exc}") from exc
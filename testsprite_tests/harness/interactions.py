@@ -0,0 +1,354 @@
+"""Interaction latency for the write flows: click to paint, long tasks, server actions.
+
+TC020, TC021 and TC022 log in through ``/login`` (the ``login`` server
+action) and go on to the review form and the dashboard's review list, but
+none of them measures how long the user waits after a click. With an :class:`InteractionProfiler`, every locator action a script
+performs (click, fill, press, ...) becomes a measured interaction:
+
+``next_paint_ms``
+    the Event Timing ``duration`` of the interaction's events: input delay,
+    handlers and the next paint, as INP measures it. Chromium only reports
+    events of at least 16 ms, so quicker interactions are recorded as 16.
+``ui_update_ms``
+    from the action to the last DOM mutation once the server round trips
+    it caused have finished; for an action that navigates, to the new
+    document's first contentful paint.
+``long_task_ms`` / ``blocking_ms``
+    main-thread tasks over 50 ms during the interaction, and their time
+    beyond 50 ms (what TBT counts).
+``round_trip_ms`` / ``server_ms``
+    the slowest server-action (``Next-Action``) or RSC request the action
+    triggered, end to end, and the time to its first byte, i.e. the server
+    part. ``client_ms`` is what remains of ``ui_update_ms``.
+
+Server actions are named from ``.next/server/server-reference-manifest.json``
+when the build records export names, else by their action id.
+
+``python -m harness interactions`` runs the flows ``--iterations`` times and
+reports p50/p95 per step and per flow. The report goes to
+``tmp/interactions/interactions-<stamp>.json``, and one line per flow is
+appended to ``tmp/interactions/history.jsonl``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from playwright.async_api import BrowserContext, Page, Request
+from playwright.async_api import Error as PlaywrightError
+
+from .config import REPO_ROOT, TMP_DIR, base_url, git_revision
+from .load import percentile
+from .results import utc_now
+
+INTERACTIONS_DIR = TMP_DIR / "interactions"
+HISTORY_PATH = INTERACTIONS_DIR / "history.jsonl"
+ACTION_MANIFEST_PATH = REPO_ROOT / ".next" / "server" / "server-reference-manifest.json"
+DEFAULT_FLOWS = ("TC020", "TC021", "TC022")
+EVENT_THRESHOLD_MS = 16.0
+LONG_TASK_MS = 50.0
+METRICS = ("next_paint_ms", "ui_update_ms", "long_task_ms", "blocking_ms", "round_trip_ms", "server_ms", "client_ms")
+
+# Installed before any page script: buffers Event Timing entries, long tasks
+# and the time of the latest DOM mutation for the probe to read back.
+INIT_SCRIPT = """(() => {
+    if (window.__harnessInteractions) return;
+    const state = window.__harnessInteractions = {events: [], longTasks: [], lastMutation: 0};
+    const observe = (type, options, record) => {
+        try {
+            new PerformanceObserver((list) => list.getEntries().forEach(record))
+                .observe({type, buffered: true, ...options});
+        } catch (error) {}
+    };
+    observe('event', {durationThreshold: 16}, (entry) => state.events.push({
+        name: entry.name, start: entry.startTime, duration: entry.duration,
+        processingStart: entry.processingStart, processingEnd: entry.processingEnd,
+    }));
+    observe('longtask', {}, (entry) => state.longTasks.push({start: entry.startTime, duration: entry.duration}));
+    const watch = () => new MutationObserver(() => { state.lastMutation = performance.now(); })
+        .observe(document, {subtree: true, childList: true, characterData: true, attributes: true});
+    if (document.documentElement) watch(); else document.addEventListener('DOMContentLoaded', watch);
+})()"""
+
+MARK_SCRIPT = "() => performance.timeOrigin + performance.now()"
+
+# Waits for a frame to be painted, then returns everything in epoch milliseconds.
+COLLECT_SCRIPT = """async () => {
+    await new Promise((resolve) => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+    const state = window.__harnessInteractions || {events: [], longTasks: [], lastMutation: 0};
+    const origin = performance.timeOrigin;
+    const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+    return {
+        origin,
+        now: origin + performance.now(),
+        fcp: fcp ? origin + fcp.startTime : null,
+        lastMutation: state.lastMutation ? origin + state.lastMutation : null,
+        events: state.events.map((entry) => ({...entry, start: origin + entry.start})),
+        longTasks: state.longTasks.map((entry) => ({...entry, start: origin + entry.start})),
+    };
+}"""
+
+
+def action_names(path: Path = ACTION_MANIFEST_PATH) -> dict[str, str]:
+    """``{action id: "file#export"}`` from the build's server-reference manifest, where it has names."""
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    names = {}
+    for runtime in ("node", "edge"):
+        for action_id, entry in (manifest.get(runtime) or {}).items():
+            if isinstance(entry, dict) and entry.get("exportedName"):
+                source = str(entry.get("filename", "")).rsplit("/", 1)[-1]
+                names[action_id] = f"{source}#{entry['exportedName']}" if source else entry["exportedName"]
+    return names
+
+
+@dataclass
+class RoundTrip:
+    page: Page
+    kind: str  # "action" or "rsc"
+    name: str
+    started: float
+    finished: float | None = None
+    ttfb_ms: float | None = None
+
+
+@dataclass
+class Interaction:
+    test_id: str
+    iteration: int
+    index: int
+    action: str
+    selector: str
+    navigated: bool = False
+    next_paint_ms: float | None = None
+    ui_update_ms: float | None = None
+    long_tasks: int = 0
+    long_task_ms: float = 0.0
+    blocking_ms: float = 0.0
+    round_trip_ms: float | None = None
+    server_ms: float | None = None
+    client_ms: float | None = None
+    server_calls: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.index:02d} {self.action} {self.selector}"
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        for name in METRICS:
+            if data[name] is not None:
+                data[name] = round(data[name], 1)
+        return data
+
+
+class InteractionProbe:
+    """Measures the interactions of one test; handed to its ``TestSession``."""
+
+    def __init__(self, profiler: "InteractionProfiler", test_id: str) -> None:
+        self.profiler = profiler
+        self.test_id = test_id
+        self._count = 0
+
+    @asynccontextmanager
+    async def measure(self, page: Page, action: str, selector: str | None) -> AsyncIterator[None]:
+        self._count += 1
+        interaction = Interaction(self.test_id, self.profiler.iteration, self._count, action, (selector or "")[:80])
+        try:
+            mark = await page.evaluate(MARK_SCRIPT)
+        except PlaywrightError:
+            mark = None
+        started = time.time()
+        yield
+        if mark is None:
+            return
+        await self.profiler.wait_round_trips(page, started)
+        try:
+            sample = await self._collect(page)
+        except PlaywrightError as exc:
+            lines = str(exc).strip().splitlines()
+            interaction.error = lines[0] if lines else type(exc).__name__
+        else:
+            self.profiler.fill(interaction, page, mark, started, sample)
+        self.profiler.interactions.append(interaction)
+
+    @staticmethod
+    async def _collect(page: Page) -> dict[str, Any]:
+        try:
+            return await page.evaluate(COLLECT_SCRIPT)
+        except PlaywrightError:
+            # The action navigated while the script ran; read the new document.
+            await page.wait_for_load_state("load")
+            return await page.evaluate(COLLECT_SCRIPT)
+
+
+class InteractionProfiler:
+    """Context hook that buffers timing entries in every page and tracks server round trips."""
+
+    name = "interactions"
+
+    def __init__(self, origin: str | None = None, settle_timeout_s: float = 15.0) -> None:
+        self.origin = (origin or base_url()).rstrip("/")
+        self.settle_timeout_s = settle_timeout_s
+        self.iteration = 1
+        self.interactions: list[Interaction] = []
+        self.names = action_names()
+        self._round_trips: dict[Request, RoundTrip] = {}
+
+    def probe(self, test_id: str) -> InteractionProbe:
+        return InteractionProbe(self, test_id)
+
+    def _on_request(self, request: Request) -> None:
+        if not request.url.startswith(self.origin):
+            return
+        headers = request.headers
+        action_id = headers.get("next-action")
+        if action_id:
+            kind, name = "action", self.names.get(action_id, action_id[:12])
+        elif headers.get("rsc"):
+            kind, name = "rsc", request.url[len(self.origin):].split("?", 1)[0] or "/"
+        else:
+            return
+        try:
+            page = request.frame.page
+        except PlaywrightError:
+            return
+        self._round_trips[request] = RoundTrip(page, kind, name, time.time())
+
+    def _on_done(self, request: Request) -> None:
+        trip = self._round_trips.get(request)
+        if trip is None:
+            return
+        trip.finished = time.time()
+        timing = request.timing
+        if timing.get("responseStart", -1) >= 0 and timing.get("requestStart", -1) >= 0:
+            trip.ttfb_ms = timing["responseStart"] - timing["requestStart"]
+        if timing.get("startTime", -1) > 0 and timing.get("responseEnd", -1) >= 0:
+            # Both ends from the browser's clock, so the round trip excludes event-delivery lag.
+            trip.started = timing["startTime"] / 1000
+            trip.finished = (timing["startTime"] + timing["responseEnd"]) / 1000
+
+    async def attach(self, context: BrowserContext) -> None:
+        await context.add_init_script(script=INIT_SCRIPT)
+        context.on("request", self._on_request)
+        context.on("requestfinished", self._on_done)
+        context.on("requestfailed", self._on_done)
+
+    def _trips(self, page: Page, since: float) -> list[RoundTrip]:
+        return [trip for trip in self._round_trips.values() if trip.page == page and trip.started >= since]
+
+    async def wait_round_trips(self, page: Page, since: float) -> None:
+        """Until the server requests the interaction started have all finished, or the settle timeout."""
+        deadline = time.monotonic() + self.settle_timeout_s
+        while any(trip.finished is None for trip in self._trips(page, since)) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    def fill(self, interaction: Interaction, page: Page, mark: float, started: float, sample: dict[str, Any]) -> None:
+        interaction.navigated = sample["origin"] > mark
+        events = [event for event in sample["events"] if event["start"] >= mark - 1]
+        if events:
+            interaction.next_paint_ms = max(event["duration"] for event in events)
+        elif not interaction.navigated:
+            interaction.next_paint_ms = EVENT_THRESHOLD_MS
+        if interaction.navigated:
+            if sample["fcp"]:
+                interaction.ui_update_ms = sample["fcp"] - mark
+        elif sample["lastMutation"] and sample["lastMutation"] >= mark:
+            interaction.ui_update_ms = sample["lastMutation"] - mark
+        tasks = [task for task in sample["longTasks"] if task["start"] + task["duration"] >= mark]
+        interaction.long_tasks = len(tasks)
+        interaction.long_task_ms = sum(task["duration"] for task in tasks)
+        interaction.blocking_ms = sum(max(0.0, task["duration"] - LONG_TASK_MS) for task in tasks)
+        trips = [trip for trip in self._trips(page, started) if trip.finished is not None]
+        if trips:
+            slowest = max(trips, key=lambda trip: trip.finished - trip.started)
+            interaction.round_trip_ms = (slowest.finished - slowest.started) * 1000
+            interaction.server_ms = slowest.ttfb_ms
+            interaction.server_calls = [f"{trip.kind}:{trip.name}" for trip in trips]
+            if interaction.ui_update_ms is not None:
+                interaction.client_ms = max(0.0, interaction.ui_update_ms - interaction.round_trip_ms)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "interactions": len(self.interactions),
+            "with_server_round_trip": sum(interaction.round_trip_ms is not None for interaction in self.interactions),
+            "errors": sum(interaction.error is not None for interaction in self.interactions),
+        }
+
+    def report(self, iterations: int) -> dict[str, Any]:
+        flows: dict[str, dict[str, list[Interaction]]] = defaultdict(lambda: defaultdict(list))
+        for interaction in self.interactions:
+            if interaction.error is None:
+                flows[interaction.test_id][interaction.key].append(interaction)
+        return {
+            "started_at": utc_now(),
+            "revision": git_revision(),
+            "origin": self.origin,
+            "iterations": iterations,
+            "flows": {test_id: _flow_summary(steps) for test_id, steps in sorted(flows.items())},
+            "interactions": [interaction.to_dict() for interaction in self.interactions],
+        }
+
+
+def _percentiles(values: list[float]) -> dict[str, float | None]:
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+
+
+def _values(samples: list[Interaction], metric: str) -> list[float]:
+    return [value for value in (getattr(sample, metric) for sample in samples) if value is not None]
+
+
+def _flow_summary(steps: dict[str, list[Interaction]]) -> dict[str, Any]:
+    per_iteration: dict[int, list[Interaction]] = defaultdict(list)
+    for samples in steps.values():
+        for interaction in samples:
+            per_iteration[interaction.iteration].append(interaction)
+    # INP is the worst interaction of a visit; here, of one pass through the flow.
+    worst = [
+        max(interaction.next_paint_ms or 0.0 for interaction in interactions)
+        for interactions in per_iteration.values()
+    ]
+    waited = [
+        sum(interaction.ui_update_ms or 0.0 for interaction in interactions) for interactions in per_iteration.values()
+    ]
+    return {
+        "inp_ms": _percentiles(worst),
+        "ui_wait_ms": _percentiles(waited),
+        "steps": {
+            key: {
+                "samples": len(samples),
+                "server_calls": sorted({call for interaction in samples for call in interaction.server_calls}),
+                **{metric: _percentiles(_values(samples, metric)) for metric in METRICS},
+            }
+            for key, samples in sorted(steps.items())
+        },
+    }
+
+
+def write_interactions(report: dict[str, Any], directory: Path = INTERACTIONS_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = report["started_at"].replace(":", "").replace("-", "").split(".")[0]
+    path = directory / f"interactions-{stamp}.json"
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    with (directory / HISTORY_PATH.name).open("a", encoding="utf-8") as out:
+        for test_id, flow in report["flows"].items():
+            line = {
+                "at": report["started_at"],
+                "revision": report["revision"],
+                "flow": test_id,
+                "iterations": report["iterations"],
+                "inp_ms": flow["inp_ms"],
+                "ui_wait_ms": flow["ui_wait_ms"],
+            }
+            out.write(json.dumps(line) + "\n")
+    return path
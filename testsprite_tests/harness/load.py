@@ -0,0 +1,227 @@
+"""Virtual-user load generator for the public browse and search routes.
+
+Each virtual user (VU) repeatedly picks a journey by weight and walks its
+steps, pausing a random think time between requests, until the test
+duration is up. VUs start evenly over the ramp-up period and share one
+keep-alive connection pool, the way a browser fleet behind a proxy would.
+Journeys mirror what TC010, TC011 and TC012 do in the browser:
+
+``browse``
+    ``/`` → ``/businesses?q=…`` → ``/businesses/[slug]``
+``city_search``
+    ``/businesses?q=…&city=…`` → ``/api/businesses/search?q=…&city=…``
+``api_search``
+    ``/api/businesses/search?q=…``
+``detail``
+    ``/businesses/[slug]``
+
+Latencies are grouped by route template so that all slugs and queries of
+one page count together. The search API is rate limited per client IP, so
+by default the limiter is part of what gets measured. With
+``distinct_ips`` each VU sends its own ``X-Forwarded-For`` address, which a
+local ``next start`` trusts. That sidesteps the limiter, so it is opt-in
+and meant only for servers we run ourselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlencode
+
+from .config import TMP_DIR, git_revision
+from .http import ConnectionPool, HttpError
+from .results import utc_now
+from .routes import route_samples
+
+LOAD_DIR = TMP_DIR / "load"
+SPREAD_IPS_HELP = "send each client its own X-Forwarded-For address, past the per-IP rate limit (own servers only)"
+SPREAD_IPS_NOTE = "note: X-Forwarded-For spread over 198.18.0.0/15; the per-IP rate limit is not being measured"
+
+QUERIES = ["boulangerie", "restaurant", "hotel", "banque", "pharmacie", "café", "garage", "clinique"]
+CITIES = ["Casablanca", "Rabat", "Marrakech", "Fès", "Tanger", "Agadir"]
+
+
+@dataclass(frozen=True)
+class Step:
+    endpoint: str  # route template used for grouping, e.g. "/businesses/[slug]"
+    path: Callable[[random.Random, dict[str, Any]], str]
+
+
+@dataclass(frozen=True)
+class Journey:
+    name: str
+    weight: int
+    steps: tuple[Step, ...]
+
+
+def _query(path: str, **params: str) -> str:
+    return f"{path}?{urlencode(params)}"
+
+
+def _slug(rng: random.Random, samples: dict[str, Any]) -> str:
+    return f"/businesses/{rng.choice(samples['slugs'])}"
+
+
+HOME = Step("/", lambda rng, samples: "/")
+LISTING = Step("/businesses", lambda rng, samples: _query("/businesses", q=rng.choice(QUERIES)))
+CITY_LISTING = Step(
+    "/businesses", lambda rng, samples: _query("/businesses", q=rng.choice(QUERIES), city=rng.choice(CITIES))
+)
+DETAIL = Step("/businesses/[slug]", _slug)
+API_SEARCH = Step(
+    "/api/businesses/search", lambda rng, samples: _query("/api/businesses/search", q=rng.choice(QUERIES))
+)
+API_CITY_SEARCH = Step(
+    "/api/businesses/search",
+    lambda rng, samples: _query("/api/businesses/search", q=rng.choice(QUERIES), city=rng.choice(CITIES)),
+)
+
+JOURNEYS = (
+    Journey("browse", 4, (HOME, LISTING, DETAIL)),
+    Journey("city_search", 3, (CITY_LISTING, API_CITY_SEARCH)),
+    Journey("api_search", 2, (API_SEARCH,)),
+    Journey("detail", 1, (DETAIL,)),
+)
+
+
+@dataclass
+class LoadProfile:
+    users: int = 10
+    duration_s: float = 60.0
+    ramp_up_s: float = 10.0
+    think_min_s: float = 1.0
+    think_max_s: float = 3.0
+    timeout_s: float = 30.0
+    seed: int | None = None
+    distinct_ips: bool = False
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    ttfb_ms: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+    bytes: int = 0
+
+    def record(self, status: int | str, total_ms: float | None = None, ttfb_ms: float | None = None, size: int = 0) -> None:
+        self.statuses[str(status)] += 1
+        if isinstance(status, str) or status >= 400:
+            self.errors += 1
+        if total_ms is not None:
+            self.latencies_ms.append(total_ms)
+            self.ttfb_ms.append(ttfb_ms or 0.0)
+        self.bytes += size
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses.values())
+
+    def summary(self, elapsed_s: float) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "throughput_rps": round(self.requests / elapsed_s, 2) if elapsed_s else 0.0,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "p50_ms": percentile(self.latencies_ms, 50),
+            "p95_ms": percentile(self.latencies_ms, 95),
+            "p99_ms": percentile(self.latencies_ms, 99),
+            "ttfb_p50_ms": percentile(self.ttfb_ms, 50),
+            "mean_bytes": round(self.bytes / len(self.latencies_ms)) if self.latencies_ms else 0,
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile, or None for no samples."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return round(ordered[int(rank) - 1], 1)
+
+
+def load_samples() -> dict[str, Any]:
+    """Slugs for detail pages: ``slugs`` in tmp/route_samples.json, else the single ``slug``."""
+    samples = route_samples()
+    slugs = samples.get("slugs") or [samples["slug"]]
+    return {**samples, "slugs": list(slugs)}
+
+
+class LoadTest:
+    def __init__(self, origin: str, profile: LoadProfile, journeys: tuple[Journey, ...] = JOURNEYS) -> None:
+        self.origin = origin
+        self.profile = profile
+        self.journeys = journeys
+        self.samples = load_samples()
+        self.stats: dict[str, EndpointStats] = {}
+        self.journey_counts: Counter = Counter()
+
+    def _stats(self, endpoint: str) -> EndpointStats:
+        return self.stats.setdefault(endpoint, EndpointStats())
+
+    async def _user(self, index: int, pool: ConnectionPool, deadline: float) -> None:
+        profile = self.profile
+        await asyncio.sleep(profile.ramp_up_s * index / max(1, profile.users))
+        rng = random.Random(None if profile.seed is None else profile.seed + index)
+        # 198.18.0.0/15 is reserved for benchmarking, so it never collides with a real client.
+        headers = {"x-forwarded-for": f"198.18.{index // 256}.{index % 256}"} if profile.distinct_ips else {}
+        weights = [journey.weight for journey in self.journeys]
+        while time.monotonic() < deadline:
+            journey = rng.choices(self.journeys, weights)[0]
+            self.journey_counts[journey.name] += 1
+            for step in journey.steps:
+                if time.monotonic() >= deadline:
+                    return
+                stats = self._stats(step.endpoint)
+                try:
+                    response = await pool.get(step.path(rng, self.samples), headers=headers)
+                except asyncio.TimeoutError:
+                    stats.record("timeout")
+                except (HttpError, OSError) as exc:
+                    stats.record(type(exc).__name__)
+                else:
+                    stats.record(response.status, response.total_ms, response.ttfb_ms, response.wire_bytes)
+                await asyncio.sleep(rng.uniform(profile.think_min_s, profile.think_max_s))
+
+    async def run(self) -> dict[str, Any]:
+        profile = self.profile
+        started_at = utc_now()
+        start = time.monotonic()
+        deadline = start + profile.ramp_up_s + profile.duration_s
+        async with ConnectionPool(self.origin, size=profile.users, timeout=profile.timeout_s) as pool:
+            await asyncio.gather(*(self._user(index, pool, deadline) for index in range(profile.users)))
+            connections = pool.stats.to_dict()
+        elapsed = time.monotonic() - start
+        total = EndpointStats()
+        for stats in self.stats.values():
+            total.latencies_ms += stats.latencies_ms
+            total.ttfb_ms += stats.ttfb_ms
+            total.statuses.update(stats.statuses)
+            total.errors += stats.errors
+            total.bytes += stats.bytes
+        return {
+            "started_at": started_at,
+            "revision": git_revision(),
+            "origin": self.origin,
+            "profile": vars(profile),
+            "elapsed_s": round(elapsed, 1),
+            "connections": connections,
+            "journeys": dict(self.journey_counts),
+            "total": total.summary(elapsed),
+            "endpoints": {endpoint: stats.summary(elapsed) for endpoint, stats in sorted(self.stats.items())},
+        }
+
+
+def write_load_report(report: dict[str, Any], directory: Path = LOAD_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = report["started_at"].replace(":", "").replace("-", "").split(".")[0]
+    path = directory / f"load-{stamp}.json"
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
@@ -0,0 +1,456 @@
+"""Network audit: every request of a run, grouped by page and Supabase resource.
+
+The business page and the dashboard query Supabase from both sides: server
+components and server actions through the Next server, client components
+straight from the browser. :class:`NetworkAudit` is a context hook that
+records every browser request (URL, type, status, timing, transferred
+bytes) and, when the run goes through the record/replay stand-in
+(``--server managed --supabase record|replay``), every call the Next server
+makes to Supabase. A server call is attributed to the page whose document,
+RSC or server-action request was in flight when it started; calls that
+overlap requests of several pages are reported as unattributed.
+
+Requests belong to a *visit*: one page from a document navigation or a
+client-side route change until the next. Per visit, Supabase calls are
+checked for
+
+``duplicate``
+    the same request (method, path, query, body, caller identity) sent
+    more than once,
+``n_plus_one``
+    ``n_plus_one_min`` or more requests with the same path, select and
+    filter columns but different filter values, which one ``in.(...)``
+    filter could answer,
+``waterfall``
+    ``waterfall_min`` or more calls of one side, each starting within
+    ``gap_ms`` of the previous one finishing: serial awaits that could run
+    in parallel or be batched,
+``select_star``
+    a ``select=*`` (or no ``select``) read whose response is at least
+    ``select_star_bytes`` large.
+
+The report, per route template with request counts and bytes, is written
+to ``tmp/network-audit/audit-<stamp>.json`` and every request to the
+matching ``requests-<stamp>.jsonl``; :func:`compare_audits` diffs two
+reports.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from playwright.async_api import BrowserContext, Page, Request
+
+from .config import TMP_DIR, base_url, git_revision
+from .results import utc_now
+from .routes import TemplateMatcher
+from .standin import ObservedCall, SupabaseStandIn, request_key, resource_of
+
+AUDIT_DIR = TMP_DIR / "network-audit"
+SUPABASE_PREFIXES = ("/rest/v1/", "/auth/v1/", "/storage/v1/", "/functions/v1/", "/realtime/v1/")
+# PostgREST parameters that shape the response rather than filter rows.
+SHAPE_PARAMS = frozenset({"select", "order", "limit", "offset", "on_conflict", "columns"})
+UNATTRIBUTED = "(unattributed)"
+
+
+def is_supabase(url: str, app_host: str) -> bool:
+    parts = urlsplit(url)
+    return parts.hostname != app_host and parts.path.startswith(SUPABASE_PREFIXES)
+
+
+def query_shape(method: str, url: str) -> str:
+    """Method, path and query with filter values blanked: ``GET /rest/v1/reviews?business_id=eq.?&select=*``."""
+    parts = urlsplit(url)
+    pairs = []
+    for name, value in sorted(parse_qsl(parts.query, keep_blank_values=True)):
+        if name not in SHAPE_PARAMS and "." in value and not value.startswith(("(", "not.(")):
+            value = value.split(".", 1)[0] + ".?"
+        pairs.append(f"{name}={value}")
+    return f"{method} {parts.path}" + ("?" + "&".join(pairs) if pairs else "")
+
+
+def selects_everything(method: str, url: str) -> bool:
+    parts = urlsplit(url)
+    if method != "GET" or not parts.path.startswith("/rest/v1/") or parts.path.startswith("/rest/v1/rpc/"):
+        return False
+    select = dict(parse_qsl(parts.query)).get("select")
+    return select is None or "*" in select.replace("count(*)", "")
+
+
+@dataclass
+class AuditedRequest:
+    visit: str
+    route: str
+    page: str
+    side: str  # "browser" or "server"
+    method: str
+    url: str
+    resource_type: str
+    status: int | str
+    started: float
+    finished: float
+    bytes: int = 0
+    # Supabase calls only: table, ``rpc:<name>`` or Auth/Storage endpoint, and the request identity.
+    resource: str | None = None
+    key: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.finished - self.started) * 1000
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["duration_ms"] = round(self.duration_ms, 1)
+        return data
+
+
+@dataclass
+class Visit:
+    id: str
+    route: str
+    page: str
+
+
+@dataclass
+class AuditThresholds:
+    n_plus_one_min: int = 3
+    waterfall_min: int = 3
+    gap_ms: float = 100.0
+    select_star_bytes: int = 10 * 1024
+
+
+@dataclass
+class _PageState:
+    index: int
+    navigations: int = 0
+    visit: Visit | None = None
+
+
+@dataclass
+class RouteStats:
+    visits: set[str] = field(default_factory=set)
+    requests: int = 0
+    bytes: int = 0
+    by_type: Counter = field(default_factory=Counter)
+    bytes_by_type: Counter = field(default_factory=Counter)
+    supabase: dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    findings: Counter = field(default_factory=Counter)
+
+    def add(self, request: AuditedRequest) -> None:
+        self.visits.add(request.visit)
+        self.requests += 1
+        self.bytes += request.bytes
+        kind = "supabase" if request.resource else request.resource_type
+        self.by_type[kind] += 1
+        self.bytes_by_type[kind] += request.bytes
+        if request.resource:
+            counts = self.supabase[request.resource]
+            counts[request.side] += 1
+            counts["bytes"] += request.bytes
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "visits": len(self.visits),
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "requests_per_visit": round(self.requests / len(self.visits), 1) if self.visits else 0.0,
+            "bytes_per_visit": round(self.bytes / len(self.visits)) if self.visits else 0,
+            "supabase_calls": sum(counts["browser"] + counts["server"] for counts in self.supabase.values()),
+            "by_type": {
+                kind: {"requests": count, "bytes": self.bytes_by_type[kind]}
+                for kind, count in self.by_type.most_common()
+            },
+            "supabase": {
+                resource: dict(counts)
+                for resource, counts in sorted(self.supabase.items(), key=lambda item: -item[1]["bytes"])
+            },
+            "findings": dict(sorted(self.findings.items())),
+        }
+
+
+def find_issues(calls: list[AuditedRequest], thresholds: AuditThresholds) -> list[dict[str, Any]]:
+    """Duplicate, N+1, waterfall and ``select=*`` findings among one visit's Supabase calls."""
+    if not calls:
+        return []
+    first = calls[0]
+    base = {"route": first.route, "page": first.page, "visit": first.visit}
+    findings = []
+    by_key: dict[str, list[AuditedRequest]] = defaultdict(list)
+    by_shape: dict[tuple[str, str], list[AuditedRequest]] = defaultdict(list)
+    for call in calls:
+        by_key[call.key or call.url].append(call)
+        if call.method == "GET" and urlsplit(call.url).path.startswith("/rest/v1/"):
+            by_shape[(call.side, query_shape(call.method, call.url))].append(call)
+    for repeated in by_key.values():
+        if len(repeated) > 1:
+            findings.append({
+                **base,
+                "kind": "duplicate",
+                "resource": repeated[0].resource,
+                "sides": sorted({call.side for call in repeated}),
+                "count": len(repeated),
+                "wasted_bytes": sum(call.bytes for call in repeated[1:]),
+                "url": repeated[0].url,
+            })
+    for (side, shape), similar in by_shape.items():
+        distinct = {call.key for call in similar}
+        if len(distinct) >= thresholds.n_plus_one_min:
+            findings.append({
+                **base,
+                "kind": "n_plus_one",
+                "resource": similar[0].resource,
+                "sides": [side],
+                "count": len(distinct),
+                "bytes": sum(call.bytes for call in similar),
+                "shape": shape,
+            })
+    for side in ("browser", "server"):
+        chain = _longest_chain([call for call in calls if call.side == side], thresholds.gap_ms / 1000)
+        if len(chain) >= thresholds.waterfall_min:
+            findings.append({
+                **base,
+                "kind": "waterfall",
+                "resource": chain[0].resource,
+                "sides": [side],
+                "count": len(chain),
+                "span_ms": round((chain[-1].finished - chain[0].started) * 1000, 1),
+                "longest_call_ms": round(max(call.duration_ms for call in chain), 1),
+                "chain": [f"{call.method} {call.resource}" for call in chain],
+            })
+    for call in (repeated[0] for repeated in by_key.values()):
+        if selects_everything(call.method, call.url) and call.bytes >= thresholds.select_star_bytes:
+            findings.append({
+                **base,
+                "kind": "select_star",
+                "resource": call.resource,
+                "sides": [call.side],
+                "count": 1,
+                "bytes": call.bytes,
+                "url": call.url,
+            })
+    return findings
+
+
+def _longest_chain(calls: list[AuditedRequest], gap_s: float) -> list[AuditedRequest]:
+    """Longest sequence of calls where each starts after, and within ``gap_s`` of, the previous one's end."""
+    calls = sorted(calls, key=lambda call: call.started)
+    best: list[list[AuditedRequest]] = []
+    for index, call in enumerate(calls):
+        chain = [call]
+        for previous in range(index):
+            candidate = best[previous]
+            idle = call.started - candidate[-1].finished
+            if 0 <= idle <= gap_s and len(candidate) + 1 > len(chain):
+                chain = candidate + [call]
+        best.append(chain)
+    return max(best, key=len, default=[])
+
+
+class NetworkAudit:
+    """Context hook that records every request and, with a stand-in, the server's Supabase calls."""
+
+    name = "network_audit"
+
+    def __init__(
+        self,
+        standin: SupabaseStandIn | None = None,
+        origin: str | None = None,
+        thresholds: AuditThresholds | None = None,
+        directory: Path = AUDIT_DIR,
+        matcher: TemplateMatcher | None = None,
+    ) -> None:
+        self.thresholds = thresholds or AuditThresholds()
+        self.directory = directory
+        self.matcher = matcher or TemplateMatcher()
+        self.started_at = utc_now()
+        self._app_host = urlsplit(origin or base_url()).hostname or "localhost"
+        self._pages: dict[Page, _PageState] = {}
+        self._pending: dict[Request, tuple[float, Visit]] = {}
+        self.requests: list[AuditedRequest] = []
+        # (started, finished, visit) of app requests a server call can belong to.
+        self._windows: list[tuple[float, float, Visit]] = []
+        self._server_calls: list[ObservedCall] = []
+        self._lock = threading.Lock()
+        self.server_calls_captured = standin is not None
+        if standin is not None:
+            standin.observers.append(self._observe)
+
+    def _observe(self, call: ObservedCall) -> None:
+        if not call.from_browser:
+            with self._lock:
+                self._server_calls.append(call)
+
+    def _visit(self, request: Request) -> Visit:
+        try:
+            frame = request.frame
+            page = frame.page
+        except Exception:  # service-worker requests have no frame
+            return Visit("worker", "(worker)", "")
+        state = self._pages.setdefault(page, _PageState(len(self._pages) + 1))
+        main_frame = frame == page.main_frame
+        if main_frame and request.is_navigation_request():
+            state.navigations += 1
+            path = urlsplit(request.url).path or "/"
+        elif main_frame and request.headers.get("rsc") and not request.headers.get("next-action"):
+            # A client-side route change fetches the next page's payload before the URL changes.
+            path = urlsplit(request.url).path or "/"
+        else:
+            path = urlsplit(page.url).path or "/"
+        if state.visit is None or state.visit.page != path or request.is_navigation_request() and main_frame:
+            state.visit = Visit(f"p{state.index}.{state.navigations}:{path}", self.matcher.match(path), path)
+        return state.visit
+
+    def _on_request(self, request: Request) -> None:
+        self._pending[request] = (time.time(), self._visit(request))
+
+    async def _on_finished(self, request: Request) -> None:
+        await self._record(request, failed=False)
+
+    async def _on_failed(self, request: Request) -> None:
+        await self._record(request, failed=True)
+
+    async def _record(self, request: Request, failed: bool) -> None:
+        started, visit = self._pending.pop(request, (time.time(), Visit("unknown", UNATTRIBUTED, "")))
+        finished = time.time()
+        timing = request.timing
+        if timing.get("startTime", -1) > 0 and timing.get("responseEnd", -1) >= 0:
+            started = timing["startTime"] / 1000
+            finished = started + timing["responseEnd"] / 1000
+        status: int | str = "failed"
+        size = 0
+        if not failed:
+            try:
+                sizes = await request.sizes()
+                size = sizes["responseBodySize"] + sizes["responseHeadersSize"]
+                response = await request.response()
+                status = response.status if response else "failed"
+            except Exception:  # the context closed first
+                status = "unknown"
+        supabase = is_supabase(request.url, self._app_host)
+        entry = AuditedRequest(
+            visit.id, visit.route, visit.page, "browser", request.method, request.url, request.resource_type,
+            status, started, finished, size,
+        )
+        if supabase:
+            path = urlsplit(request.url).path
+            entry.resource = resource_of(path)
+            entry.key = request_key(request.method, request.url, request.headers, request.post_data_buffer or b"")
+        elif urlsplit(request.url).hostname == self._app_host and request.resource_type in ("document", "fetch", "xhr"):
+            self._windows.append((started, finished, visit))
+        self.requests.append(entry)
+
+    async def attach(self, context: BrowserContext) -> None:
+        context.on("request", self._on_request)
+        context.on("requestfinished", self._on_finished)
+        context.on("requestfailed", self._on_failed)
+
+    def _server_requests(self) -> tuple[list[AuditedRequest], int]:
+        with self._lock:
+            calls = list(self._server_calls)
+        attributed, ambiguous = [], 0
+        for call in calls:
+            owners = {
+                visit.id: visit for started, finished, visit in self._windows if started <= call.started <= finished
+            }
+            if len(owners) == 1:
+                visit = next(iter(owners.values()))
+            else:
+                ambiguous += len(owners) > 1
+                visit = Visit(UNATTRIBUTED, UNATTRIBUTED, "")
+            attributed.append(AuditedRequest(
+                visit.id, visit.route, visit.page, "server", call.method, call.target, "supabase", call.status,
+                call.started, call.finished, call.response_bytes, resource_of(urlsplit(call.target).path), call.key,
+            ))
+        return attributed, ambiguous
+
+    def report(self) -> dict[str, Any]:
+        server, ambiguous = self._server_requests()
+        requests = sorted(self.requests + server, key=lambda request: request.started)
+        routes: dict[str, RouteStats] = defaultdict(RouteStats)
+        calls_by_visit: dict[str, list[AuditedRequest]] = defaultdict(list)
+        for request in requests:
+            routes[request.route].add(request)
+            if request.resource and request.visit != UNATTRIBUTED:
+                calls_by_visit[request.visit].append(request)
+        findings = []
+        for calls in calls_by_visit.values():
+            for finding in find_issues(calls, self.thresholds):
+                routes[finding["route"]].findings[finding["kind"]] += 1
+                findings.append(finding)
+        supabase = [request for request in requests if request.resource]
+        return {
+            "started_at": self.started_at,
+            "revision": git_revision(),
+            "server_calls_captured": self.server_calls_captured,
+            "ambiguous_server_calls": ambiguous,
+            "thresholds": asdict(self.thresholds),
+            "totals": {
+                "requests": len(requests),
+                "bytes": sum(request.bytes for request in requests),
+                "supabase_browser": sum(request.side == "browser" for request in supabase),
+                "supabase_server": sum(request.side == "server" for request in supabase),
+                "supabase_bytes": sum(request.bytes for request in supabase),
+                "findings": dict(Counter(finding["kind"] for finding in findings)),
+            },
+            "routes": {
+                route: stats.summary()
+                for route, stats in sorted(routes.items(), key=lambda item: -item[1].summary()["supabase_calls"])
+            },
+            "findings": sorted(findings, key=lambda finding: (finding["route"], finding["kind"], -finding["count"])),
+            "_requests": requests,
+        }
+
+    def summary(self) -> dict[str, Any]:
+        report = self.report()
+        requests = report.pop("_requests")
+        report_path, requests_path = audit_paths(self.started_at, self.directory)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with requests_path.open("w", encoding="utf-8") as out:
+            for request in requests:
+                out.write(json.dumps(request.to_dict(), ensure_ascii=False) + "\n")
+        report["requests_file"] = str(requests_path)
+        report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        totals = report["totals"]
+        return {
+            "requests": totals["requests"],
+            "bytes": totals["bytes"],
+            "supabase_browser": totals["supabase_browser"],
+            "supabase_server": totals["supabase_server"] if self.server_calls_captured else "not captured",
+            "findings": sum(totals["findings"].values()),
+            "report": str(report_path),
+        }
+
+
+def audit_paths(started_at: str, directory: Path = AUDIT_DIR) -> tuple[Path, Path]:
+    """``(report .json, requests .jsonl)`` for an audit started at ``started_at``."""
+    stamp = started_at.replace(":", "").replace("-", "").split(".")[0]
+    return directory / f"audit-{stamp}.json", directory / f"requests-{stamp}.jsonl"
+
+
+def audit_reports(directory: Path = AUDIT_DIR) -> list[Path]:
+    """Saved reports, oldest first."""
+    return sorted(directory.glob("audit-*.json"))
+
+
+def load_audit(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare_audits(before: dict[str, Any], after: dict[str, Any]) -> list[dict[str, Any]]:
+    """Per route: requests, bytes, Supabase calls and findings in both reports."""
+    rows = []
+    for route in sorted(before["routes"].keys() | after["routes"].keys()):
+        old, new = before["routes"].get(route, {}), after["routes"].get(route, {})
+        row: dict[str, Any] = {"route": route}
+        for key in ("requests_per_visit", "bytes_per_visit", "supabase_calls"):
+            row[key] = (old.get(key), new.get(key))
+        row["findings"] = (sum(old.get("findings", {}).values()), sum(new.get("findings", {}).values()))
+        rows.append(row)
+    return rows
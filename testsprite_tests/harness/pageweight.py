@@ -0,0 +1,350 @@
+"""Page weight and image audit of the public routes, per viewport.
+
+Business pages show media from Supabase Storage, ``public/placeholders``
+and ``map-morocco.png``. Listings add the remote placeholders from
+``src/lib/placeholder-images.json``. Oversized images are the usual reason
+for a slow mobile LCP. :func:`audit_page_weight` loads each public route
+in a fresh context at every viewport in :data:`VIEWPORTS`, with service
+workers blocked so that every byte comes from the network.
+
+The initial load is taken once the page is quiet. Then the page is
+scrolled to the bottom so lazy images load too. Every response is
+recorded with its transferred size (body plus headers, Supabase and other
+origins included). Every ``<img>`` is matched to its response. Per image:
+
+- bytes and format,
+- intrinsic size against rendered size times the device pixel ratio,
+- ``loading`` and ``fetchpriority``,
+- whether it went through ``next/image``: ``optimized`` for
+  ``/_next/image`` URLs, ``unoptimized`` for ``data-nimg`` images served
+  as is, ``no`` for plain tags and CSS backgrounds.
+
+*Wasted bytes* estimate what a better image would save:
+
+- the share of pixels beyond what the rendered box needs;
+- :data:`LEGACY_FORMAT_SAVINGS` of what is left for JPEG, PNG and GIF;
+- all of it when the image loads eagerly below the fold, or loads and is
+  not displayed.
+
+Offenders are ranked by wasted bytes across routes and viewports.
+
+``page_weight_bytes`` (the initial load), ``image_bytes`` and
+``font_bytes`` are checked against ``perf_budgets.json``. An optional
+``viewports`` block there, e.g. ``{"mobile": {"page_weight_bytes": ...}}``,
+sits between ``default`` and ``routes``. Reports go to
+``tmp/perf/page-weight/page-weight-<stamp>.json``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import Browser, Request, async_playwright
+from playwright.async_api import Error as PlaywrightError
+
+from .config import BROWSER_ARGS, base_url, git_revision
+from .devices import DEVICES
+from .results import utc_now
+from .routes import AppRoute, route_samples
+from .vitals import PERF_DIR, check_budget, load_budgets
+from .waits import WaitPolicy, Waiter, WaitTimeout
+
+PAGE_WEIGHT_DIR = PERF_DIR / "page-weight"
+# Same screens as the ``mid-4g`` and ``desktop`` device profiles, without throttling.
+VIEWPORTS: dict[str, dict[str, Any]] = {
+    "mobile": DEVICES["mid-4g"].context,
+    "desktop": DEVICES["desktop"].context,
+}
+WEIGHT_METRICS = ("page_weight_bytes", "image_bytes", "font_bytes")
+LEGACY_FORMATS = frozenset({"jpeg", "png", "gif"})
+VECTOR_FORMATS = frozenset({"svg"})
+# Rough share a WebP/AVIF re-encode saves on a legacy-format image.
+LEGACY_FORMAT_SAVINGS = 0.25
+# Images saving less than this are not worth a finding (same floor as Lighthouse).
+MIN_WASTE_BYTES = 4096
+_FORMATS = {"jpg": "jpeg", "svg+xml": "svg", "x-icon": "ico", "vnd.microsoft.icon": "ico", "font-woff2": "woff2"}
+
+IMAGES_SCRIPT = """() => ({
+    dpr: window.devicePixelRatio,
+    fold: window.innerHeight,
+    images: Array.from(document.images).map((img) => {
+        const rect = img.getBoundingClientRect();
+        const style = getComputedStyle(img);
+        return {
+            src: img.currentSrc || img.src,
+            natural_width: img.naturalWidth,
+            natural_height: img.naturalHeight,
+            rendered_width: Math.round(rect.width),
+            rendered_height: Math.round(rect.height),
+            top: Math.round(rect.top + window.scrollY),
+            loading: img.getAttribute('loading') || 'auto',
+            fetchpriority: img.getAttribute('fetchpriority') || 'auto',
+            nimg: img.getAttribute('data-nimg'),
+            displayed: rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none',
+        };
+    }),
+})"""
+
+SCROLL_SCRIPT = """async () => {
+    const pause = () => new Promise((resolve) => setTimeout(resolve, 150));
+    for (let step = 0; step < 60; step++) {
+        const bottom = window.scrollY + window.innerHeight >= document.documentElement.scrollHeight - 1;
+        if (bottom) break;
+        window.scrollBy(0, window.innerHeight);
+        await pause();
+    }
+    window.scrollTo(0, 0);
+}"""
+
+
+@dataclass
+class Resource:
+    url: str
+    resource_type: str
+    content_type: str
+    bytes: int
+    # "initial" before the scroll started, "scroll" after.
+    phase: str
+
+
+@dataclass
+class ImageEntry:
+    url: str
+    bytes: int
+    format: str
+    phase: str
+    next_image: str
+    natural: tuple[int, int] | None = None
+    rendered: tuple[int, int] | None = None
+    loading: str = ""
+    fetchpriority: str = ""
+    above_fold: bool | None = None
+    wasted_bytes: int = 0
+    reasons: list[str] = field(default_factory=list)
+
+
+@dataclass
+class FontEntry:
+    url: str
+    bytes: int
+    format: str
+    phase: str
+
+
+@dataclass
+class PageWeight:
+    route: str
+    viewport: str
+    url: str
+    status: int | None = None
+    weight: dict[str, int] = field(default_factory=dict)
+    by_type: dict[str, int] = field(default_factory=dict)
+    images: list[ImageEntry] = field(default_factory=list)
+    fonts: list[FontEntry] = field(default_factory=list)
+    violations: list[str] = field(default_factory=list)
+    skipped: str | None = None
+    # Set when the load failed (timeout, navigation error); the audit moves on.
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def resource_format(url: str, content_type: str) -> str:
+    mime = content_type.split(";", 1)[0].strip().lower()
+    if "/" in mime and mime.split("/", 1)[0] in ("image", "font", "application"):
+        subtype = mime.split("/", 1)[1]
+        if subtype not in ("octet-stream", "x-unknown"):
+            return _FORMATS.get(subtype, subtype)
+    suffix = urlsplit(url).path.rsplit(".", 1)[-1].lower() if "." in urlsplit(url).path else ""
+    return _FORMATS.get(suffix, suffix or "unknown")
+
+
+def next_image_mode(url: str, nimg: str | None) -> str:
+    if urlsplit(url).path.startswith("/_next/image"):
+        return "optimized"
+    return "unoptimized" if nimg else "no"
+
+
+def estimate_waste(image: ImageEntry, dpr: float, displayed: bool) -> None:
+    """Fill ``wasted_bytes`` and ``reasons`` of ``image``."""
+    keep = 1.0
+    if image.phase == "initial" and image.above_fold is False and image.loading != "lazy":
+        image.reasons.append("below the fold but loaded eagerly")
+        keep = 0.0
+    elif image.rendered is not None and not displayed:
+        image.reasons.append("loaded but not displayed")
+        keep = 0.0
+    elif image.format not in VECTOR_FORMATS and image.natural and image.rendered and all(image.rendered):
+        (natural_width, natural_height), (width, height) = image.natural, image.rendered
+        needed = width * dpr * height * dpr
+        if natural_width * natural_height > needed:
+            keep = needed / (natural_width * natural_height)
+            image.reasons.append(f"{natural_width}x{natural_height} shown at {width}x{height} @{dpr:g}x")
+    if keep and image.format in LEGACY_FORMATS:
+        keep *= 1 - LEGACY_FORMAT_SAVINGS
+        image.reasons.append(f"{image.format}, not WebP/AVIF")
+    image.wasted_bytes = round(image.bytes * (1 - keep))
+    if image.wasted_bytes < MIN_WASTE_BYTES:
+        image.wasted_bytes, image.reasons = 0, []
+
+
+def weight_budget(budgets: dict[str, Any], route: str, viewport: str) -> dict[str, float]:
+    budget = {
+        **budgets.get("default", {}),
+        **budgets.get("viewports", {}).get(viewport, {}),
+        **budgets.get("routes", {}).get(route, {}),
+    }
+    return {metric: limit for metric, limit in budget.items() if metric in WEIGHT_METRICS}
+
+
+def build_entries(result: PageWeight, resources: list[Resource], dom: dict[str, Any]) -> None:
+    """Images, fonts and totals of ``result`` from the recorded responses and the page's ``<img>`` tags."""
+    by_type: dict[str, int] = defaultdict(int)
+    for resource in resources:
+        by_type[resource.resource_type] += resource.bytes
+    result.by_type = dict(sorted(by_type.items(), key=lambda item: -item[1]))
+    initial = [resource for resource in resources if resource.phase == "initial"]
+    result.weight = {
+        "page_weight_bytes": sum(resource.bytes for resource in initial),
+        "image_bytes": sum(resource.bytes for resource in initial if resource.resource_type == "image"),
+        "font_bytes": sum(resource.bytes for resource in initial if resource.resource_type == "font"),
+        "requests": len(initial),
+        "after_scroll_bytes": sum(resource.bytes for resource in resources),
+    }
+    tags: dict[str, dict[str, Any]] = {}
+    for tag in dom["images"]:
+        # The same URL can appear several times; the largest box decides what it needs.
+        known = tags.get(tag["src"])
+        area = tag["rendered_width"] * tag["rendered_height"]
+        if known is None or area > known["rendered_width"] * known["rendered_height"]:
+            tags[tag["src"]] = tag
+    seen = set()
+    for resource in resources:
+        if resource.url in seen or resource.resource_type not in ("image", "font"):
+            continue
+        seen.add(resource.url)
+        kind = resource_format(resource.url, resource.content_type)
+        if resource.resource_type == "font":
+            result.fonts.append(FontEntry(resource.url, resource.bytes, kind, resource.phase))
+            continue
+        tag = tags.get(resource.url)
+        image = ImageEntry(resource.url, resource.bytes, kind, resource.phase, next_image_mode(resource.url, None))
+        if tag:
+            image.next_image = next_image_mode(resource.url, tag["nimg"])
+            image.natural = (tag["natural_width"], tag["natural_height"])
+            image.rendered = (tag["rendered_width"], tag["rendered_height"])
+            image.loading, image.fetchpriority = tag["loading"], tag["fetchpriority"]
+            image.above_fold = tag["top"] < dom["fold"]
+        estimate_waste(image, dom["dpr"], bool(tag and tag["displayed"]))
+        result.images.append(image)
+    result.images.sort(key=lambda image: (-image.wasted_bytes, -image.bytes))
+
+
+async def measure(browser: Browser, result: PageWeight, timeout_ms: float = 20_000) -> None:
+    """Load ``result.url`` at ``result.viewport`` in a fresh context and fill in the audit."""
+    context = await browser.new_context(**VIEWPORTS[result.viewport], service_workers="block")
+    phase = "initial"
+    phases: dict[Request, str] = {}
+    resources: list[Resource] = []
+    pending: list[asyncio.Future] = []
+
+    async def record(request: Request) -> None:
+        try:
+            response = await request.response()
+            sizes = await request.sizes()
+        except Exception:  # the context closed first
+            return
+        if response is None or request.url.startswith("data:"):
+            return
+        resources.append(Resource(
+            request.url, request.resource_type, response.headers.get("content-type", ""),
+            sizes["responseBodySize"] + sizes["responseHeadersSize"], phases.pop(request, phase),
+        ))
+
+    context.on("request", lambda request: phases.__setitem__(request, phase))
+    context.on("requestfinished", lambda request: pending.append(asyncio.ensure_future(record(request))))
+    try:
+        page = await context.new_page()
+        waiter = Waiter(WaitPolicy(step_timeout_ms=timeout_ms))
+        waiter.track(page)
+        response = await page.goto(result.url, wait_until="load", timeout=60_000)
+        result.status = response.status if response else None
+        try:
+            await waiter.page_ready(page)
+        except WaitTimeout:
+            pass  # weigh what loaded; a busy network shows in the numbers
+        phase = "scroll"
+        await page.evaluate(SCROLL_SCRIPT)
+        try:
+            await waiter.page_ready(page)
+        except WaitTimeout:
+            pass
+        dom = await page.evaluate(IMAGES_SCRIPT)
+        await asyncio.gather(*pending)
+    finally:
+        await context.close()
+    build_entries(result, resources, dom)
+
+
+async def audit_page_weight(
+    routes: list[AppRoute], viewports: list[str] | None = None, budgets: dict[str, Any] | None = None
+) -> list[PageWeight]:
+    """Weigh each public route at each viewport, one load at a time."""
+    budgets = budgets if budgets is not None else load_budgets()
+    samples = route_samples()
+    origin = base_url()
+    audited = []
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True, args=BROWSER_ARGS)
+        try:
+            for route in routes:
+                path = route.concrete(samples)
+                for viewport in viewports or list(VIEWPORTS):
+                    result = PageWeight(route.path, viewport, f"{origin}{path}" if path else "")
+                    audited.append(result)
+                    if route.role:
+                        result.skipped = "needs a login"
+                        continue
+                    if path is None:
+                        result.skipped = "no sample value for a dynamic segment"
+                        continue
+                    try:
+                        await measure(browser, result)
+                    except PlaywrightError as exc:
+                        result.error = str(exc).splitlines()[0]
+                        continue
+                    result.violations = check_budget(result.weight, weight_budget(budgets, route.path, viewport))
+        finally:
+            await browser.close()
+    return audited
+
+
+def offenders(results: list[PageWeight], limit: int = 20) -> list[dict[str, Any]]:
+    """Images with wasted bytes, largest first, across routes and viewports."""
+    ranked = [
+        {"route": result.route, "viewport": result.viewport, **asdict(image)}
+        for result in results for image in result.images if image.wasted_bytes
+    ]
+    return sorted(ranked, key=lambda image: -image["wasted_bytes"])[:limit]
+
+
+def write_page_weight(results: list[PageWeight], directory: Path = PAGE_WEIGHT_DIR) -> Path:
+    started_at = utc_now()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = started_at.replace(":", "").replace("-", "").split(".")[0]
+    path = directory / f"page-weight-{stamp}.json"
+    payload = {
+        "recorded_at": started_at,
+        "revision": git_revision(),
+        "offenders": offenders(results, limit=50),
+        "routes": [result.to_dict() for result in results],
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    return path
@@ -0,0 +1,187 @@
+"""Run navigation prefixes shared by several TC scripts once, then fork.
+
+Most scripts open with the same steps: ``goto("/")``, ``goto("/login")``,
+often the same login form. :func:`compile_steps` reads those leading steps
+from a script's AST, :func:`plan_prefixes` finds the longest prefix each
+test shares with at least one other, and :class:`PrefixCache` executes each
+such prefix once in its own context and keeps a :class:`Checkpoint` of the
+result (storage state and URL).
+
+A dependent test is handed a :class:`PrefixReplay`. When the script
+performs its first prefix step, the replay restores the checkpoint into
+the test's context and navigates to the checkpoint URL; the remaining
+prefix steps are skipped as the script reaches them.
+
+Prefixes only end after a ``goto`` or a ``click``: typed-but-unsubmitted
+form values live in the DOM and cannot be restored from storage state.
+"""
+
+from __future__ import annotations
+
+import ast
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable
+
+from playwright.async_api import Page
+
+from .auth import apply_state
+from .discovery import TestCase
+
+_BOUNDARY_ACTIONS = frozenset({"goto", "click"})
+
+
+@dataclass(frozen=True)
+class Step:
+    action: str  # "goto", "fill" or "click"
+    target: str  # URL for goto, root selector otherwise
+    value: str | None = None
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    state: dict[str, Any]
+    url: str
+
+
+def constant_str(node: ast.AST) -> str | None:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+def locator_selector(node: ast.AST) -> str | None:
+    """Root selector of ``x.locator('...').nth(0)``-style chains."""
+    while isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        if node.func.attr == "locator" and node.args:
+            return constant_str(node.args[0])
+        node = node.func.value
+    return None
+
+
+def script_statements(case: TestCase) -> list[ast.stmt]:
+    """Top-level statements of the script's ``run_test``, with its ``try`` body inlined."""
+    tree = ast.parse(case.source(), filename=str(case.path))
+    function = next(
+        (node for node in tree.body if isinstance(node, ast.AsyncFunctionDef) and node.name == "run_test"), None
+    )
+    if function is None:
+        return []
+    statements = []
+    for node in function.body:
+        if isinstance(node, ast.Try):
+            statements.extend(node.body)
+        else:
+            statements.append(node)
+    return statements
+
+
+def compile_steps(case: TestCase) -> list[Step]:
+    """The script's leading goto/fill/click steps, up to its first assertion."""
+    steps: list[Step] = []
+    selectors: dict[str, str] = {}
+    for statement in script_statements(case):
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+            target = statement.targets[0]
+            selector = locator_selector(statement.value)
+            if isinstance(target, ast.Name) and selector is not None:
+                selectors[target.id] = selector
+            continue  # page/context/frame bookkeeping
+        if not isinstance(statement, ast.Expr):
+            break
+        call = statement.value.value if isinstance(statement.value, ast.Await) else statement.value
+        if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)):
+            break
+        method, owner = call.func.attr, call.func.value
+        if method in {"wait_for_timeout", "set_default_timeout", "set_default_navigation_timeout"}:
+            continue
+        if method == "goto" and call.args and constant_str(call.args[0]) is not None:
+            steps.append(Step("goto", constant_str(call.args[0])))
+        elif method in {"fill", "click"} and isinstance(owner, ast.Name) and owner.id in selectors:
+            value = constant_str(call.args[0]) if method == "fill" and call.args else None
+            steps.append(Step(method, selectors[owner.id], value))
+        else:
+            break  # first assertion or anything the planner does not understand
+    return steps
+
+
+def _boundaries(steps: list[Step]) -> Iterable[int]:
+    """Prefix lengths that end on a goto or click, longest first."""
+    return (length for length in range(len(steps), 0, -1) if steps[length - 1].action in _BOUNDARY_ACTIONS)
+
+
+def plan_prefixes(steps_by_test: dict[str, tuple[Any, list[Step]]]) -> dict[str, tuple[Any, tuple[Step, ...]]]:
+    """Longest shared checkpointable prefix per test id.
+
+    ``steps_by_test`` maps a test id to ``(group, steps)``; prefixes are only
+    shared between tests in the same group (for example, tests that may or
+    may not use cached logins). Tests sharing nothing are left out.
+    """
+    counts: Counter[tuple[Any, tuple[Step, ...]]] = Counter()
+    for group, steps in steps_by_test.values():
+        for length in _boundaries(steps):
+            counts[(group, tuple(steps[:length]))] += 1
+    plan = {}
+    for test_id, (group, steps) in steps_by_test.items():
+        for length in _boundaries(steps):
+            key = (group, tuple(steps[:length]))
+            if counts[key] > 1:
+                plan[test_id] = key
+                break
+    return plan
+
+
+class PrefixCache:
+    """Executes each shared prefix once and remembers its checkpoint.
+
+    ``run_prefix(group, steps)`` performs the steps in a fresh context and
+    returns the checkpoint, or raises; a failed prefix is cached as ``None``
+    so its dependents fall back to running every step themselves.
+    """
+
+    def __init__(self, run_prefix: Callable[[Any, tuple[Step, ...]], Awaitable[Checkpoint]]) -> None:
+        self._run_prefix = run_prefix
+        self._checkpoints: dict[Any, asyncio.Task[Checkpoint | None]] = {}
+
+    async def _capture(self, key: tuple[Any, tuple[Step, ...]]) -> Checkpoint | None:
+        group, steps = key
+        try:
+            return await self._run_prefix(group, steps)
+        except Exception:
+            return None
+
+    async def checkpoint(self, key: tuple[Any, tuple[Step, ...]]) -> Checkpoint | None:
+        task = self._checkpoints.get(key)
+        if task is None:
+            task = self._checkpoints[key] = asyncio.ensure_future(self._capture(key))
+        return await task
+
+
+class PrefixReplay:
+    """Skips one test's prefix steps after restoring the shared checkpoint."""
+
+    def __init__(self, cache: PrefixCache, key: tuple[Any, tuple[Step, ...]]) -> None:
+        self._cache = cache
+        self._key = key
+        self._steps = key[1]
+        self._position: int | None = 0
+
+    @property
+    def active(self) -> bool:
+        return self._position is not None and self._position < len(self._steps)
+
+    async def skip(self, page: Page, step: Step, navigate: Callable[[str], Awaitable[Any]]) -> bool:
+        """True if ``step`` is covered by the checkpoint and must not run."""
+        if not self.active:
+            return False
+        if self._steps[self._position] != step:
+            self._position = None  # the script diverged; stop fast-forwarding
+            return False
+        if self._position == 0:
+            checkpoint = await self._cache.checkpoint(self._key)
+            if checkpoint is None:
+                self._position = None
+                return False
+            await apply_state(page.context, checkpoint.state)
+            await navigate(checkpoint.url)
+        self._position += 1
+        return True
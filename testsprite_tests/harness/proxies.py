@@ -0,0 +1,271 @@
+"""Thin wrappers around the Playwright objects a TC script touches.
+
+The runner hands scripts a :class:`ContextProxy` instead of the real
+``BrowserContext``. Pages and locators reached through it are wrapped too,
+which is where the harness swaps fixed sleeps for condition waits and
+times every step. Anything a wrapper does not override is delegated to the
+real object, and :func:`unwrap` recovers it for APIs such as ``expect``
+that type-check their argument.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable
+
+from playwright.async_api import BrowserContext, Locator, Page
+from playwright.async_api import expect as playwright_expect
+
+from .auth import LoginShortcut
+from .config import rebase
+from .hooks import ContextHook
+from .interactions import InteractionProbe
+from .prefix import PrefixReplay, Step
+from .timing import StepRecorder
+from .waits import Waiter
+
+# Locator methods that return another locator and must stay wrapped.
+_CHAINING = frozenset({"nth", "locator", "filter", "get_by_text", "get_by_role", "get_by_label", "get_by_placeholder"})
+_CHAINING_PROPERTIES = frozenset({"first", "last"})
+# Locator actions that need an actionable target, and those that may submit.
+_ACTIONS = frozenset({"fill", "click", "dblclick", "type", "press", "check", "uncheck", "select_option", "set_input_files"})
+_SUBMITTING = frozenset({"click", "dblclick", "press"})
+
+
+class _Proxy:
+    def __init__(self, target: Any, session: "TestSession") -> None:
+        self._target = target
+        self._session = session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+    def __repr__(self) -> str:
+        return repr(self._target)
+
+
+def unwrap(value: Any) -> Any:
+    return value._target if isinstance(value, _Proxy) else value
+
+
+class LocatorProxy(_Proxy):
+    _target: Locator
+
+    def __init__(self, target: Locator, session: "TestSession", page: "PageProxy", selector: str) -> None:
+        super().__init__(target, session)
+        self._page = page
+        # Root selector passed to page.locator(); identifies the step.
+        self._selector = selector
+
+    def _wrap(self, locator: Locator) -> "LocatorProxy":
+        return LocatorProxy(locator, self._session, self._page, self._selector)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in _CHAINING_PROPERTIES:
+            return self._wrap(getattr(self._target, name))
+        attribute = getattr(self._target, name)
+        if name in _CHAINING:
+            return lambda *args, **kwargs: self._wrap(attribute(*args, **kwargs))
+        if name in _ACTIONS:
+            return lambda *args, **kwargs: self._session.act(self, name, args, kwargs)
+        return attribute
+
+
+class PageProxy(_Proxy):
+    _target: Page
+
+    def locator(self, selector: str, **kwargs: Any) -> LocatorProxy:
+        return LocatorProxy(self._target.locator(selector, **kwargs), self._session, self, selector)
+
+    async def goto(self, url: str, **kwargs: Any) -> Any:
+        return await self._session.goto(self, url, kwargs)
+
+    async def wait_for_timeout(self, timeout: float) -> None:
+        await self._session.pause(self, timeout)
+
+
+class ContextProxy(_Proxy):
+    _target: BrowserContext
+
+    def __init__(self, target: BrowserContext, session: "TestSession", hooks: list[ContextHook]) -> None:
+        super().__init__(target, session)
+        # Hooks whose optional ``prepare``/``detach`` see pages and the context before the script or after it.
+        self._hooks = hooks
+
+    @property
+    def pages(self) -> list[PageProxy]:
+        return [self._session.wrap_page(page) for page in self._target.pages]
+
+    async def new_page(self) -> PageProxy:
+        page = await self._target.new_page()
+        for hook in self._hooks:
+            if hasattr(hook, "prepare"):
+                await hook.prepare(page)
+        return self._session.wrap_page(page)
+
+    def set_default_timeout(self, timeout: float) -> None:
+        self._target.set_default_timeout(timeout * self._session.timeout_scale)
+
+    def set_default_navigation_timeout(self, timeout: float) -> None:
+        self._target.set_default_navigation_timeout(timeout * self._session.timeout_scale)
+
+    async def close(self, **kwargs: Any) -> None:
+        hooks, self._hooks = self._hooks, []
+        for hook in hooks:
+            if hasattr(hook, "detach"):
+                await hook.detach(self._target)
+        await self._target.close(**kwargs)
+
+
+class AssertionsProxy(_Proxy):
+    """Times each ``expect(...).to_*`` call as an assertion step."""
+
+    def __init__(self, target: Any, session: "TestSession", selector: str | None, url: str) -> None:
+        super().__init__(target, session)
+        self._selector = selector
+        self._url = url
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if not name.startswith(("to_", "not_to_")):
+            return attribute
+
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            recorder = self._session.recorder
+            async with recorder.step(f"expect.{name}", self._selector, self._url) as step:
+                with recorder.phase(step, "assert"):
+                    return await attribute(*args, **self._session.scaled(kwargs))
+
+        return timed
+
+
+class TestSession:
+    """Per-test state behind the proxies: pages, waits, shortcuts and timings."""
+
+    def __init__(
+        self,
+        waiter: Waiter | None = None,
+        login: LoginShortcut | None = None,
+        replay: PrefixReplay | None = None,
+        substitutions: dict[str, str] | None = None,
+        probe: InteractionProbe | None = None,
+        timeout_scale: float = 1.0,
+    ) -> None:
+        self.waiter = waiter
+        self.login = login
+        self.replay = replay
+        # Fill values swapped for this test's fixtures (see harness.fixtures).
+        self.substitutions = substitutions or {}
+        # Measures click-to-paint and server round trips per action (harness.interactions).
+        self.probe = probe
+        # Multiplies the scripts' Playwright timeouts on throttled devices (harness.devices).
+        self.timeout_scale = timeout_scale
+        self.recorder = StepRecorder()
+        self._pages: dict[Page, PageProxy] = {}
+
+    def wrap_context(self, context: BrowserContext, hooks: list[ContextHook] | None = None) -> ContextProxy:
+        return ContextProxy(context, self, hooks or [])
+
+    def scaled(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        if self.timeout_scale == 1 or not kwargs.get("timeout"):
+            return kwargs
+        return {**kwargs, "timeout": kwargs["timeout"] * self.timeout_scale}
+
+    def wrap_page(self, page: Page) -> PageProxy:
+        proxy = self._pages.get(page)
+        if proxy is None:
+            proxy = self._pages[page] = PageProxy(page, self)
+            if self.waiter:
+                self.waiter.track(page)
+        return proxy
+
+    async def _load(self, page: PageProxy, url: str, kwargs: dict[str, Any]) -> Any:
+        response = await page._target.goto(url, **kwargs)
+        if self.waiter:
+            await self.waiter.page_ready(page._target)
+        return response
+
+    def _navigator(self, page: PageProxy) -> Callable[[str], Awaitable[Any]]:
+        """Navigation used by shortcuts; bypasses replay so it is never skipped."""
+
+        async def navigate(url: str) -> Any:
+            return await self._load(page, url, {"wait_until": "commit"})
+
+        return navigate
+
+    async def goto(self, page: PageProxy, url: str, kwargs: dict[str, Any]) -> Any:
+        recorder = self.recorder
+        async with recorder.step("goto", None, url) as step:
+            if self.replay:
+                with recorder.phase(step, "act"):
+                    skipped = await self.replay.skip(page._target, Step("goto", url), self._navigator(page))
+                if skipped:
+                    step.note = "replayed from checkpoint"
+                    return None
+            with recorder.phase(step, "act"):
+                response = await page._target.goto(rebase(url), **self.scaled(kwargs))
+            if self.waiter:
+                with recorder.phase(step, "wait"):
+                    await self.waiter.page_ready(page._target)
+            return response
+
+    async def pause(self, page: PageProxy, timeout: float) -> None:
+        if self.replay and self.replay.active:
+            return
+        start = time.perf_counter()
+        if self.waiter:
+            # The generated sleep always precedes an action, which waits for
+            # its own target; here only the current route needs to be ready.
+            await self.waiter.page_ready(page._target)
+        else:
+            await page._target.wait_for_timeout(timeout)
+        self.recorder.carry_wait((time.perf_counter() - start) * 1000)
+
+    async def act(self, locator: LocatorProxy, action: str, args: tuple, kwargs: dict[str, Any]) -> Any:
+        page = locator._page._target
+        navigate = self._navigator(locator._page)
+        recorder = self.recorder
+        if action in ("fill", "type") and args and args[0] in self.substitutions:
+            args = (self.substitutions[args[0]], *args[1:])
+        async with recorder.step(action, locator._selector, page.url) as step:
+            if self.replay and self.replay.active:
+                value = args[0] if action == "fill" and args else None
+                with recorder.phase(step, "act"):
+                    skipped = await self.replay.skip(page, Step(action, locator._selector, value), navigate)
+                if skipped:
+                    step.note = "replayed from checkpoint"
+                    return None
+            if self.login:
+                with recorder.phase(step, "act"):
+                    skipped = await self.login.intercept(page, action, args, navigate)
+                if skipped:
+                    step.note = "cached login"
+                    return None
+            if self.waiter:
+                with recorder.phase(step, "wait"):
+                    await self.waiter.actionable(locator._target, page)
+            async with self.probe.measure(page, action, locator._selector) if self.probe else nullcontext():
+                with recorder.phase(step, "act"):
+                    result = await getattr(locator._target, action)(*args, **self.scaled(kwargs))
+                if self.waiter and action in _SUBMITTING:
+                    with recorder.phase(step, "wait"):
+                        await self.waiter.settled(page)
+            return result
+
+    async def sleep(self, delay: float, result: Any = None) -> Any:
+        """Replacement for the module's ``asyncio.sleep``."""
+        async with self.recorder.step("sleep", None, "") as step:
+            with self.recorder.phase(step, "wait"):
+                if self.waiter:
+                    await self.waiter.settle_all()
+                else:
+                    await asyncio.sleep(delay)
+        return result
+
+    def expect(self, actual: Any, *args: Any, **kwargs: Any) -> AssertionsProxy:
+        selector = actual._selector if isinstance(actual, LocatorProxy) else None
+        page = actual._page if isinstance(actual, LocatorProxy) else actual
+        url = page._target.url if isinstance(page, PageProxy) else ""
+        return AssertionsProxy(playwright_expect(unwrap(actual), *args, **kwargs), self, selector, url)
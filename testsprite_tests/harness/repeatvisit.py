@@ -0,0 +1,363 @@
+"""Repeat-visit benchmark: first visit against returning visit, and offline.
+
+The app registers ``public/sw.js`` in production builds. On install, the
+worker precaches ``/offline`` and a few icons. After that it serves
+same-origin assets cache-first, and navigations network-first with the
+cached page, then ``/offline``, as fallback. Together with the HTTP cache,
+a returning user should need far less from the network than a new one.
+:func:`repeat_visit` measures how much less.
+
+Each run walks :data:`DEFAULT_JOURNEY` (home, search results, a business
+page) with full navigations, in a persistent Chromium profile:
+
+``cold``
+    a brand-new profile, so no HTTP cache and no service worker yet,
+``warm``
+    the browser is closed and relaunched on the same profile, as a
+    returning user would, and the journey is walked again,
+``offline``
+    first run only. The warm browser goes offline and opens the journey
+    pages again, plus a URL it has never seen, which must show ``/offline``.
+
+Each step records:
+
+- TTFB, DOMContentLoaded and load from the navigation entry,
+- the time until the page is quiet,
+- every request the page made and where its response came from:
+  ``network``, ``memory-cache``, ``disk-cache`` or ``prefetch-cache``;
+  or, when the service worker answered, ``sw-cache`` (Cache Storage),
+  ``sw-http-cache`` or ``sw-network``.
+
+The worker's fetches are not visible to the page. ``sw-network`` responses
+are therefore counted at the size the worker passed on.
+*Network bytes* are those of ``network`` and ``sw-network`` responses. The
+service-worker hit ratio, per resource type, is the share of worker
+responses that came from Cache Storage.
+
+Medians over ``runs`` are compared cold against warm. Reports go to
+``tmp/repeat-visit/repeat-visit-<stamp>.json``, and the journey totals are
+appended to ``history.jsonl`` so that changes to ``sw.js`` or cache headers
+can be followed over time.
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+from playwright.async_api import BrowserContext, CDPSession, Page, Playwright, async_playwright
+from playwright.async_api import Error as PlaywrightError
+
+from .config import BROWSER_ARGS, TMP_DIR, base_url, git_revision
+from .results import utc_now
+from .routes import route_samples
+from .vitals import AUDIT_CONTEXT
+from .waits import WaitPolicy, Waiter, WaitTimeout
+
+REPEAT_DIR = TMP_DIR / "repeat-visit"
+HISTORY_PATH = REPEAT_DIR / "history.jsonl"
+DEFAULT_JOURNEY = (("home", "/"), ("search", "/businesses?search={keyword}"), ("business", "/businesses/{slug}"))
+OFFLINE_PATH = "/offline"
+# Heading of src/app/offline/page.tsx.
+OFFLINE_MARKER = "Connexion indisponible"
+TIMING_METRICS = ("ttfb_ms", "dcl_ms", "load_ms", "ready_ms")
+NETWORK_SOURCES = frozenset({"network", "sw-network"})
+_SW_SOURCES = {"cache-storage": "sw-cache", "http-cache": "sw-http-cache", "network": "sw-network"}
+
+NAVIGATION_SCRIPT = """() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    return nav
+        ? { ttfb_ms: nav.responseStart, dcl_ms: nav.domContentLoadedEventEnd, load_ms: nav.loadEventEnd }
+        : { ttfb_ms: null, dcl_ms: null, load_ms: null };
+}"""
+
+SW_READY_SCRIPT = """(timeout) => {
+    if (!('serviceWorker' in navigator)) return Promise.resolve(false);
+    const timer = new Promise((resolve) => setTimeout(() => resolve(false), timeout));
+    return Promise.race([navigator.serviceWorker.ready.then(() => true), timer]);
+}"""
+
+
+@dataclass
+class RepeatVisitOptions:
+    runs: int = 3
+    keyword: str = "banque"
+    journey: tuple[tuple[str, str], ...] = DEFAULT_JOURNEY
+    offline: bool = True
+    headless: bool = True
+    step_timeout_s: float = 20.0
+    # Time for the worker's unawaited cache.put() calls to land before the browser closes.
+    settle_s: float = 1.0
+
+
+@dataclass
+class StepResult:
+    step: str
+    url: str
+    status: int | None = None
+    ttfb_ms: float | None = None
+    dcl_ms: float | None = None
+    load_ms: float | None = None
+    ready_ms: float | None = None
+    requests: int = 0
+    network_bytes: int = 0
+    # Requests per resource type and response source.
+    sources: dict[str, dict[str, int]] = field(default_factory=dict)
+    document_source: str | None = None
+    offline_page: bool | None = None
+    error: str | None = None
+
+
+@dataclass
+class RepeatVisitResult:
+    started_at: str
+    origin: str
+    options: dict[str, Any]
+    runs: list[dict[str, list[StepResult]]] = field(default_factory=list)
+    offline: list[StepResult] = field(default_factory=list)
+    offline_route: dict[str, Any] = field(default_factory=dict)
+    service_worker: bool = False
+    elapsed_s: float = 0.0
+
+    @property
+    def offline_ok(self) -> bool | None:
+        """The uncached URL showed ``/offline`` and every visited page came back from the worker."""
+        if not self.offline:
+            return None
+        *visited, probe = self.offline
+        return bool(probe.offline_page) and all(step.status == 200 and not step.offline_page for step in visited)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "revision": git_revision(),
+            "origin": self.origin,
+            "options": self.options,
+            "service_worker": self.service_worker,
+            "offline_route": self.offline_route,
+            "offline_ok": self.offline_ok,
+            "elapsed_s": round(self.elapsed_s, 1),
+            "comparison": compare_passes(self),
+            "sw_hit_ratio": sw_hit_ratio([step for run in self.runs for step in run.get("warm", [])]),
+            "offline": [asdict(step) for step in self.offline],
+            "runs": [{name: [asdict(step) for step in steps] for name, steps in run.items()} for run in self.runs],
+        }
+
+
+class _Requests:
+    """Responses the page received over CDP, with where each came from."""
+
+    def __init__(self) -> None:
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._done: list[dict[str, Any]] = []
+
+    async def start(self, context: BrowserContext, page: Page) -> CDPSession:
+        cdp = await context.new_cdp_session(page)
+        cdp.on("Network.requestWillBeSent", self._sent)
+        cdp.on("Network.requestServedFromCache", self._from_memory)
+        cdp.on("Network.responseReceived", self._received)
+        cdp.on("Network.loadingFinished", self._finished)
+        cdp.on("Network.loadingFailed", self._failed)
+        await cdp.send("Network.enable")
+        return cdp
+
+    def _sent(self, params: dict[str, Any]) -> None:
+        if not params["request"]["url"].startswith("data:"):
+            self._pending[params["requestId"]] = {
+                "url": params["request"]["url"], "type": params.get("type", "Other").lower(),
+                "source": "network", "status": None, "bytes": 0,
+            }
+
+    def _from_memory(self, params: dict[str, Any]) -> None:
+        if params["requestId"] in self._pending:
+            self._pending[params["requestId"]]["source"] = "memory-cache"
+
+    def _received(self, params: dict[str, Any]) -> None:
+        entry = self._pending.get(params["requestId"])
+        if entry is None:
+            return
+        response = params["response"]
+        entry["status"] = response.get("status")
+        if response.get("fromServiceWorker"):
+            entry["source"] = _SW_SOURCES.get(response.get("serviceWorkerResponseSource", ""), "sw-other")
+        elif response.get("fromDiskCache"):
+            entry["source"] = "disk-cache"
+        elif response.get("fromPrefetchCache"):
+            entry["source"] = "prefetch-cache"
+
+    def _finished(self, params: dict[str, Any]) -> None:
+        entry = self._pending.pop(params["requestId"], None)
+        if entry is not None:
+            entry["bytes"] = int(params.get("encodedDataLength", 0))
+            self._done.append(entry)
+
+    def _failed(self, params: dict[str, Any]) -> None:
+        entry = self._pending.pop(params["requestId"], None)
+        if entry is not None:
+            entry["source"] = "failed"
+            self._done.append(entry)
+
+    def take(self) -> list[dict[str, Any]]:
+        done, self._done = self._done, []
+        return done
+
+
+def _fill(step: StepResult, fetches: list[dict[str, Any]]) -> None:
+    sources: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for fetch in fetches:
+        sources[fetch["type"]][fetch["source"]] += 1
+        if fetch["type"] == "document" and step.document_source is None:
+            step.document_source = fetch["source"]
+    step.requests = len(fetches)
+    step.network_bytes = sum(fetch["bytes"] for fetch in fetches if fetch["source"] in NETWORK_SOURCES)
+    step.sources = {kind: dict(counts) for kind, counts in sorted(sources.items())}
+
+
+async def _walk(
+    page: Page, requests: _Requests, journey: list[tuple[str, str]], options: RepeatVisitOptions
+) -> list[StepResult]:
+    waiter = Waiter(WaitPolicy(step_timeout_ms=options.step_timeout_s * 1000))
+    waiter.track(page)
+    steps = []
+    for name, url in journey:
+        step = StepResult(name, url)
+        steps.append(step)
+        requests.take()
+        started = time.perf_counter()
+        try:
+            response = await page.goto(url, wait_until="load", timeout=options.step_timeout_s * 1000)
+        except PlaywrightError as exc:
+            step.error = str(exc).splitlines()[0]
+            _fill(step, requests.take())
+            continue
+        try:
+            await waiter.page_ready(page)
+        except WaitTimeout:
+            pass  # time what rendered; a busy network shows in the numbers
+        step.ready_ms = round((time.perf_counter() - started) * 1000, 1)
+        step.status = response.status if response else None
+        timings = await page.evaluate(NAVIGATION_SCRIPT)
+        for metric, value in timings.items():
+            setattr(step, metric, round(value, 1) if value is not None else None)
+        step.offline_page = await page.get_by_text(OFFLINE_MARKER).count() > 0
+        _fill(step, requests.take())
+    return steps
+
+
+async def _session(
+    pw: Playwright, profile: Path, options: RepeatVisitOptions
+) -> tuple[BrowserContext, Page, _Requests]:
+    context = await pw.chromium.launch_persistent_context(
+        str(profile), headless=options.headless, args=BROWSER_ARGS, service_workers="allow", **AUDIT_CONTEXT
+    )
+    page = context.pages[0] if context.pages else await context.new_page()
+    requests = _Requests()
+    await requests.start(context, page)
+    return context, page, requests
+
+
+async def repeat_visit(options: RepeatVisitOptions | None = None) -> RepeatVisitResult:
+    options = options or RepeatVisitOptions()
+    origin = base_url()
+    values = {**route_samples(), "keyword": quote(options.keyword)}
+    journey = [(name, origin + path.format(**values)) for name, path in options.journey]
+    result = RepeatVisitResult(utc_now(), origin, asdict(options))
+    started = time.perf_counter()
+    async with async_playwright() as pw:
+        for run in range(options.runs):
+            with tempfile.TemporaryDirectory(prefix="repeat-visit-") as profile:
+                passes: dict[str, list[StepResult]] = {}
+                context, page, requests = await _session(pw, Path(profile), options)
+                try:
+                    passes["cold"] = await _walk(page, requests, journey, options)
+                    result.service_worker = await page.evaluate(SW_READY_SCRIPT, options.step_timeout_s * 1000)
+                    await page.wait_for_timeout(options.settle_s * 1000)
+                finally:
+                    await context.close()
+                context, page, requests = await _session(pw, Path(profile), options)
+                try:
+                    passes["warm"] = await _walk(page, requests, journey, options)
+                    if options.offline and run == 0:
+                        response = await context.request.get(origin + OFFLINE_PATH)
+                        body = await response.text()
+                        result.offline_route = {"status": response.status, "marker": OFFLINE_MARKER in body}
+                        await context.set_offline(True)
+                        probe = ("uncached", f"{origin}/?harness-offline={int(time.time())}")
+                        result.offline = await _walk(page, requests, [*journey, probe], options)
+                finally:
+                    await context.close()
+                result.runs.append(passes)
+    result.elapsed_s = time.perf_counter() - started
+    return result
+
+
+def _median(values: list[float | None]) -> float | None:
+    present = [value for value in values if value is not None]
+    return round(statistics.median(present), 1) if present else None
+
+
+def compare_passes(result: RepeatVisitResult) -> dict[str, Any]:
+    """Median cold and warm timings and network bytes per step, and over the journey."""
+    names = [name for name, _ in result.options["journey"]]
+    steps: dict[str, Any] = {}
+    totals: dict[str, dict[str, float]] = {"cold": defaultdict(float), "warm": defaultdict(float)}
+    for index, name in enumerate(names):
+        row: dict[str, Any] = {}
+        for metric in (*TIMING_METRICS, "network_bytes", "requests"):
+            cold, warm = (
+                _median([
+                    getattr(run[which][index], metric) for run in result.runs
+                    if index < len(run.get(which, [])) and not run[which][index].error
+                ])
+                for which in ("cold", "warm")
+            )
+            change = round(100 * (warm - cold) / cold, 1) if cold and warm is not None else None
+            row[metric] = {"cold": cold, "warm": warm, "change_pct": change}
+            if metric in ("ready_ms", "network_bytes", "requests"):
+                totals["cold"][metric] += cold or 0
+                totals["warm"][metric] += warm or 0
+        steps[name] = row
+    return {"steps": steps, "totals": {which: dict(values) for which, values in totals.items()}}
+
+
+def sw_hit_ratio(steps: list[StepResult]) -> dict[str, dict[str, Any]]:
+    """Per resource type: responses the worker answered, and the share from Cache Storage."""
+    counts: dict[str, dict[str, int]] = defaultdict(lambda: {"worker": 0, "cache_storage": 0, "total": 0})
+    for step in steps:
+        for kind, sources in step.sources.items():
+            for source, count in sources.items():
+                counts[kind]["total"] += count
+                if source.startswith("sw-"):
+                    counts[kind]["worker"] += count
+                if source == "sw-cache":
+                    counts[kind]["cache_storage"] += count
+    return {
+        kind: {**values, "ratio": round(values["cache_storage"] / values["worker"], 3) if values["worker"] else None}
+        for kind, values in sorted(counts.items())
+    }
+
+
+def write_repeat_visit(result: RepeatVisitResult, directory: Path = REPEAT_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = result.started_at.replace(":", "").replace("-", "").split(".")[0]
+    path = directory / f"repeat-visit-{stamp}.json"
+    report = result.to_dict()
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    history = {
+        "started_at": report["started_at"],
+        "revision": report["revision"],
+        "service_worker": report["service_worker"],
+        "offline_ok": report["offline_ok"],
+        **{f"{which}_{metric}": value for which, values in report["comparison"]["totals"].items()
+           for metric, value in values.items()},
+    }
+    with (directory / HISTORY_PATH.name).open("a", encoding="utf-8") as out:
+        out.write(json.dumps(history) + "\n")
+    return path
@@ -0,0 +1,128 @@
+"""Render ``tmp/raw_report.md`` in the layout TestSprite produces."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from .config import REPORT_PATH, SUITE_DIR, testsprite_config
+from .discovery import plan_entry
+from .results import PASSED, TestResult
+from .timing import phase_totals
+
+TIMELINE_WIDTH = 40
+
+
+def _project_name() -> str:
+    return testsprite_config().get("executionArgs", {}).get("projectName", "AVis-prod")
+
+
+def _test_section(result: TestResult) -> list[str]:
+    test_id = result.test_id
+    title = result.title.split("-", 1)[-1]
+    matches = sorted(SUITE_DIR.glob(f"{test_id}_*.py"))
+    lines = [f"#### Test {test_id} {title}"]
+    if matches:
+        lines.append(f"- **Test Code:** [{matches[0].name}](./{matches[0].name})")
+    if result.error:
+        lines += [f"- **Test Error:** {result.error}"]
+    lines += [
+        f"- **Duration:** {result.duration_ms / 1000:.1f}s",
+        f"- **Status:** {'✅ Passed' if result.passed else '❌ Failed'}",
+    ]
+    if result.steps:
+        lines += ["", *_timeline(result.steps)]
+    lines += ["---", ""]
+    return lines
+
+
+def _timeline(steps: list[dict[str, Any]]) -> list[str]:
+    """Step table with a bar per step: ``░`` waiting, ``█`` acting, ``▒`` asserting."""
+    totals = phase_totals(steps)
+    end = max((step["start_ms"] + step["wait_ms"] + step["act_ms"] + step["assert_ms"] for step in steps), default=0)
+    scale = TIMELINE_WIDTH / end if end else 0
+    lines = [
+        f"- **Time split:** wait {totals['wait'] / 1000:.1f}s · act {totals['act'] / 1000:.1f}s"
+        f" · assert {totals['assert'] / 1000:.1f}s",
+        "",
+        "| # | Step | Target | Wait | Act | Assert | Timeline |",
+        "|---|------|--------|------|-----|--------|----------|",
+    ]
+    for step in steps:
+        target = step.get("selector") or step.get("url") or ""
+        if len(target) > 48:
+            target = "…" + target[-47:]
+        bar = (
+            " " * int(step["start_ms"] * scale)
+            + "░" * round(step["wait_ms"] * scale)
+            + "█" * round(step["act_ms"] * scale)
+            + "▒" * round(step["assert_ms"] * scale)
+        )
+        label = step["action"] + (f" ({step['note']})" if step.get("note") else "") + (" ❌" if step.get("error") else "")
+        lines.append(
+            f"| {step['index']} | {label} | `{target}` | {step['wait_ms'] / 1000:.2f}s | {step['act_ms'] / 1000:.2f}s"
+            f" | {step['assert_ms'] / 1000:.2f}s | `{bar.rstrip() or '·'}` |"
+        )
+    return lines
+
+
+def _coverage_table(results: list[TestResult]) -> list[str]:
+    totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    for result in results:
+        category = plan_entry(result.test_id).get("category", "Uncategorized")
+        totals[category][0 if result.passed else 1] += 1
+    lines = [
+        "| Requirement        | Total Tests | ✅ Passed | ❌ Failed  |",
+        "|--------------------|-------------|-----------|------------|",
+    ]
+    for category in sorted(totals):
+        passed, failed = totals[category]
+        lines.append(f"| {category:<18} | {passed + failed:<11} | {passed:<9} | {failed:<10} |")
+    return lines
+
+
+def render_report(results: list[TestResult], sections: list[list[str]] | None = None) -> str:
+    """Markdown for ``results``; ``sections`` are appended before the gaps block."""
+    results = sorted(results, key=lambda result: result.test_id)
+    passed = sum(result.status == PASSED for result in results)
+    rate = 100 * passed / len(results) if results else 0.0
+    lines = [
+        "",
+        "# TestSprite AI Testing Report(MCP)",
+        "",
+        "---",
+        "",
+        "## 1️⃣ Document Metadata",
+        f"- **Project Name:** {_project_name()}",
+        f"- **Date:** {date.today().isoformat()}",
+        "- **Prepared by:** TestSprite harness",
+        "",
+        "---",
+        "",
+        "## 2️⃣ Requirement Validation Summary",
+        "",
+    ]
+    for result in results:
+        lines += _test_section(result)
+    lines += [
+        "",
+        "## 3️⃣ Coverage & Matching Metrics",
+        "",
+        f"- **{rate:.2f}** of tests passed",
+        "",
+        *_coverage_table(results),
+        "---",
+        "",
+    ]
+    for section in sections or []:
+        lines += [*section, "---", ""]
+    return "\n".join(lines) + "\n"
+
+
+def write_report(results: list[TestResult], path: Path = REPORT_PATH, sections: list[list[str]] | None = None) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(render_report(results, sections), encoding="utf-8")
+    return path
+
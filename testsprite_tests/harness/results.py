@@ -0,0 +1,91 @@
+"""Per-test results and their on-disk form in ``tmp/test_results.json``.
+
+The file keeps TestSprite's schema (one object per test keyed by a
+``TCxxx-Title`` string) so existing tooling can still read it; harness runs
+update ``testStatus``/``testError`` in place and add ``durationMs``.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .config import RESULTS_PATH
+from .discovery import TestCase
+
+PASSED = "PASSED"
+FAILED = "FAILED"
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+@dataclass
+class TestResult:
+    test_id: str
+    title: str
+    status: str
+    duration_ms: float
+    started_at: str
+    finished_at: str
+    error: str | None = None
+    extra: dict[str, Any] = field(default_factory=dict)
+    # Per-step timings (see harness.timing); kept out of test_results.json.
+    steps: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return self.status == PASSED
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TestResult":
+        return cls(**data)
+
+
+def test_id_of(title: str) -> str:
+    return title.split("-", 1)[0].strip()
+
+
+def load_entries(path: Path = RESULTS_PATH) -> list[dict[str, Any]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return [entry for entry in data if isinstance(entry, dict)] if isinstance(data, list) else []
+
+
+def write_results(
+    results: list[TestResult],
+    cases: dict[str, TestCase],
+    path: Path = RESULTS_PATH,
+) -> None:
+    """Merge ``results`` into ``path``, keeping entries for tests that did not run."""
+    entries = load_entries(path)
+    by_id = {test_id_of(entry.get("title", "")): entry for entry in entries}
+    for result in results:
+        entry = by_id.get(result.test_id)
+        if entry is None:
+            entry = {"title": result.title, "testType": "FRONTEND", "createFrom": "harness", "created": result.started_at}
+            entries.append(entry)
+            by_id[result.test_id] = entry
+        case = cases.get(result.test_id)
+        if case is not None:
+            entry["title"] = case.report_title
+            entry["description"] = case.description or entry.get("description", "")
+            entry["priority"] = case.priority or entry.get("priority", "")
+            entry["code"] = case.source()
+        entry["testStatus"] = result.status
+        entry["testError"] = result.error
+        entry["durationMs"] = round(result.duration_ms, 1)
+        entry["modified"] = result.finished_at
+        entry.update(result.extra)
+    entries.sort(key=lambda entry: test_id_of(entry.get("title", "")))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(entries, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
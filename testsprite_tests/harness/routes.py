@@ -0,0 +1,132 @@
+"""Routes listed in ``tmp/code_summary.yaml`` and how to visit them.
+
+Dynamic segments such as ``[slug]`` are filled from sample values:
+defaults below, overridden by ``tmp/route_samples.json``
+(``{"slug": "ocp-group", ...}``) when present. The reverse direction,
+concrete URL to route template, uses every ``page.tsx`` under
+``src/app`` (:class:`TemplateMatcher`).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+
+from .config import CODE_SUMMARY_PATH, REPO_ROOT, TMP_DIR
+
+ROUTE_SAMPLES_PATH = TMP_DIR / "route_samples.json"
+APP_DIR = REPO_ROOT / "src" / "app"
+DEFAULT_SAMPLES = {
+    "slug": "ocp-group",
+    "categorySlug": "banque-finance",
+}
+
+_PARAM = re.compile(r"\[([^\]]+)\]")
+
+
+@dataclass(frozen=True)
+class AppRoute:
+    path: str
+    file: str = ""
+    auth_required: bool = False
+    description: str = ""
+
+    @property
+    def is_dynamic(self) -> bool:
+        return bool(_PARAM.search(self.path))
+
+    @property
+    def role(self) -> str | None:
+        """Account role needed to render the route, or None for public pages."""
+        if not self.auth_required:
+            return None
+        if self.path.startswith("/admin"):
+            return "admin"
+        if self.path.startswith("/dashboard"):
+            return "pro"
+        return "user"
+
+    @property
+    def label(self) -> str:
+        """Filesystem-safe name, e.g. ``businesses_slug`` for ``/businesses/[slug]``."""
+        return re.sub(r"[^a-zA-Z0-9]+", "_", self.path).strip("_") or "root"
+
+    def concrete(self, samples: dict[str, str]) -> str | None:
+        """The path with its parameters filled in, or None if one has no sample."""
+        missing = [name for name in _PARAM.findall(self.path) if name not in samples]
+        if missing:
+            return None
+        return _PARAM.sub(lambda match: samples[match.group(1)], self.path)
+
+
+def route_samples(path: Path = ROUTE_SAMPLES_PATH) -> dict[str, str]:
+    samples = dict(DEFAULT_SAMPLES)
+    try:
+        samples.update(json.loads(path.read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        pass
+    return samples
+
+
+def load_routes(path: Path = CODE_SUMMARY_PATH) -> list[AppRoute]:
+    summary = yaml.safe_load(path.read_text(encoding="utf-8-sig")) or {}
+    return [
+        AppRoute(
+            path=entry["path"],
+            file=entry.get("file", ""),
+            auth_required=bool(entry.get("auth_required", False)),
+            description=entry.get("description", ""),
+        )
+        for entry in summary.get("routes", [])
+        if isinstance(entry, dict) and entry.get("path")
+    ]
+
+
+def select_routes(routes: list[AppRoute], only: list[str] | None = None, public_only: bool = False) -> list[AppRoute]:
+    selected = [route for route in routes if not only or route.path in only]
+    return [route for route in selected if not (public_only and route.auth_required)]
+
+
+def page_templates(app_dir: Path = APP_DIR) -> list[str]:
+    """Route templates of every ``page.*`` under the app directory, route groups removed."""
+    templates = set()
+    for page in app_dir.rglob("page.*"):
+        if page.suffix not in (".tsx", ".ts", ".jsx", ".js"):
+            continue
+        parts = [part for part in page.parent.relative_to(app_dir).parts if not part.startswith(("(", "@", "_"))]
+        templates.add("/" + "/".join(parts))
+    return sorted(templates)
+
+
+def _segment_pattern(segment: str) -> str:
+    if segment.startswith(("[...", "[[...")):
+        return ".+"
+    return "[^/]+".join(re.escape(piece) for piece in re.split(r"\[[^\]]+\]", segment))
+
+
+class TemplateMatcher:
+    """Maps ``/businesses/ocp-group`` to ``/businesses/[slug]``.
+
+    Static segments win over dynamic ones, so ``/salaires/comparaison`` is
+    not counted as ``/salaires/[roleSlug]``. Paths no page matches map to
+    ``"(other)"``.
+    """
+
+    def __init__(self, templates: list[str] | None = None) -> None:
+        templates = page_templates() if templates is None else templates
+        compiled = []
+        for template in templates:
+            segments = [segment for segment in template.split("/") if segment]
+            pattern = "^/" + "/".join(_segment_pattern(segment) for segment in segments) + "/?$"
+            # Fewer dynamic segments first, then the longer static prefix.
+            rank = (sum("[" in segment for segment in segments), -len(template.split("[", 1)[0]))
+            compiled.append((rank, template, re.compile(pattern)))
+        self._patterns = [(template, pattern) for _, template, pattern in sorted(compiled)]
+
+    def match(self, path: str) -> str:
+        path = path.split("?", 1)[0].split("#", 1)[0] or "/"
+        return next((template for template, pattern in self._patterns if pattern.match(path)), "(other)")
@@ -0,0 +1,269 @@
+"""Run the TC scripts concurrently against one long-lived browser.
+
+Instead of a cold Chromium launch per script, the runner starts a single
+browser and schedules tests on a bounded asyncio pool. Each test gets its
+own ``BrowserContext``, so cookies and storage stay isolated while the
+browser process, and its warm caches, are shared.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import Browser, BrowserContext, async_playwright
+
+from .auth import UI_LOGIN_CATEGORIES, AuthStateCache, LoginShortcut, Role, configured_roles
+from .blocking import BlockingProfile, RequestFilter
+from .config import BROWSER_ARGS, DEFAULT_CONCURRENCY, rebase
+from .coverage import CoverageRecorder
+from .devices import DeviceEmulation, DeviceProfile
+from .discovery import TestCase, load_module
+from .fastpath import FastPath, compile_plan, opted_in
+from .fixtures import FIXTURE_PASSWORD, SHARED_USER_EMAIL, SIGNUP_EMAIL, FixtureSet
+from .hooks import RUN_SUMMARY_PATH, ContextHook, write_summaries
+from .interactions import InteractionProfiler
+from .netaudit import NetworkAudit
+from .prefix import Checkpoint, PrefixCache, PrefixReplay, Step, compile_steps, plan_prefixes
+from .proxies import TestSession
+from .results import FAILED, PASSED, TestResult, utc_now
+from .session import SharedBrowser, patch_module
+from .static_cache import StaticCache
+from .waits import WaitPolicy, Waiter
+
+
+@dataclass
+class RunOptions:
+    concurrency: int = DEFAULT_CONCURRENCY
+    headless: bool = True
+    # Hard ceiling per test; a hung script must not stall the whole pool.
+    test_timeout: float = 180.0
+    browser_args: list[str] = field(default_factory=lambda: list(BROWSER_ARGS))
+    context_options: dict[str, Any] = field(default_factory=dict)
+    # None keeps the scripts' fixed wait_for_timeout()/sleep() calls.
+    wait_policy: WaitPolicy | None = field(default_factory=WaitPolicy)
+    # Reuse one saved login per role instead of filling /login in every test.
+    auth_cache: bool = True
+    # Names this process's cached sessions; shard workers must not share files.
+    worker: str = "local"
+    # Run navigation prefixes shared by several scripts once and fork from them.
+    share_prefixes: bool = False
+    # Serve immutable /_next/static assets and public/ images from tmp/static-cache.
+    static_cache: bool = False
+    # Request-filtering profile; None installs no filter at all.
+    blocking: BlockingProfile | None = None
+    # Per-test users and addresses provisioned before the run (harness.fixtures).
+    fixtures: FixtureSet | None = None
+    # Decide tests listed in fast_path.json over HTTP when they never interact.
+    fast_path: bool = False
+    # Records every request, grouped per page and Supabase resource (harness.netaudit).
+    network_audit: NetworkAudit | None = None
+    # Times every scripted action from input to paint, with its server round trips.
+    interactions: InteractionProfiler | None = None
+    # JS/CSS coverage per route, mapped to chunks and source modules (harness.coverage).
+    coverage: CoverageRecorder | None = None
+    # Viewport, user agent, CPU and network throttling of one device (harness.devices).
+    device: DeviceProfile | None = None
+    summary_path: Path = RUN_SUMMARY_PATH
+
+
+@dataclass
+class Suite:
+    """Resources shared by every test of one run."""
+
+    browser: Browser
+    options: RunOptions
+    auth: AuthStateCache | None = None
+    prefixes: PrefixCache | None = None
+    prefix_plan: dict[str, tuple[Any, tuple[Step, ...]]] = field(default_factory=dict)
+    hooks: list[ContextHook] = field(default_factory=list)
+
+    def new_session(
+        self, case: TestCase | None, use_login: bool, replay: PrefixReplay | None = None
+    ) -> TestSession:
+        waiter = Waiter(self.options.wait_policy) if self.options.wait_policy else None
+        fixtures = self.options.fixtures
+        substitutions = fixtures.substitutions(case.test_id) if fixtures and case else {}
+        roles = configured_roles()
+        if case and SHARED_USER_EMAIL in substitutions:
+            name = f"fixture-{case.test_id}"
+            roles[name] = Role(name, substitutions[SHARED_USER_EMAIL], FIXTURE_PASSWORD)
+        login = LoginShortcut(self.auth, roles) if self.auth and use_login else None
+        probe = self.options.interactions.probe(case.test_id) if self.options.interactions and case else None
+        scale = self.options.device.timeout_scale if self.options.device else 1.0
+        return TestSession(waiter, login, replay, substitutions, probe, scale)
+
+    async def new_context(self, session: TestSession, **kwargs: Any) -> BrowserContext:
+        device = self.options.device.context if self.options.device else {}
+        context = await self.browser.new_context(**{**device, **self.options.context_options, **kwargs})
+        for hook in self.hooks:
+            await hook.attach(context)
+        return session.wrap_context(context, self.hooks)
+
+
+def _uses_login_cache(case: TestCase) -> bool:
+    return case.category not in UI_LOGIN_CATEGORIES
+
+
+def _shareable(steps: tuple[Step, ...], options: RunOptions) -> tuple[Step, ...]:
+    """With fixtures, stop before the first per-test value: each test logs in as its own user."""
+    if not options.fixtures:
+        return steps
+    for index, step in enumerate(steps):
+        if step.value in (SHARED_USER_EMAIL, SIGNUP_EMAIL):
+            return steps[:index]
+    return steps
+
+
+def _describe_failure(exc: BaseException) -> str:
+    if isinstance(exc, asyncio.TimeoutError):
+        return "TEST FAILURE\n\nTest exceeded the harness timeout."
+    summary = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+    return f"TEST FAILURE\n\n{summary}"
+
+
+async def run_prefix(suite: Suite, use_login: bool, steps: tuple[Step, ...]) -> Checkpoint:
+    """Perform ``steps`` the way a script would and checkpoint the context."""
+    session = suite.new_session(None, use_login)
+    context = await suite.new_context(session)
+    try:
+        page = await context.new_page()
+        for step in steps:
+            if step.action == "goto":
+                await page.goto(rebase(step.target), wait_until="commit", timeout=30_000)
+                continue
+            await page.wait_for_timeout(3000)
+            locator = page.locator(step.target).first
+            if step.action == "fill":
+                await locator.fill(step.value or "")
+            else:
+                await locator.click()
+        return Checkpoint(await context.storage_state(), page.url)
+    finally:
+        await context.close()
+
+
+async def run_case(case: TestCase, suite: Suite) -> TestResult:
+    """Run one TC script in its own context on the suite's browser."""
+    key = suite.prefix_plan.get(case.test_id)
+    replay = PrefixReplay(suite.prefixes, key) if suite.prefixes and key else None
+    session = suite.new_session(case, _uses_login_cache(case), replay)
+
+    async def new_context(**kwargs: Any) -> BrowserContext:
+        return await suite.new_context(session, **kwargs)
+
+    shared = SharedBrowser(new_context)
+    started_at = utc_now()
+    start = time.perf_counter()
+    error = None
+    try:
+        module = load_module(case)
+        patch_module(module, shared, session)
+        await asyncio.wait_for(module.run_test(), timeout=suite.options.test_timeout)
+    except Exception as exc:
+        error = _describe_failure(exc)
+    finally:
+        await shared.close()
+    return TestResult(
+        test_id=case.test_id,
+        title=case.report_title,
+        status=FAILED if error else PASSED,
+        duration_ms=(time.perf_counter() - start) * 1000,
+        started_at=started_at,
+        finished_at=utc_now(),
+        error=error,
+        steps=session.recorder.finish(),
+    )
+
+
+async def run_fast_path(cases: list[TestCase], options: RunOptions) -> tuple[dict[str, TestResult], dict[str, str]]:
+    """Opted-in tests decided over HTTP, and why the others still need the browser."""
+    wanted = opted_in()
+    plans = {case.test_id: compile_plan(case) for case in cases if case.test_id in wanted}
+    if not plans:
+        return {}, {}
+    fast = FastPath(size=max(1, options.concurrency) * 2)
+    try:
+        outcomes = dict(zip(plans, await asyncio.gather(*(fast.run(plan) for plan in plans.values()))))
+    finally:
+        await fast.close()
+    passed, fallbacks = {}, {}
+    for case in cases:
+        outcome = outcomes.get(case.test_id)
+        if outcome is None:
+            continue
+        if not outcome.passed:
+            fallbacks[case.test_id] = outcome.reason or "fast path failed"
+            continue
+        now = utc_now()
+        passed[case.test_id] = TestResult(
+            test_id=case.test_id,
+            title=case.report_title,
+            status=PASSED,
+            duration_ms=outcome.elapsed_ms,
+            started_at=now,
+            finished_at=now,
+            extra={"executionMode": "http"},
+            steps=outcome.steps,
+        )
+    return passed, fallbacks
+
+
+async def run_suite(cases: list[TestCase], options: RunOptions | None = None) -> list[TestResult]:
+    """Run ``cases`` with at most ``options.concurrency`` tests in flight.
+
+    Results come back in the order of ``cases``, not completion order.
+    """
+    options = options or RunOptions()
+    # HTTP decisions would skip the device emulation, so a device run keeps every test in the browser.
+    fast_path = options.fast_path and not options.device
+    decided, fallbacks = await run_fast_path(cases, options) if fast_path else ({}, {})
+    remaining = [case for case in cases if case.test_id not in decided]
+    results = {result.test_id: result for result in await _run_in_browser(remaining, options)} if remaining else {}
+    for test_id, reason in fallbacks.items():
+        results[test_id].extra.update({"executionMode": "browser", "fastPathFallback": reason})
+    results.update(decided)
+    return [results[case.test_id] for case in cases]
+
+
+async def _run_in_browser(cases: list[TestCase], options: RunOptions) -> list[TestResult]:
+    semaphore = asyncio.Semaphore(max(1, options.concurrency))
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=options.headless, args=options.browser_args)
+        suite = Suite(browser, options)
+        if options.auth_cache:
+            suite.auth = AuthStateCache(browser, options.worker)
+        if options.share_prefixes:
+            steps = {
+                case.test_id: (_uses_login_cache(case), _shareable(compile_steps(case), options)) for case in cases
+            }
+            suite.prefix_plan = plan_prefixes(steps)
+            suite.prefixes = PrefixCache(lambda use_login, prefix: run_prefix(suite, use_login, prefix))
+        if options.device:
+            suite.hooks.append(DeviceEmulation(options.device))
+        if options.static_cache:
+            suite.hooks.append(StaticCache())
+        if options.network_audit:
+            suite.hooks.append(options.network_audit)
+        if options.interactions:
+            suite.hooks.append(options.interactions)
+        if options.coverage:
+            suite.hooks.append(options.coverage)
+        if options.blocking:
+            # Routes run last-registered first, so the filter sees requests
+            # before the static cache and falls back to it for allowed ones.
+            suite.hooks.append(RequestFilter(options.blocking))
+        try:
+
+            async def bounded(case: TestCase) -> TestResult:
+                async with semaphore:
+                    return await run_case(case, suite)
+
+            return list(await asyncio.gather(*(bounded(case) for case in cases)))
+        finally:
+            await browser.close()
+            write_summaries(suite.hooks, options.summary_path)
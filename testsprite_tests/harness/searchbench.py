@@ -0,0 +1,334 @@
+"""Benchmark matrix for the business search API, kept per commit.
+
+TC010, TC011 and TC015 exercise search with one keyword, one city and a
+blank query. Before touching ``server-search.ts`` or the FTS migration we
+want numbers for the whole input space, so :class:`SearchBench` runs two
+layers:
+
+route layer
+    every :data:`CASES` query shape (short, long, accented French, Arabic,
+    empty, city- and category-filtered, wide and deep pages) against both
+    ``/api/businesses/search`` and ``/api/v1/businesses/search`` at each
+    concurrency level, recording latency percentiles, payload size,
+    statuses and the reported total. With ``distinct_ips`` each request
+    sends its own ``X-Forwarded-For`` so the per-IP read limit is not what
+    gets measured (opt-in, for servers we run ourselves).
+database layer
+    the PostgREST request behind each route case, with and without
+    ``Prefer: count=exact``; the difference is the exact-count overhead.
+    The routes take ``page``/``limit`` but no ``sortBy``, so the three
+    ``searchBusinesses`` orderings (``rating``, ``name``, ``recent``) are
+    measured here too, at the first page and at a deep offset.
+
+Results are written to ``tmp/search-bench/<revision>.json`` (one file per
+commit, overwritten on re-runs) so two commits can be compared with
+:func:`compare`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote, urlencode
+
+from .config import TMP_DIR, git_revision
+from .dataset import RATING_ORDER, BenchQuery, QueryBench, _search
+from .http import ConnectionPool, HttpError
+from .load import percentile
+from .results import utc_now
+
+SEARCH_BENCH_DIR = TMP_DIR / "search-bench"
+ROUTES = ("/api/businesses/search", "/api/v1/businesses/search")
+DEFAULT_CONCURRENCY_LEVELS = (1, 4, 16)
+# route.ts: the columns it selects and how it orders them.
+ROUTE_SELECT = "id,name,location,category,logo_url,city,overall_rating,description"
+ROUTE_ORDER = "overall_rating.desc.nullslast,name.asc"
+# server-search.ts: searchBusinesses' sortBy values.
+SORT_ORDERS = {"rating": RATING_ORDER, "name": "name.asc", "recent": "created_at.desc"}
+
+
+@dataclass(frozen=True)
+class SearchCase:
+    name: str
+    params: dict[str, str]
+    # The route rejects queries shorter than two characters with 400.
+    expect_status: int = 200
+
+    @property
+    def page(self) -> int:
+        return int(self.params.get("page", "1"))
+
+    @property
+    def limit(self) -> int:
+        return int(self.params.get("limit", "10"))
+
+
+CASES = (
+    SearchCase("short", {"q": "ba"}),
+    SearchCase("keyword", {"q": "banque"}),
+    SearchCase("long", {"q": "centre d'appels relation client service après-vente casablanca maarif"}),
+    SearchCase("accented_fr", {"q": "Santé bien-être à Fès"}),
+    SearchCase("arabic", {"q": "مطعم الدار البيضاء"}),
+    SearchCase("no_match", {"q": "zzqxjv"}),
+    SearchCase("empty", {"q": ""}, expect_status=400),
+    SearchCase("whitespace", {"q": "   "}, expect_status=400),
+    SearchCase("city", {"q": "banque", "city": "Casablanca"}),
+    SearchCase("category", {"q": "ma", "category": "Banque & Finance"}),
+    SearchCase("wide_page", {"q": "ma", "limit": "50"}),
+    SearchCase("deep_page", {"q": "ma", "page": "100", "limit": "10"}),
+    SearchCase("very_deep_page", {"q": "ma", "page": "1000", "limit": "10"}),
+)
+
+
+def route_query(case: SearchCase, count: bool) -> BenchQuery:
+    """The PostgREST request ``route.ts`` sends for ``case`` (first attempt, before its word-split retry)."""
+    pattern = f"*{case.params['q']}*"
+    params = {
+        "select": ROUTE_SELECT,
+        "or": "(" + ",".join(f"{column}.ilike.{pattern}" for column in ("name", "location", "description", "city")) + ")",
+        "order": ROUTE_ORDER,
+    }
+    if "category" in case.params:
+        params["category"] = f"eq.{case.params['category']}"
+    if "city" in case.params:
+        params["city"] = f"ilike.*{case.params['city']}*"
+    name = f"{case.name}:{'exact' if count else 'none'}"
+    offset = (case.page - 1) * case.limit
+    return BenchQuery(name, "businesses", params, page_size=case.limit, offset=offset, count=count)
+
+
+def sort_queries(term: str = "ma", deep_offset: int = 2000) -> list[BenchQuery]:
+    """``searchBusinesses`` orderings at page 1 and at ``deep_offset``, with and without exact count."""
+    queries = []
+    for (sort, order), offset, count in itertools.product(SORT_ORDERS.items(), (0, deep_offset), (True, False)):
+        name = f"sort_{sort}{'_deep' if offset else ''}:{'exact' if count else 'none'}"
+        queries.append(BenchQuery(name, "businesses", _search(term, order=order), offset=offset, count=count))
+    return queries
+
+
+@dataclass
+class RouteResult:
+    route: str
+    case: str
+    concurrency: int
+    requests: int
+    p50_ms: float | None
+    p95_ms: float | None
+    p99_ms: float | None
+    mean_bytes: int
+    statuses: dict[str, int]
+    unexpected: int
+    total: int | None = None
+    server_ms: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class SearchBenchOptions:
+    concurrency_levels: tuple[int, ...] = DEFAULT_CONCURRENCY_LEVELS
+    # Requests per case and concurrency level (at least the level itself).
+    requests: int = 20
+    db_runs: int = 10
+    timeout_s: float = 30.0
+    routes: tuple[str, ...] = ROUTES
+    cases: tuple[SearchCase, ...] = CASES
+    database: bool = True
+    distinct_ips: bool = False
+
+
+class SearchBench:
+    def __init__(self, origin: str, options: SearchBenchOptions | None = None) -> None:
+        self.origin = origin
+        self.options = options or SearchBenchOptions()
+        self._client_ips = (f"198.19.{index // 256}.{index % 256}" for index in itertools.count())
+
+    def _headers(self) -> dict[str, str]:
+        return {"x-forwarded-for": next(self._client_ips)} if self.options.distinct_ips else {}
+
+    async def _route_case(self, pool: ConnectionPool, route: str, case: SearchCase, concurrency: int) -> RouteResult:
+        path = f"{route}?{urlencode(case.params, quote_via=quote)}"
+        count = max(self.options.requests, concurrency)
+        timings: list[float] = []
+        server_ms: list[float] = []
+        sizes: list[int] = []
+        statuses: Counter = Counter()
+        totals: set[int] = set()
+        pending = iter(range(count))
+
+        async def client() -> None:
+            for _ in pending:
+                try:
+                    response = await pool.get(path, headers=self._headers())
+                except asyncio.TimeoutError:
+                    statuses["timeout"] += 1
+                    continue
+                except (HttpError, OSError) as exc:
+                    statuses[type(exc).__name__] += 1
+                    continue
+                statuses[str(response.status)] += 1
+                timings.append(response.total_ms)
+                body = response.content()
+                sizes.append(len(body))
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    continue
+                total = (payload.get("pagination") or {}).get("total")
+                if isinstance(total, int):
+                    totals.add(total)
+                reported = str((payload.get("meta") or {}).get("responseTime", "")).removesuffix("ms")
+                if reported.isdigit():
+                    server_ms.append(float(reported))
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return RouteResult(
+            route=route,
+            case=case.name,
+            concurrency=concurrency,
+            requests=count,
+            p50_ms=percentile(timings, 50),
+            p95_ms=percentile(timings, 95),
+            p99_ms=percentile(timings, 99),
+            mean_bytes=round(sum(sizes) / len(sizes)) if sizes else 0,
+            statuses=dict(sorted(statuses.items())),
+            unexpected=sum(value for status, value in statuses.items() if status != str(case.expect_status)),
+            total=max(totals) if totals else None,
+            server_ms=percentile(server_ms, 50),
+        )
+
+    async def run_routes(self) -> list[RouteResult]:
+        options = self.options
+        size = max(options.concurrency_levels)
+        results = []
+        async with ConnectionPool(self.origin, size=size, timeout=options.timeout_s) as pool:
+            # One request per route compiles it under `next dev` before anything is timed.
+            for route in options.routes:
+                try:
+                    await pool.get(f"{route}?q=warm", headers=self._headers())
+                except (HttpError, OSError, asyncio.TimeoutError):
+                    pass
+            for concurrency in options.concurrency_levels:
+                for case in options.cases:
+                    for route in options.routes:
+                        results.append(await self._route_case(pool, route, case, concurrency))
+        return results
+
+    async def run_database(self, supabase_url: str | None = None) -> list[dict[str, Any]]:
+        """Each route case and sort order with and without ``count=exact``, and the overhead."""
+        bench = QueryBench(supabase_url)
+        queries = [
+            route_query(case, count)
+            for case in self.options.cases
+            if case.expect_status == 200
+            for count in (True, False)
+        ] + sort_queries()
+        try:
+            measured = {query.name: await bench.run_query("current", query, self.options.db_runs) for query in queries}
+        finally:
+            await bench.close()
+        rows = []
+        for name in dict.fromkeys(key.split(":")[0] for key in measured):
+            exact, plain = measured[f"{name}:exact"], measured[f"{name}:none"]
+            overhead = (
+                round(exact.p50_ms - plain.p50_ms, 1) if exact.p50_ms is not None and plain.p50_ms is not None else None
+            )
+            rows.append({
+                "case": name,
+                "exact_p50_ms": exact.p50_ms,
+                "exact_p95_ms": exact.p95_ms,
+                "none_p50_ms": plain.p50_ms,
+                "none_p95_ms": plain.p95_ms,
+                "count_overhead_ms": overhead,
+                "rows": plain.rows,
+                "total": exact.total,
+                "response_bytes": plain.response_bytes,
+                "errors": exact.errors + plain.errors,
+                "error": exact.error or plain.error,
+            })
+        return rows
+
+    async def run(self, supabase_url: str | None = None) -> dict[str, Any]:
+        started_at = utc_now()
+        routes = await self.run_routes()
+        database: list[dict[str, Any]] = []
+        database_error = None
+        if self.options.database:
+            try:
+                database = await self.run_database(supabase_url)
+            except ValueError as exc:  # no Supabase credentials
+                database_error = str(exc)
+        return {
+            "revision": git_revision(),
+            "started_at": started_at,
+            "origin": self.origin,
+            "concurrency_levels": list(self.options.concurrency_levels),
+            "requests_per_case": self.options.requests,
+            "routes": [result.to_dict() for result in routes],
+            "database": database,
+            "database_error": database_error,
+        }
+
+
+def bench_path(revision: str, directory: Path = SEARCH_BENCH_DIR) -> Path:
+    return directory / f"{revision}.json"
+
+
+def write_search_bench(report: dict[str, Any], directory: Path = SEARCH_BENCH_DIR) -> Path:
+    path = bench_path(report["revision"], directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
+
+
+def load_search_bench(revision: str, directory: Path = SEARCH_BENCH_DIR) -> dict[str, Any] | None:
+    try:
+        return json.loads(bench_path(revision, directory).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def previous_revision(current: str, directory: Path = SEARCH_BENCH_DIR) -> str | None:
+    """The most recently written result file of another commit."""
+    files = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    return next((path.stem for path in files if path.stem != current), None)
+
+
+@dataclass
+class Regression:
+    key: str
+    before_ms: float
+    after_ms: float
+
+    @property
+    def change(self) -> float:
+        return (self.after_ms - self.before_ms) / self.before_ms if self.before_ms else 0.0
+
+
+def compare(before: dict[str, Any], after: dict[str, Any], threshold: float = 0.2) -> list[Regression]:
+    """p50s that grew by more than ``threshold`` (a fraction) between two reports."""
+
+    def p50s(report: dict[str, Any]) -> dict[str, float]:
+        values = {
+            f"{row['route']} {row['case']} c{row['concurrency']}": row["p50_ms"]
+            for row in report.get("routes", [])
+            if row.get("p50_ms")
+        }
+        for row in report.get("database", []):
+            for variant in ("exact", "none"):
+                if row.get(f"{variant}_p50_ms"):
+                    values[f"db {row['case']} {variant}"] = row[f"{variant}_p50_ms"]
+        return values
+
+    old, new = p50s(before), p50s(after)
+    regressions = [Regression(key, old[key], new[key]) for key in old.keys() & new.keys()]
+    return sorted(
+        (regression for regression in regressions if regression.change > threshold),
+        key=lambda regression: -regression.change,
+    )
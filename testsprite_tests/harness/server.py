@@ -0,0 +1,174 @@
+"""Harness-managed production server: cached ``next build``, one ``next start`` per shard.
+
+Against ``next dev`` the first visit of every route pays for compilation,
+so test durations say more about the compiler than the app. With
+``--server managed`` the harness
+
+1. hashes ``src/``, ``next.config.ts``, ``package-lock.json`` and the
+   ``NEXT_PUBLIC_*`` environment (inlined into the client bundle) and runs
+   ``next build`` only when the hash differs from the one stored next to
+   the last build in ``.next/``,
+2. starts ``next start`` on ``--server-port`` (one instance per worker
+   process, on consecutive ports),
+3. waits for ``/api/health`` on each,
+4. stops every instance when the run ends, even on failure.
+
+Build and server output go to ``tmp/server/``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import shutil
+import signal
+import subprocess
+from pathlib import Path
+
+from .config import REPO_ROOT, TMP_DIR
+from .http import ConnectionPool
+from .warmup import CircuitBreaker, ServerUnavailable, WarmupPolicy, wait_healthy
+
+SERVER_DIR = TMP_DIR / "server"
+BUILD_DIR = REPO_ROOT / ".next"
+BUILD_HASH_PATH = BUILD_DIR / "harness-build-hash"
+BUILD_INPUTS = ("src", "next.config.ts", "package-lock.json")
+DEFAULT_SERVER_PORT = 3100
+STOP_TIMEOUT_S = 10.0
+
+
+class ServerError(Exception):
+    """Building or starting the production server failed."""
+
+
+def build_hash(root: Path = REPO_ROOT) -> str:
+    digest = hashlib.sha256()
+    for name in BUILD_INPUTS:
+        base = root / name
+        files = sorted(path for path in base.rglob("*") if path.is_file()) if base.is_dir() else [base]
+        for path in files:
+            if not path.exists():
+                continue
+            digest.update(path.relative_to(root).as_posix().encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    for key in sorted(key for key in os.environ if key.startswith("NEXT_PUBLIC_")):
+        digest.update(f"{key}={os.environ[key]}".encode())
+    return digest.hexdigest()
+
+
+def _tail(path: Path, lines: int = 20) -> str:
+    try:
+        return "\n".join(path.read_text(encoding="utf-8", errors="replace").splitlines()[-lines:])
+    except OSError:
+        return ""
+
+
+def _next_command(*args: str) -> list[str]:
+    npx = shutil.which("npx")
+    if npx is None:
+        raise ServerError("npx not found on PATH; install Node.js to use --server managed")
+    return [npx, "next", *args]
+
+
+def ensure_build(force: bool = False) -> bool:
+    """Run ``next build`` unless ``.next`` was built from the same inputs; True if it built."""
+    digest = build_hash()
+    current = BUILD_HASH_PATH.read_text(encoding="utf-8").strip() if BUILD_HASH_PATH.exists() else None
+    if not force and current == digest and (BUILD_DIR / "BUILD_ID").exists():
+        return False
+    SERVER_DIR.mkdir(parents=True, exist_ok=True)
+    log_path = SERVER_DIR / "build.log"
+    with log_path.open("w", encoding="utf-8") as log:
+        completed = subprocess.run(_next_command("build"), cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)
+    if completed.returncode != 0:
+        raise ServerError(f"next build exited with {completed.returncode}; see {log_path}:\n{_tail(log_path)}")
+    BUILD_HASH_PATH.write_text(digest + "\n", encoding="utf-8")
+    return True
+
+
+class ManagedServers:
+    """``next start`` instances on consecutive ports, stopped on exit."""
+
+    def __init__(self, count: int = 1, port: int = DEFAULT_SERVER_PORT, ready_timeout_s: float = 60.0) -> None:
+        self.ports = [port + offset for offset in range(count)]
+        self.ready_timeout_s = ready_timeout_s
+        self._processes: list[subprocess.Popen] = []
+
+    @property
+    def origins(self) -> list[str]:
+        return [f"http://localhost:{port}" for port in self.ports]
+
+    def __enter__(self) -> "ManagedServers":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def _log_path(self, port: int) -> Path:
+        return SERVER_DIR / f"start-{port}.log"
+
+    def start(self) -> None:
+        SERVER_DIR.mkdir(parents=True, exist_ok=True)
+        # A process group per server, so stopping it also stops the node child npx spawns.
+        isolation = (
+            {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt" else {"start_new_session": True}
+        )
+        try:
+            for port in self.ports:
+                with self._log_path(port).open("w", encoding="utf-8") as log:
+                    self._processes.append(
+                        subprocess.Popen(
+                            _next_command("start", "-p", str(port)),
+                            cwd=REPO_ROOT,
+                            stdout=log,
+                            stderr=subprocess.STDOUT,
+                            env={**os.environ, "PORT": str(port)},
+                            **isolation,
+                        )
+                    )
+            asyncio.run(self._wait_ready())
+        except BaseException:
+            self.stop()
+            raise
+
+    async def _wait_ready(self) -> None:
+        policy = WarmupPolicy(health_timeout_s=self.ready_timeout_s, poll_interval_s=0.5)
+
+        async def ready(port: int, process: subprocess.Popen) -> None:
+            async with ConnectionPool(f"http://localhost:{port}", size=1, timeout=policy.route_timeout_s) as pool:
+                waiting = asyncio.ensure_future(wait_healthy(pool, policy, CircuitBreaker(policy.breaker_threshold)))
+                while not waiting.done():
+                    if process.poll() is not None:
+                        waiting.cancel()
+                        log = self._log_path(port)
+                        raise ServerError(f"next start on port {port} exited with {process.returncode}:\n{_tail(log)}")
+                    await asyncio.wait({waiting}, timeout=0.5)
+                try:
+                    waiting.result()
+                except ServerUnavailable as exc:
+                    raise ServerError(f"{exc}\nServer log ({self._log_path(port)}):\n{_tail(self._log_path(port))}")
+
+        await asyncio.gather(*(ready(port, process) for port, process in zip(self.ports, self._processes)))
+
+    def stop(self) -> None:
+        processes, self._processes = self._processes, []
+        for process in processes:
+            if process.poll() is None:
+                with contextlib.suppress(ProcessLookupError):
+                    if os.name == "nt":
+                        process.send_signal(signal.CTRL_BREAK_EVENT)
+                    else:
+                        os.killpg(process.pid, signal.SIGTERM)
+        for process in processes:
+            try:
+                process.wait(timeout=STOP_TIMEOUT_S)
+            except subprocess.TimeoutExpired:
+                with contextlib.suppress(ProcessLookupError):
+                    if os.name == "nt":
+                        process.kill()
+                    else:
+                        os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
@@ -0,0 +1,86 @@
+"""Stand-ins that let a generated TC script run inside the shared browser.
+
+The scripts call ``async_api.async_playwright().start()``, launch Chromium,
+open a context and tear all three down in ``finally``. The runner swaps the
+module's ``async_api`` for an overlay whose ``async_playwright()`` returns a
+:class:`SharedPlaywright`: launching yields a :class:`SharedBrowser` that
+hands out fresh contexts on the long-lived browser, and ``close``/``stop``
+only release what that one test opened.
+
+Contexts are handed out wrapped in a :class:`~harness.proxies.ContextProxy`
+so the test's :class:`~harness.proxies.TestSession` sees every page and
+action.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import types
+from typing import Any, Awaitable, Callable
+
+from playwright.async_api import BrowserContext
+
+from .proxies import TestSession
+
+ContextFactory = Callable[..., Awaitable[BrowserContext]]
+
+
+class ModuleOverlay:
+    """Read-through view of a module with a few attributes replaced."""
+
+    def __init__(self, module: types.ModuleType, **overrides: Any) -> None:
+        self._module = module
+        self.__dict__.update(overrides)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._module, name)
+
+
+class SharedBrowser:
+    """What a TC script gets back from ``chromium.launch()``."""
+
+    def __init__(self, new_context: ContextFactory) -> None:
+        self._new_context = new_context
+        self.contexts: list[BrowserContext] = []
+
+    async def new_context(self, **kwargs: Any) -> BrowserContext:
+        context = await self._new_context(**kwargs)
+        self.contexts.append(context)
+        return context
+
+    async def close(self) -> None:
+        while self.contexts:
+            context = self.contexts.pop()
+            try:
+                await context.close()
+            except Exception:
+                # Already closed by the script's own finally block.
+                pass
+
+
+class SharedPlaywright:
+    """What a TC script gets back from ``async_playwright().start()``."""
+
+    def __init__(self, browser: SharedBrowser) -> None:
+        self._browser = browser
+
+    async def start(self) -> "SharedPlaywright":
+        return self
+
+    async def stop(self) -> None:
+        await self._browser.close()
+
+    @property
+    def chromium(self) -> "SharedPlaywright":
+        return self
+
+    async def launch(self, **_: Any) -> SharedBrowser:
+        return self._browser
+
+
+def patch_module(module: types.ModuleType, browser: SharedBrowser, session: TestSession) -> None:
+    """Point ``module`` at ``browser`` and route its sleeps through ``session``."""
+    shared = SharedPlaywright(browser)
+    module.async_api = ModuleOverlay(module.async_api, async_playwright=lambda: shared)
+    module.asyncio = ModuleOverlay(asyncio, sleep=session.sleep)
+    module.expect = session.expect
@@ -0,0 +1,135 @@
+"""Split the suite into duration-balanced shards and merge their results.
+
+Shards are planned from each test's last ``durationMs`` in
+``tmp/test_results.json`` with the longest-processing-time-first greedy
+rule: tests are taken slowest first and each goes to the shard with the
+least total so far. Every node computes the same plan from the same history
+file, so ``--shard 2/4`` on one CI machine and ``--shard 3/4`` on another
+never overlap.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import os
+import statistics
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from .config import RESULTS_PATH, SUITE_DIR, TMP_DIR
+from .discovery import TestCase
+from .results import TestResult, load_entries, test_id_of
+
+SHARDS_DIR = TMP_DIR / "shards"
+
+# Used for tests with no history when there is nothing to take a median of.
+DEFAULT_DURATION_MS = 30_000.0
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    index: int  # 1-based
+    total: int
+
+    @classmethod
+    def parse(cls, text: str) -> "ShardSpec":
+        try:
+            index, total = (int(part) for part in text.split("/"))
+        except ValueError:
+            raise ValueError(f"shard must look like 'i/N', got {text!r}") from None
+        if total < 1 or not 1 <= index <= total:
+            raise ValueError(f"shard index must be between 1 and {total}, got {text!r}")
+        return cls(index, total)
+
+    @property
+    def results_path(self) -> Path:
+        return SHARDS_DIR / f"shard-{self.index:02d}-of-{self.total:02d}.json"
+
+    @property
+    def summary_path(self) -> Path:
+        return SHARDS_DIR / f"summary-{self.index:02d}-of-{self.total:02d}.json"
+
+
+def historical_durations(path: Path = RESULTS_PATH) -> dict[str, float]:
+    durations = {}
+    for entry in load_entries(path):
+        duration = entry.get("durationMs")
+        if isinstance(duration, (int, float)) and duration > 0:
+            durations[test_id_of(entry.get("title", ""))] = float(duration)
+    return durations
+
+
+def plan_shards(cases: list[TestCase], total: int, durations: dict[str, float]) -> list[list[TestCase]]:
+    """Distribute ``cases`` over ``total`` shards with near-equal expected time."""
+    known = [durations[case.test_id] for case in cases if case.test_id in durations]
+    fallback = statistics.median(known) if known else DEFAULT_DURATION_MS
+
+    def expected(case: TestCase) -> float:
+        return durations.get(case.test_id, fallback)
+
+    shards: list[list[TestCase]] = [[] for _ in range(total)]
+    # (load, index) keeps ties deterministic across machines.
+    loads = [(0.0, index) for index in range(total)]
+    for case in sorted(cases, key=lambda case: (-expected(case), case.test_id)):
+        load, index = heapq.heappop(loads)
+        shards[index].append(case)
+        heapq.heappush(loads, (load + expected(case), index))
+    for shard in shards:
+        shard.sort(key=lambda case: case.test_id)
+    return shards
+
+
+def select_shard(cases: list[TestCase], spec: ShardSpec, path: Path = RESULTS_PATH) -> list[TestCase]:
+    return plan_shards(cases, spec.total, historical_durations(path))[spec.index - 1]
+
+
+def write_shard(results: list[TestResult], spec: ShardSpec) -> Path:
+    path = spec.results_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"shard": spec.index, "total": spec.total, "results": [result.to_dict() for result in results]}
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
+
+
+def load_shards(directory: Path = SHARDS_DIR) -> list[TestResult]:
+    """Read every shard file in ``directory``; later files win on duplicate ids."""
+    merged: dict[str, TestResult] = {}
+    for path in sorted(directory.glob("shard-*.json")):
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        for data in payload.get("results", []):
+            result = TestResult.from_dict(data)
+            merged[result.test_id] = result
+    return [merged[test_id] for test_id in sorted(merged)]
+
+
+def clear_shards(directory: Path = SHARDS_DIR) -> None:
+    for pattern in ("shard-*.json", "summary-*.json"):
+        for path in directory.glob(pattern):
+            path.unlink()
+
+
+async def run_processes(total: int, passthrough: list[str], origins: list[str] | None = None) -> list[int]:
+    """Run shard ``1..total`` as separate ``python -m harness run`` processes.
+
+    Returns the exit codes in shard order. Output from the workers is
+    inherited, each line already tagged with its test title. With
+    ``origins``, shard ``i`` targets ``origins[i - 1]``.
+    """
+    processes = [
+        await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "harness",
+            "run",
+            "--shard",
+            f"{index}/{total}",
+            *passthrough,
+            cwd=SUITE_DIR,
+            env={**os.environ, "TESTSPRITE_BASE_URL": origins[index - 1]} if origins else None,
+        )
+        for index in range(1, total + 1)
+    ]
+    return list(await asyncio.gather(*(process.wait() for process in processes)))
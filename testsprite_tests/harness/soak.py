@@ -0,0 +1,281 @@
+"""Soak test: JS heap and DOM growth over hundreds of dashboard navigations.
+
+Pro users keep ``/dashboard`` open for hours and move between its sections
+without reloading. :func:`soak` signs in as the ``pro`` role through the
+same cached session the TC runs use, opens ``/dashboard`` once and then
+loops over ``SoakOptions.paths`` with client-side navigation: clicking the
+page's own link to the next section, or ``window.next.router.push`` when
+there is none. A full page load is the last resort and is counted, since
+it resets exactly the state being measured.
+
+Every ``sample_every`` iterations the page is garbage-collected through
+CDP and sampled: ``Runtime.getHeapUsage`` for the JS heap and
+``Memory.getDOMCounters`` for DOM nodes, event listeners and documents.
+After ``warmup`` iterations, a least-squares line is fitted to each
+series. Growth per iteration above its threshold is a leak; ``r2`` says
+how steady the growth is.
+
+When a leak is found, two heap snapshots are written to
+``tmp/soak/<stamp>/``: one at the end of the loop and one after
+``confirm`` more iterations. Load both in DevTools and view "Objects
+allocated between snapshots" to see what is retained. Clean runs save none.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import CDPSession, Page, async_playwright
+from playwright.async_api import Error as PlaywrightError
+
+from .auth import AuthStateCache, configured_roles
+from .config import BROWSER_ARGS, TMP_DIR, base_url, git_revision
+from .results import utc_now
+from .waits import WaitPolicy, Waiter, WaitTimeout
+
+SOAK_DIR = TMP_DIR / "soak"
+DEFAULT_PATHS = ("/dashboard", "/dashboard/reviews", "/dashboard/messages", "/dashboard/premium")
+SERIES = ("heap_used", "nodes", "listeners")
+
+PUSH_SCRIPT = """(path) => {
+    const router = window.next && window.next.router;
+    if (!router || typeof router.push !== 'function') return false;
+    router.push(path);
+    return true;
+}"""
+
+
+class SoakError(RuntimeError):
+    """The loop cannot run: no credentials, or the session was lost."""
+
+
+@dataclass
+class SoakOptions:
+    iterations: int = 200
+    sample_every: int = 10
+    # Iterations excluded from the trend while caches and lazy chunks fill up.
+    warmup: int = 20
+    paths: tuple[str, ...] = DEFAULT_PATHS
+    role: str = "pro"
+    # Growth per iteration that counts as a leak.
+    heap_threshold_kb: float = 50.0
+    node_threshold: float = 5.0
+    listener_threshold: float = 1.0
+    snapshots: bool = True
+    confirm: int = 20
+    headless: bool = True
+    step_timeout_s: float = 20.0
+
+
+@dataclass
+class Sample:
+    iteration: int
+    elapsed_s: float
+    heap_used: int
+    heap_total: int
+    nodes: int
+    listeners: int
+    documents: int
+
+
+@dataclass
+class Trend:
+    series: str
+    slope: float
+    r2: float
+    threshold: float
+    first: float
+    last: float
+
+    @property
+    def leaking(self) -> bool:
+        return self.slope > self.threshold
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "slope": round(self.slope, 2), "r2": round(self.r2, 3), "leaking": self.leaking}
+
+
+@dataclass
+class SoakResult:
+    started_at: str
+    origin: str
+    options: dict[str, Any]
+    samples: list[Sample] = field(default_factory=list)
+    trends: list[Trend] = field(default_factory=list)
+    navigations: dict[str, int] = field(default_factory=dict)
+    snapshots: list[str] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    @property
+    def leaking(self) -> bool:
+        return any(trend.leaking for trend in self.trends)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "revision": git_revision(),
+            "origin": self.origin,
+            "options": self.options,
+            "leaking": self.leaking,
+            "elapsed_s": round(self.elapsed_s, 1),
+            "navigations": self.navigations,
+            "trends": [trend.to_dict() for trend in self.trends],
+            "snapshots": self.snapshots,
+            "samples": [asdict(sample) for sample in self.samples],
+        }
+
+
+def fit(points: list[tuple[float, float]]) -> tuple[float, float]:
+    """Least-squares ``(slope, r²)`` of ``points``; ``(0, 0)`` with fewer than three."""
+    if len(points) < 3:
+        return 0.0, 0.0
+    count = len(points)
+    mean_x = sum(x for x, _ in points) / count
+    mean_y = sum(y for _, y in points) / count
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    syy = sum((y - mean_y) ** 2 for _, y in points)
+    if not sxx:
+        return 0.0, 0.0
+    slope = sxy / sxx
+    return slope, (sxy * sxy / (sxx * syy)) if syy else 0.0
+
+
+def trends(samples: list[Sample], options: SoakOptions) -> list[Trend]:
+    steady = [sample for sample in samples if sample.iteration >= options.warmup]
+    thresholds = {
+        "heap_used": options.heap_threshold_kb * 1024,
+        "nodes": options.node_threshold,
+        "listeners": options.listener_threshold,
+    }
+    result = []
+    for series in SERIES:
+        slope, r2 = fit([(sample.iteration, getattr(sample, series)) for sample in steady])
+        values = [getattr(sample, series) for sample in steady] or [0]
+        result.append(Trend(series, slope, r2, thresholds[series], values[0], values[-1]))
+    return result
+
+
+async def sample(cdp: CDPSession, iteration: int, started: float) -> Sample:
+    await cdp.send("HeapProfiler.collectGarbage")
+    heap = await cdp.send("Runtime.getHeapUsage")
+    counters = await cdp.send("Memory.getDOMCounters")
+    return Sample(
+        iteration,
+        round(time.perf_counter() - started, 1),
+        int(heap["usedSize"]),
+        int(heap["totalSize"]),
+        counters["nodes"],
+        counters["jsEventListeners"],
+        counters["documents"],
+    )
+
+
+async def take_snapshot(cdp: CDPSession, path: Path) -> Path:
+    chunks: list[str] = []
+
+    def collect(params: dict[str, Any]) -> None:
+        chunks.append(params["chunk"])
+
+    cdp.on("HeapProfiler.addHeapSnapshotChunk", collect)
+    try:
+        await cdp.send("HeapProfiler.collectGarbage")
+        await cdp.send("HeapProfiler.takeHeapSnapshot", {"reportProgress": False})
+    finally:
+        cdp.remove_listener("HeapProfiler.addHeapSnapshotChunk", collect)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(chunks), encoding="utf-8")
+    return path
+
+
+class _Navigator:
+    """Client-side navigation between dashboard sections, counted by method."""
+
+    def __init__(self, page: Page, origin: str, waiter: Waiter, timeout_ms: float) -> None:
+        self.page = page
+        self.origin = origin
+        self.waiter = waiter
+        self.timeout_ms = timeout_ms
+        self.counts = {"link": 0, "router": 0, "reload": 0}
+
+    async def go(self, path: str) -> None:
+        link = self.page.locator(f'a[href="{path}"]').first
+        if await link.count() and await link.is_visible():
+            await link.click()
+            self.counts["link"] += 1
+        elif await self.page.evaluate(PUSH_SCRIPT, path):
+            self.counts["router"] += 1
+        else:
+            await self.page.goto(self.origin + path, wait_until="commit")
+            self.counts["reload"] += 1
+        try:
+            await self.page.wait_for_url(lambda url: urlsplit(url).path == path, timeout=self.timeout_ms)
+        except PlaywrightError:
+            where = urlsplit(self.page.url).path
+            hint = " (session lost?)" if "login" in where else ""
+            raise SoakError(f"navigating to {path} ended on {where}{hint}") from None
+        try:
+            await self.waiter.page_ready(self.page)
+        except WaitTimeout:
+            pass  # a section that never goes quiet still counts as visited
+
+
+async def soak(options: SoakOptions | None = None, directory: Path = SOAK_DIR) -> SoakResult:
+    options = options or SoakOptions()
+    roles = configured_roles()
+    if options.role not in roles:
+        variable = f"TESTSPRITE_{options.role.upper()}"
+        raise SoakError(f"no credentials for role {options.role!r}: set {variable}_EMAIL and {variable}_PASSWORD")
+    origin = base_url()
+    result = SoakResult(utc_now(), origin, asdict(options))
+    stamp = result.started_at.replace(":", "").replace("-", "").split(".")[0]
+    started = time.perf_counter()
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=options.headless, args=BROWSER_ARGS)
+        try:
+            state = await AuthStateCache(browser, "soak").state(roles[options.role])
+            context = await browser.new_context(storage_state=state, viewport={"width": 1280, "height": 720})
+            page = await context.new_page()
+            cdp = await context.new_cdp_session(page)
+            waiter = Waiter(WaitPolicy(step_timeout_ms=options.step_timeout_s * 1000))
+            waiter.track(page)
+            navigator = _Navigator(page, origin, waiter, options.step_timeout_s * 1000)
+            await page.goto(origin + options.paths[0], wait_until="load")
+            if urlsplit(page.url).path != options.paths[0]:
+                raise SoakError(f"{options.paths[0]} redirected to {urlsplit(page.url).path}")
+
+            async def loop(first: int, last: int) -> None:
+                for iteration in range(first, last + 1):
+                    for path in (*options.paths[1:], options.paths[0]):
+                        await navigator.go(path)
+                    if iteration % options.sample_every == 0 or iteration == last:
+                        result.samples.append(await sample(cdp, iteration, started))
+
+            result.samples.append(await sample(cdp, 0, started))
+            await loop(1, options.iterations)
+            result.trends = trends(result.samples, options)
+            if result.leaking and options.snapshots:
+                snapshot_dir = directory / stamp
+                path = await take_snapshot(cdp, snapshot_dir / f"after-{options.iterations}.heapsnapshot")
+                result.snapshots.append(str(path))
+                await loop(options.iterations + 1, options.iterations + options.confirm)
+                total = options.iterations + options.confirm
+                result.snapshots.append(str(await take_snapshot(cdp, snapshot_dir / f"after-{total}.heapsnapshot")))
+            result.navigations = navigator.counts
+        finally:
+            await browser.close()
+    result.elapsed_s = time.perf_counter() - started
+    return result
+
+
+def write_soak(result: SoakResult, directory: Path = SOAK_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = result.started_at.replace(":", "").replace("-", "").split(".")[0]
+    path = directory / f"soak-{stamp}.json"
+    path.write_text(json.dumps(result.to_dict(), indent=2) + "\n", encoding="utf-8")
+    return path
@@ -0,0 +1,399 @@
+"""Local record/replay stand-in for Supabase REST (PostgREST) and Auth (GoTrue).
+
+The app is pointed at the stand-in through ``NEXT_PUBLIC_SUPABASE_URL``
+(both the browser client and the server components read it), so every
+Supabase call of a test run goes through one local HTTP server:
+
+``record``
+    forwards each request to the real project and appends the exchange to
+    ``tmp/supabase/recording.jsonl``,
+``replay``
+    answers from that file without any network access.
+
+Requests are matched on method, path, query and JSON/form body with
+volatile parts removed: timestamps, PKCE verifiers, captcha and refresh
+tokens, cache-busting query parameters, and the bearer token itself, of
+which only the role and user id count. ``Prefer``, ``Accept`` and
+``Range`` stay in the key since they change PostgREST's answer.
+
+Writes are stateful. Each exchange is stored with the number of
+successful writes its table had seen from the same caller (role and user
+id) at that point (its *epoch*). In replay a write advances that caller's
+epoch like it did when recording, and a read is answered with the
+recording made at the same epoch, or the closest earlier one, so reading a
+table after inserting a review returns the list that includes it. Keeping
+the count per caller stops one test's writes from moving the replay of
+tests running beside it as another user. Auth token responses get a fresh
+``expires_at`` so recorded sessions are not treated as expired.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from .config import TMP_DIR, dotenv
+from .http import ConnectionPool, HttpError, read_body, read_headers
+
+STANDIN_DIR = TMP_DIR / "supabase"
+RECORDING_PATH = STANDIN_DIR / "recording.jsonl"
+MISSES_PATH = STANDIN_DIR / "misses.jsonl"
+DEFAULT_STANDIN_PORT = 54399
+MODES = ("record", "replay")
+
+VOLATILE_FIELDS = {
+    "created_at",
+    "updated_at",
+    "code_verifier",
+    "code_challenge",
+    "gotrue_meta_security",
+    "captcha_token",
+    "refresh_token",
+    "nonce",
+}
+VOLATILE_PARAMS = {"_", "t", "timestamp", "cacheBust"}
+KEY_HEADERS = ("prefer", "accept", "range")
+WRITE_METHODS = {"POST", "PATCH", "PUT", "DELETE"}
+# Recomputed for the forwarded or replayed response rather than copied.
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "content-encoding", "date"}
+
+
+class StandInError(Exception):
+    """The stand-in cannot start (no recording, no upstream)."""
+
+
+def upstream_url() -> str | None:
+    """The real project URL: ``TESTSPRITE_SUPABASE_UPSTREAM``, else the app's ``NEXT_PUBLIC_SUPABASE_URL``."""
+    return os.environ.get("TESTSPRITE_SUPABASE_UPSTREAM") or dotenv("NEXT_PUBLIC_SUPABASE_URL")
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _strip_volatile(item) for key, item in sorted(value.items()) if key not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_strip_volatile(item) for item in value]
+    return value
+
+
+def normalize_body(body: bytes, content_type: str) -> str:
+    if not body:
+        return ""
+    if "json" in content_type:
+        try:
+            return json.dumps(_strip_volatile(json.loads(body)), sort_keys=True)
+        except ValueError:
+            pass
+    elif "x-www-form-urlencoded" in content_type:
+        pairs = parse_qsl(body.decode("utf-8", errors="replace"), keep_blank_values=True)
+        return urlencode(sorted((key, value) for key, value in pairs if key not in VOLATILE_FIELDS))
+    return hashlib.sha256(body).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    pairs = parse_qsl(query, keep_blank_values=True)
+    return urlencode(sorted((key, value) for key, value in pairs if key not in VOLATILE_PARAMS))
+
+
+def identity(headers: dict[str, str]) -> str:
+    """``role:sub`` from the bearer JWT (unverified); tokens themselves change every login."""
+    token = headers.get("authorization", "").removeprefix("Bearer ").strip()
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return "none"
+    return f"{claims.get('role', '')}:{claims.get('sub', '')}"
+
+
+def resource_of(path: str) -> str:
+    """State bucket a request reads or writes: a table, an RPC, or an Auth/Storage endpoint."""
+    parts = [part for part in path.split("/") if part]
+    if parts[:2] == ["rest", "v1"] and len(parts) > 2:
+        return f"rpc:{parts[3]}" if parts[2] == "rpc" and len(parts) > 3 else parts[2]
+    return "/".join(parts[:3])
+
+
+def is_write(method: str, path: str) -> bool:
+    # PostgREST RPCs are called with POST but are reads for our purposes.
+    return method in WRITE_METHODS and path.startswith("/rest/v1/") and not path.startswith("/rest/v1/rpc/")
+
+
+def request_key(method: str, target: str, headers: dict[str, str], body: bytes) -> str:
+    parts = urlsplit(target)
+    material = [
+        method,
+        parts.path,
+        normalize_query(parts.query),
+        identity(headers),
+        *(f"{name}={headers.get(name, '')}" for name in KEY_HEADERS),
+        normalize_body(body, headers.get("content-type", "")),
+    ]
+    return hashlib.sha256("\n".join(material).encode()).hexdigest()[:24]
+
+
+@dataclass
+class Exchange:
+    key: str
+    method: str
+    target: str
+    resource: str
+    epoch: int
+    status: int
+    headers: dict[str, str]
+    body: str
+    body_encoding: str = "utf-8"
+
+    def payload(self) -> bytes:
+        return base64.b64decode(self.body) if self.body_encoding == "base64" else self.body.encode("utf-8")
+
+    @classmethod
+    def capture(
+        cls, key: str, method: str, target: str, epoch: int, status: int, headers: dict[str, str], body: bytes
+    ) -> "Exchange":
+        try:
+            text, encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(body).decode("ascii"), "base64"
+        kept = {name: value for name, value in headers.items() if name not in HOP_HEADERS}
+        path = urlsplit(target).path
+        return cls(key, method, target, resource_of(path), epoch, status, kept, text, encoding)
+
+
+def load_recording(path: Path = RECORDING_PATH) -> dict[str, list[Exchange]]:
+    """Exchanges by key, in epoch order."""
+    by_key: dict[str, list[Exchange]] = defaultdict(list)
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        raise StandInError(f"no recording at {path}; run with --supabase record first")
+    for line in lines:
+        if line.strip():
+            exchange = Exchange(**json.loads(line))
+            by_key[exchange.key].append(exchange)
+    for exchanges in by_key.values():
+        exchanges.sort(key=lambda exchange: exchange.epoch)
+    return by_key
+
+
+@dataclass(frozen=True)
+class ObservedCall:
+    """One request the stand-in answered, as reported to :attr:`SupabaseStandIn.observers`."""
+
+    method: str
+    target: str
+    key: str
+    status: int
+    response_bytes: int
+    started: float
+    finished: float
+    # Browsers send Origin on cross-origin fetches; the Next server's own calls do not.
+    from_browser: bool
+
+
+def _fresh_session(body: bytes) -> bytes:
+    """Move a recorded GoTrue session's expiry to ``now + expires_in``."""
+    try:
+        session = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(session, dict) or "expires_in" not in session:
+        return body
+    session["expires_at"] = int(time.time()) + int(session["expires_in"])
+    return json.dumps(session).encode()
+
+
+class SupabaseStandIn:
+    def __init__(
+        self,
+        mode: str,
+        port: int = DEFAULT_STANDIN_PORT,
+        upstream: str | None = None,
+        recording: Path = RECORDING_PATH,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.port = port
+        self.recording = recording
+        self.upstream = (upstream or upstream_url() or "").rstrip("/")
+        if mode == "record" and not self.upstream:
+            raise StandInError("recording needs the real project URL: set TESTSPRITE_SUPABASE_UPSTREAM")
+        self.exchanges = load_recording(recording) if mode == "replay" else {}
+        # Successful writes per (resource, caller identity).
+        self.epochs: Counter = Counter()
+        self.stats: Counter = Counter()
+        # Called from the stand-in's thread for every non-preflight request.
+        self.observers: list[Callable[[ObservedCall], None]] = []
+        self._lock = asyncio.Lock()
+        self._server: asyncio.AbstractServer | None = None
+        self._pool: ConnectionPool | None = None
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> None:
+        if self.mode == "record":
+            STANDIN_DIR.mkdir(parents=True, exist_ok=True)
+            self.recording.write_text("", encoding="utf-8")
+            self._pool = ConnectionPool(self.upstream, size=32, headers={"accept-encoding": "identity"})
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", self.port)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool:
+            await self._pool.close()
+
+    def start_in_thread(self) -> None:
+        """Serve from a background event loop so a synchronous caller can keep going."""
+        started = threading.Event()
+        failure: list[BaseException] = []
+
+        def serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.start())
+            except BaseException as exc:
+                failure.append(exc)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name="supabase-standin", daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            raise StandInError(f"stand-in could not listen on {self.url}: {failure[0]}")
+
+    def stop_thread(self) -> None:
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+
+    def summary(self) -> dict[str, Any]:
+        return {"mode": self.mode, **dict(self.stats)}
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers, _ = await read_headers(reader)
+                body = await read_body(reader, headers)
+                started = time.time()
+                status, response_headers, payload = await self._respond(method, target, headers, body)
+                if self.observers and method != "OPTIONS":
+                    call = ObservedCall(
+                        method, target, request_key(method, target, headers, body), status, len(payload),
+                        started, time.time(), "origin" in headers,
+                    )
+                    for observer in self.observers:
+                        observer(call)
+                self._write(writer, status, response_headers, payload, headers.get("origin"))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, HttpError):
+            pass
+        finally:
+            writer.close()
+
+    def _write(
+        self, writer: asyncio.StreamWriter, status: int, headers: dict[str, str], payload: bytes, origin: str | None
+    ) -> None:
+        headers = {name: value for name, value in headers.items() if name not in HOP_HEADERS}
+        if origin and "access-control-allow-origin" in headers:
+            headers["access-control-allow-origin"] = origin  # the app may run on another port than when recorded
+        headers["content-length"] = str(len(payload))
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        head = f"HTTP/1.1 {status} {reason}\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + payload)
+
+    async def _respond(
+        self, method: str, target: str, headers: dict[str, str], body: bytes
+    ) -> tuple[int, dict[str, str], bytes]:
+        if method == "OPTIONS":
+            return self._preflight(headers)
+        key = request_key(method, target, headers, body)
+        state = (resource_of(urlsplit(target).path), identity(headers))
+        if self.mode == "record":
+            return await self._record(key, method, target, state, headers, body)
+        return await self._replay(key, method, target, state)
+
+    def _preflight(self, headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        self.stats["preflight"] += 1
+        return 200, {
+            "access-control-allow-origin": headers.get("origin", "*"),
+            "access-control-allow-credentials": "true",
+            "access-control-allow-methods": "GET, POST, PATCH, PUT, DELETE, OPTIONS",
+            "access-control-allow-headers": headers.get("access-control-request-headers", "*"),
+            "access-control-max-age": "600",
+        }, b""
+
+    async def _record(
+        self, key: str, method: str, target: str, state: tuple[str, str], headers: dict[str, str], body: bytes
+    ) -> tuple[int, dict[str, str], bytes]:
+        dropped = HOP_HEADERS | {"host", "accept-encoding"}
+        forwarded = {name: value for name, value in headers.items() if name not in dropped}
+        assert self._pool is not None
+        try:
+            response = await self._pool.request(method, target, headers=forwarded, body=body or None)
+        except (HttpError, OSError, asyncio.TimeoutError) as exc:
+            self.stats["upstream_errors"] += 1
+            message = {"message": f"upstream {self.upstream} failed: {exc}", "code": "STANDIN_UPSTREAM"}
+            return 502, {"content-type": "application/json"}, json.dumps(message).encode()
+        async with self._lock:
+            epoch = self.epochs[state]
+            exchange = Exchange.capture(key, method, target, epoch, response.status, response.headers, response.body)
+            if is_write(method, urlsplit(target).path) and response.ok:
+                self.epochs[state] += 1
+            with self.recording.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(asdict(exchange), ensure_ascii=False) + "\n")
+        self.stats["recorded"] += 1
+        return response.status, response.headers, response.body
+
+    async def _replay(
+        self, key: str, method: str, target: str, state: tuple[str, str]
+    ) -> tuple[int, dict[str, str], bytes]:
+        candidates = self.exchanges.get(key)
+        if not candidates:
+            self.stats["misses"] += 1
+            STANDIN_DIR.mkdir(parents=True, exist_ok=True)
+            with MISSES_PATH.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps({"method": method, "target": target, "key": key}) + "\n")
+            message = {"message": f"no recorded response for {method} {target}", "code": "STANDIN_MISS"}
+            return 501, {"content-type": "application/json"}, json.dumps(message).encode()
+        async with self._lock:
+            epoch = self.epochs[state]
+            earlier = [exchange for exchange in candidates if exchange.epoch <= epoch]
+            exchange = earlier[-1] if earlier else candidates[0]
+            if is_write(method, urlsplit(target).path) and exchange.status < 400:
+                self.epochs[state] += 1
+        self.stats["replayed"] += 1
+        payload = exchange.payload()
+        if urlsplit(target).path.startswith("/auth/v1/token"):
+            payload = _fresh_session(payload)
+        return exchange.status, dict(exchange.headers), payload
@@ -0,0 +1,158 @@
+"""Serve immutable Next.js assets and public images from a local disk cache.
+
+Every fresh context would otherwise download the same ``/_next/static``
+chunks, fonts and ``public/`` images again. :class:`StaticCache` routes
+those requests through a content-addressed store under
+``tmp/static-cache/<build-id>/``: bodies are saved once under their SHA-256,
+and a small entry file per URL records status, headers and digest. Entries
+are written atomically, so several contexts, and several shard processes,
+can share one cache.
+
+What is cached:
+
+* ``/_next/static/*`` responses that the server marks ``immutable``. A
+  production build hashes these; ``next dev`` sends ``no-store`` for its
+  unhashed chunks, so nothing is cached from a dev server.
+* ``public/`` images and fonts, by extension. They are not content-hashed,
+  so they are keyed by the build ID, which for a dev server is derived from
+  the files in ``public/``.
+
+A cache directory for any other build ID is deleted when the cache opens.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Request, Route
+
+from .config import REPO_ROOT, TMP_DIR, base_url
+
+CACHE_ROOT = TMP_DIR / "static-cache"
+PUBLIC_DIR = REPO_ROOT / "public"
+BUILD_ID_PATH = REPO_ROOT / ".next" / "BUILD_ID"
+
+PUBLIC_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".webp", ".avif", ".gif", ".svg", ".ico", ".woff", ".woff2"})
+# Headers that describe the original transfer rather than the body we replay.
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection", "date"})
+
+
+def current_build_id() -> str:
+    """``.next/BUILD_ID`` for a production build, else a digest of ``public/``."""
+    try:
+        return BUILD_ID_PATH.read_text(encoding="utf-8").strip()
+    except OSError:
+        pass
+    digest = hashlib.sha256()
+    for path in sorted(PUBLIC_DIR.rglob("*")):
+        if path.is_file():
+            stat = path.stat()
+            digest.update(f"{path.relative_to(PUBLIC_DIR)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return f"dev-{digest.hexdigest()[:16]}"
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+class StaticCache:
+    """Context hook that answers static-asset requests from disk."""
+
+    name = "static_cache"
+
+    def __init__(self, root: Path = CACHE_ROOT, build_id: str | None = None, origin: str | None = None) -> None:
+        self.build_id = build_id or current_build_id()
+        self._origin = (origin or base_url()).rstrip("/")
+        self._directory = root / self.build_id
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_stored = 0
+        self._clear_stale(root)
+
+    def _clear_stale(self, root: Path) -> None:
+        if not root.is_dir():
+            return
+        for child in root.iterdir():
+            if child.is_dir() and child.name != self.build_id:
+                shutil.rmtree(child, ignore_errors=True)
+
+    def _is_candidate(self, url: str) -> bool:
+        if not url.startswith(self._origin + "/"):
+            return False
+        path = urlsplit(url).path
+        if path.startswith("/_next/static/"):
+            return True
+        return not path.startswith("/_next/") and Path(path).suffix.lower() in PUBLIC_EXTENSIONS
+
+    def _entry_path(self, url: str) -> Path:
+        return self._directory / "entries" / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self._directory / "objects" / digest[:2] / digest
+
+    def _lookup(self, url: str) -> tuple[dict[str, Any], bytes] | None:
+        try:
+            entry = json.loads(self._entry_path(url).read_text(encoding="utf-8"))
+            return entry, self._object_path(entry["sha256"]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, url: str, status: int, headers: dict[str, str], body: bytes) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        obj = self._object_path(digest)
+        if not obj.exists():
+            _atomic_write(obj, body)
+            self.bytes_stored += len(body)
+        entry = {"url": url, "status": status, "headers": headers, "sha256": digest, "size": len(body)}
+        _atomic_write(self._entry_path(url), json.dumps(entry).encode("utf-8"))
+
+    @staticmethod
+    def _is_storable(path: str, status: int, headers: dict[str, str]) -> bool:
+        if status != 200:
+            return False
+        if path.startswith("/_next/static/"):
+            return "immutable" in headers.get("cache-control", "")
+        return "no-store" not in headers.get("cache-control", "")
+
+    async def _handle(self, route: Route, request: Request) -> None:
+        if request.method != "GET":
+            await route.continue_()
+            return
+        cached = self._lookup(request.url)
+        if cached is not None:
+            entry, body = cached
+            self.hits += 1
+            self.bytes_saved += len(body)
+            await route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+            return
+        response = await route.fetch()
+        body = await response.body()
+        headers = {name: value for name, value in response.headers.items() if name not in _DROPPED_HEADERS}
+        self.misses += 1
+        if self._is_storable(urlsplit(request.url).path, response.status, headers):
+            self._store(request.url, response.status, headers, body)
+        await route.fulfill(response=response, body=body, headers=headers)
+
+    async def attach(self, context: BrowserContext) -> None:
+        await context.route(self._is_candidate, self._handle)
+
+    def summary(self) -> dict[str, Any]:
+        requests = self.hits + self.misses
+        return {
+            "build_id": self.build_id,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / requests, 3) if requests else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "bytes_stored": self.bytes_stored,
+        }
@@ -0,0 +1,118 @@
+"""Per-step timing for every Playwright action a TC script performs.
+
+The proxies open a step for each ``goto``, locator action, ``expect``
+assertion and trailing sleep, and split its elapsed time into three
+phases:
+
+``wait``
+    readiness waits, including the fixed ``wait_for_timeout`` that the
+    generated scripts put before an action (carried into that action),
+``act``
+    the Playwright call itself (navigation, fill, click),
+``assert``
+    ``expect(...)`` polling.
+
+Timings are written to ``tmp/test_timings.json`` and rendered as a
+timeline per test in ``raw_report.md``.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+
+from .config import TMP_DIR
+
+TIMINGS_PATH = TMP_DIR / "test_timings.json"
+PHASES = ("wait", "act", "assert")
+
+
+@dataclass
+class StepTiming:
+    index: int
+    action: str
+    selector: str | None
+    url: str
+    start_ms: float
+    wait_ms: float = 0.0
+    act_ms: float = 0.0
+    assert_ms: float = 0.0
+    note: str | None = None
+    error: str | None = None
+
+    @property
+    def total_ms(self) -> float:
+        return self.wait_ms + self.act_ms + self.assert_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        for key in ("start_ms", "wait_ms", "act_ms", "assert_ms"):
+            data[key] = round(data[key], 1)
+        return data
+
+
+class StepRecorder:
+    """Collects the steps of one test in order."""
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter()
+        self._carried_wait_ms = 0.0
+        self.steps: list[StepTiming] = []
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._origin) * 1000
+
+    def carry_wait(self, elapsed_ms: float) -> None:
+        """Charge a standalone pause to the wait phase of the next step."""
+        self._carried_wait_ms += elapsed_ms
+
+    @asynccontextmanager
+    async def step(self, action: str, selector: str | None, url: str) -> AsyncIterator[StepTiming]:
+        carried, self._carried_wait_ms = self._carried_wait_ms, 0.0
+        start = max(0.0, self._now_ms() - carried)
+        step = StepTiming(len(self.steps), action, selector, url, start, wait_ms=carried)
+        self.steps.append(step)
+        try:
+            yield step
+        except Exception as exc:
+            lines = str(exc).strip().splitlines()
+            step.error = f"{type(exc).__name__}: {lines[0]}" if lines else type(exc).__name__
+            raise
+
+    @contextmanager
+    def phase(self, step: StepTiming, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            attribute = f"{name}_ms"
+            setattr(step, attribute, getattr(step, attribute) + (time.perf_counter() - start) * 1000)
+
+    def finish(self) -> list[dict[str, Any]]:
+        """All steps as dicts; a pause with no following step becomes its own."""
+        if self._carried_wait_ms:
+            start = max(0.0, self._now_ms() - self._carried_wait_ms)
+            self.steps.append(StepTiming(len(self.steps), "wait", None, "", start, wait_ms=self._carried_wait_ms))
+            self._carried_wait_ms = 0.0
+        return [step.to_dict() for step in self.steps]
+
+
+def phase_totals(steps: list[dict[str, Any]]) -> dict[str, float]:
+    return {phase: round(sum(step.get(f"{phase}_ms", 0.0) for step in steps), 1) for phase in PHASES}
+
+
+def write_timings(timings: dict[str, list[dict[str, Any]]], path: Path = TIMINGS_PATH) -> Path:
+    """Merge ``{test_id: steps}`` into ``path``, keeping tests that did not run."""
+    try:
+        existing = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        existing = {}
+    for test_id, steps in timings.items():
+        existing[test_id] = {"totals": phase_totals(steps), "steps": steps}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(dict(sorted(existing.items())), indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
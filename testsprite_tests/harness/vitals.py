@@ -0,0 +1,244 @@
+"""Web Vitals audit of the routes in ``tmp/code_summary.yaml``.
+
+Each route is loaded in a fresh context with a fixed viewport, several
+times, and the median of these metrics is kept:
+
+``ttfb_ms``
+    ``responseStart`` of the navigation entry,
+``fcp_ms``
+    the ``first-contentful-paint`` paint entry,
+``lcp_ms``
+    the last ``largest-contentful-paint`` entry once the page is quiet,
+``cls``
+    the sum of ``layout-shift`` values without recent input,
+``tbt_ms``
+    the part of each long task over 50 ms after FCP,
+``transfer_bytes``
+    the navigation plus every resource entry's ``transferSize`` (cross-origin
+    resources without ``Timing-Allow-Origin`` report 0).
+
+Medians are compared against ``perf_budgets.json`` (committed next to the
+TC scripts): a route-specific value wins over the ``default`` block. An
+audit only reads that file. With ``--seed`` it also records a baseline for
+each route that has no entry, the median times the headroom capped at
+``default``, so later audits catch a regression on that page rather than
+only a breach of the global default.
+Every audit appends one line per route to ``tmp/perf/history/<route>.jsonl``.
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import Browser, async_playwright
+from playwright.async_api import Error as PlaywrightError
+
+from .auth import AuthError, AuthStateCache, configured_roles
+from .config import BROWSER_ARGS, SUITE_DIR, TMP_DIR, base_url, git_revision
+from .results import utc_now
+from .routes import AppRoute, route_samples
+from .waits import WaitPolicy, Waiter, WaitTimeout
+
+BUDGETS_PATH = SUITE_DIR / "perf_budgets.json"
+PERF_DIR = TMP_DIR / "perf"
+HISTORY_DIR = PERF_DIR / "history"
+LATEST_PATH = PERF_DIR / "vitals.json"
+
+# Pages whose regressions matter most; ``vitals`` warns while any lacks a baseline.
+BASELINE_ROUTES = ("/", "/businesses", "/businesses/[slug]", "/categories")
+METRICS = ("ttfb_ms", "fcp_ms", "lcp_ms", "cls", "tbt_ms", "transfer_bytes")
+AUDIT_CONTEXT: dict[str, Any] = {"viewport": {"width": 1280, "height": 720}, "device_scale_factor": 1}
+
+VITALS_SCRIPT = """(() => {
+    const vitals = (window.__harnessVitals = { lcp: 0, cls: 0, tasks: [] });
+    const observe = (type, callback) => {
+        try {
+            new PerformanceObserver((list) => list.getEntries().forEach(callback)).observe({ type, buffered: true });
+        } catch (error) {}
+    };
+    observe('largest-contentful-paint', (entry) => { vitals.lcp = entry.renderTime || entry.loadTime || entry.startTime; });
+    observe('layout-shift', (entry) => { if (!entry.hadRecentInput) vitals.cls += entry.value; });
+    observe('longtask', (entry) => { vitals.tasks.push([entry.startTime, entry.duration]); });
+})();"""
+
+COLLECT_SCRIPT = """() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+    const resources = performance.getEntriesByType('resource');
+    const vitals = window.__harnessVitals || { lcp: 0, cls: 0, tasks: [] };
+    const fcpTime = fcp ? fcp.startTime : 0;
+    return {
+        ttfb_ms: nav ? nav.responseStart : null,
+        fcp_ms: fcp ? fcp.startTime : null,
+        lcp_ms: vitals.lcp || null,
+        cls: vitals.cls,
+        tbt_ms: vitals.tasks.filter(([start]) => start >= fcpTime).reduce((sum, [, d]) => sum + Math.max(0, d - 50), 0),
+        transfer_bytes: (nav ? nav.transferSize : 0) + resources.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+        requests: resources.length + 1,
+    };
+}"""
+
+
+@dataclass
+class RouteVitals:
+    route: str
+    url: str
+    runs: list[dict[str, Any]] = field(default_factory=list)
+    median: dict[str, float | None] = field(default_factory=dict)
+    violations: list[str] = field(default_factory=list)
+    skipped: str | None = None
+    # Set when a load or the role's login failed; the audit moves on.
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def load_budgets(path: Path = BUDGETS_PATH) -> dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"default": {}, "routes": {}}
+
+
+def budget_for(budgets: dict[str, Any], route: str) -> dict[str, float]:
+    return {**budgets.get("default", {}), **budgets.get("routes", {}).get(route, {})}
+
+
+def check_budget(median: dict[str, float | None], budget: dict[str, float]) -> list[str]:
+    violations = []
+    for metric, limit in budget.items():
+        value = median.get(metric)
+        if value is not None and value > limit:
+            violations.append(f"{metric} {value:g} > {limit:g}")
+    return violations
+
+
+def _median(runs: list[dict[str, Any]]) -> dict[str, float | None]:
+    medians: dict[str, float | None] = {}
+    for metric in METRICS:
+        values = [run[metric] for run in runs if run.get(metric) is not None]
+        medians[metric] = round(statistics.median(values), 4 if metric == "cls" else 1) if values else None
+    return medians
+
+
+async def measure(browser: Browser, url: str, storage_state: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Load ``url`` once in a fresh context and read its vitals."""
+    context = await browser.new_context(**AUDIT_CONTEXT, storage_state=storage_state)
+    try:
+        await context.add_init_script(script=VITALS_SCRIPT)
+        page = await context.new_page()
+        waiter = Waiter(WaitPolicy(step_timeout_ms=20_000))
+        waiter.track(page)
+        response = await page.goto(url, wait_until="load", timeout=60_000)
+        try:
+            await waiter.page_ready(page)
+        except WaitTimeout:
+            pass  # measure what rendered; a busy network shows in the numbers
+        metrics = await page.evaluate(COLLECT_SCRIPT)
+        metrics["status"] = response.status if response else None
+        return metrics
+    finally:
+        await context.close()
+
+
+async def audit_routes(routes: list[AppRoute], runs: int = 3, budgets: dict[str, Any] | None = None) -> list[RouteVitals]:
+    """Measure ``routes`` one at a time so audits do not skew each other."""
+    budgets = budgets if budgets is not None else load_budgets()
+    samples = route_samples()
+    roles = configured_roles()
+    origin = base_url()
+    audited = []
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True, args=BROWSER_ARGS)
+        auth = AuthStateCache(browser, "vitals")
+        try:
+            for route in routes:
+                path = route.concrete(samples)
+                result = RouteVitals(route.path, f"{origin}{path}" if path else "")
+                audited.append(result)
+                if path is None:
+                    result.skipped = "no sample value for a dynamic segment"
+                    continue
+                state = None
+                if route.role and route.role not in roles:
+                    result.skipped = f"no credentials for role {route.role!r}"
+                    continue
+                try:
+                    if route.role:
+                        state = await auth.state(roles[route.role])
+                    for _ in range(runs):
+                        result.runs.append(await measure(browser, result.url, state))
+                except (PlaywrightError, AuthError) as exc:
+                    result.error = str(exc).splitlines()[0]
+                    continue
+                result.median = _median(result.runs)
+                result.violations = check_budget(result.median, budget_for(budgets, route.path))
+        finally:
+            await browser.close()
+    return audited
+
+
+def write_history(results: list[RouteVitals], directory: Path = HISTORY_DIR) -> None:
+    """Append this audit to each route's history and refresh the latest file."""
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = {"recorded_at": utc_now(), "revision": git_revision()}
+    for result in results:
+        if result.skipped or result.error:
+            continue
+        label = AppRoute(result.route).label
+        line = {**stamp, "url": result.url, "runs": len(result.runs), **result.median, "violations": result.violations}
+        with (directory / f"{label}.jsonl").open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(line) + "\n")
+    LATEST_PATH.write_text(
+        json.dumps({**stamp, "routes": [result.to_dict() for result in results]}, indent=2) + "\n", encoding="utf-8"
+    )
+
+
+def route_budget(
+    median: dict[str, float | None], headroom: float, ceiling: dict[str, float] | None = None
+) -> dict[str, float]:
+    """``median`` times ``headroom``, each metric at most its ``ceiling`` value."""
+    budget = {}
+    for metric, value in median.items():
+        if value is None:
+            continue
+        limit = round(value * headroom, 4 if metric == "cls" else 0)
+        budget[metric] = min(limit, ceiling[metric]) if ceiling and metric in ceiling else limit
+    return budget
+
+
+def write_budgets(results: list[RouteVitals], headroom: float = 1.25, path: Path = BUDGETS_PATH) -> Path:
+    """Set each measured route's budget to its median times ``headroom``."""
+    budgets = load_budgets(path)
+    routes = budgets.setdefault("routes", {})
+    for result in results:
+        if result.skipped or result.error:
+            continue
+        routes[result.route] = route_budget(result.median, headroom)
+    path.write_text(json.dumps(budgets, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def seed_budgets(results: list[RouteVitals], headroom: float = 1.25, path: Path = BUDGETS_PATH) -> list[str]:
+    """Record a baseline for measured routes that have none yet; existing budgets are left alone.
+
+    Capped at ``default``, so a route already over the global budget keeps failing.
+    """
+    budgets = load_budgets(path)
+    routes = budgets.setdefault("routes", {})
+    seeded = []
+    for result in results:
+        if result.skipped or result.error or result.route in routes:
+            continue
+        budget = route_budget(result.median, headroom, budgets.get("default", {}))
+        if budget:
+            routes[result.route] = budget
+            seeded.append(result.route)
+    if seeded:
+        path.write_text(json.dumps(budgets, indent=2) + "\n", encoding="utf-8")
+    return seeded
@@ -0,0 +1,164 @@
+"""Condition-based waits that replace the generated scripts' fixed sleeps.
+
+TestSprite emits ``await page.wait_for_timeout(3000)`` before every action
+and ``await asyncio.sleep(5)`` after the assertions. :class:`Waiter` turns
+those into waits on real readiness signals:
+
+* the App Router has hydrated the document (React fibers are attached),
+* the page's network has been quiet for a short window,
+* the target locator is visible before it is filled or clicked,
+* after a click, the resulting requests and any navigation have settled.
+
+Each step returns as soon as its conditions hold. Only the step's hard
+timeout fails it, with :class:`WaitTimeout`.
+
+Hand-written scripts can use the same layer directly::
+
+    waiter = Waiter()
+    await waiter.page_ready(page)
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Locator, Page, Request
+
+# Resolves once the document is parsed and, for pages rendered by Next.js,
+# React has claimed <body> during hydration. Pages without Next.js scripts
+# (error pages, static HTML) have nothing to hydrate.
+HYDRATION_SCRIPT = """() => {
+    if (document.readyState === 'loading' || !document.body) return false;
+    if (!window.next && !document.querySelector('script[src*="/_next/"]')) return true;
+    return Object.keys(document.body).some((key) => key.startsWith('__reactFiber$'));
+}"""
+
+# Long-lived connections never finish and would keep a page "busy" forever.
+IGNORED_RESOURCE_TYPES = frozenset({"eventsource", "websocket"})
+IGNORED_URL_PARTS = ("/_next/webpack-hmr", "/__nextjs_original-stack-frame", "/realtime/v1/")
+
+
+class WaitTimeout(AssertionError):
+    """A readiness condition did not hold within the step's hard timeout."""
+
+
+@dataclass
+class WaitPolicy:
+    step_timeout_ms: float = 15_000
+    network_quiet_ms: float = 500
+    # How long to let a click's requests start before checking for quiet.
+    settle_grace_ms: float = 100
+    poll_interval_ms: float = 50
+
+
+class NetworkTracker:
+    """Counts a page's in-flight requests and when the last one changed."""
+
+    def __init__(self, page: Page) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._inflight: set[Request] = set()
+        self.last_activity = self._loop.time()
+        page.on("request", self._started)
+        page.on("requestfinished", self._finished)
+        page.on("requestfailed", self._finished)
+
+    @staticmethod
+    def _ignored(request: Request) -> bool:
+        return request.resource_type in IGNORED_RESOURCE_TYPES or any(
+            part in request.url for part in IGNORED_URL_PARTS
+        )
+
+    def _started(self, request: Request) -> None:
+        if not self._ignored(request):
+            self._inflight.add(request)
+            self.last_activity = self._loop.time()
+
+    def _finished(self, request: Request) -> None:
+        if request in self._inflight:
+            self._inflight.discard(request)
+            self.last_activity = self._loop.time()
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def wait_idle(self, quiet_ms: float, deadline: float, poll_ms: float) -> None:
+        while True:
+            now = self._loop.time()
+            if not self._inflight and (now - self.last_activity) * 1000 >= quiet_ms:
+                return
+            if now >= deadline:
+                raise WaitTimeout(f"network still busy with {self.inflight} request(s)")
+            await asyncio.sleep(poll_ms / 1000)
+
+
+class Waiter:
+    """Readiness waits for the pages of one test."""
+
+    def __init__(self, policy: WaitPolicy | None = None) -> None:
+        self.policy = policy or WaitPolicy()
+        self._trackers: dict[Page, NetworkTracker] = {}
+
+    def track(self, page: Page) -> NetworkTracker:
+        tracker = self._trackers.get(page)
+        if tracker is None:
+            tracker = self._trackers[page] = NetworkTracker(page)
+        return tracker
+
+    def _deadline(self) -> float:
+        return asyncio.get_running_loop().time() + self.policy.step_timeout_ms / 1000
+
+    @staticmethod
+    def _remaining_ms(deadline: float) -> float:
+        return max(1.0, (deadline - asyncio.get_running_loop().time()) * 1000)
+
+    async def _hydrated(self, page: Page, deadline: float) -> None:
+        try:
+            await page.wait_for_function(HYDRATION_SCRIPT, timeout=self._remaining_ms(deadline))
+        except PlaywrightError as exc:
+            if page.is_closed():
+                return
+            raise WaitTimeout(f"{page.url} did not finish hydrating: {exc.message}") from None
+
+    async def page_ready(self, page: Page, deadline: float | None = None) -> None:
+        """Hydration complete and network quiet for the current route."""
+        if page.is_closed():
+            return
+        deadline = deadline or self._deadline()
+        await self._hydrated(page, deadline)
+        policy = self.policy
+        try:
+            await self.track(page).wait_idle(policy.network_quiet_ms, deadline, policy.poll_interval_ms)
+        except WaitTimeout as exc:
+            raise WaitTimeout(f"{page.url}: {exc}") from None
+
+    async def actionable(self, locator: Locator, page: Page) -> None:
+        """The app is ready and ``locator`` is visible; Playwright checks the rest."""
+        deadline = self._deadline()
+        await self.page_ready(page, deadline)
+        try:
+            await locator.wait_for(state="visible", timeout=self._remaining_ms(deadline))
+        except PlaywrightError as exc:
+            raise WaitTimeout(f"{locator} never became visible: {exc.message}") from None
+
+    async def settled(self, page: Page) -> None:
+        """Requests triggered by the last action finished, including a navigation."""
+        if page.is_closed():
+            return
+        url = page.url
+        await asyncio.sleep(self.policy.settle_grace_ms / 1000)
+        deadline = self._deadline()
+        if page.url != url:
+            await self.page_ready(page, deadline)
+            return
+        policy = self.policy
+        await self.track(page).wait_idle(policy.network_quiet_ms, deadline, policy.poll_interval_ms)
+        if page.url != url:
+            await self.page_ready(page, deadline)
+
+    async def settle_all(self) -> None:
+        """Every tracked page is ready; stands in for the scripts' trailing sleep."""
+        for page in list(self._trackers):
+            await self.page_ready(page)
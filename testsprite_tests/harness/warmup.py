@@ -0,0 +1,192 @@
+"""Pre-run gate: wait for the server, compile every route, stop early on 5xx.
+
+``next dev`` compiles a route the first time it is requested (the home
+page takes ~20 s), so the first tests to reach a route used to time out
+on their 10 s ``goto``. Before any test starts, the warm-up
+
+1. polls ``/api/health`` until the server answers 200,
+2. requests every route in ``tmp/code_summary.yaml`` at once so each is
+   compiled (protected routes compile their redirect path, not the page),
+3. trips a circuit breaker when the server keeps answering 5xx, so the run
+   aborts with a diagnosis instead of failing every test on timeouts.
+
+The diagnosis quotes the last error lines of the dev server log
+(``.tmp_dev.log`` at the repo root, or ``$TESTSPRITE_SERVER_LOG``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from .config import REPO_ROOT
+from .http import ConnectionPool, HttpError, HttpResponse
+from .routes import AppRoute, route_samples
+
+HEALTH_PATH = "/api/health"
+# Next dev prints failed compilations and render errors with this marker.
+_LOG_ERROR = re.compile(r"⨯|\bError\b|\bERR_")
+
+
+class ServerUnavailable(Exception):
+    """The server never became healthy; the message says why."""
+
+
+@dataclass
+class WarmupPolicy:
+    health_timeout_s: float = 120.0
+    poll_interval_s: float = 1.0
+    route_timeout_s: float = 120.0
+    # Consecutive 5xx answers (health checks or routes) before giving up.
+    breaker_threshold: int = 3
+
+
+@dataclass
+class RouteWarmup:
+    route: str
+    path: str
+    status: int | str
+    elapsed_ms: float
+    detail: str = ""
+
+    @property
+    def server_error(self) -> bool:
+        return isinstance(self.status, int) and self.status >= 500
+
+
+@dataclass
+class WarmupReport:
+    health_ms: float = 0.0
+    routes: list[RouteWarmup] = field(default_factory=list)
+
+    @property
+    def slowest(self) -> RouteWarmup | None:
+        return max(self.routes, key=lambda route: route.elapsed_ms, default=None)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int) -> None:
+        self.threshold = threshold
+        self.consecutive = 0
+        self.last: list[str] = []
+
+    def record(self, status: int | str, detail: str) -> None:
+        if isinstance(status, int) and status >= 500:
+            self.consecutive += 1
+            self.last = [*self.last, detail][-self.threshold :]
+        else:
+            self.consecutive = 0
+            self.last = []
+
+    @property
+    def tripped(self) -> bool:
+        return self.consecutive >= self.threshold
+
+
+def server_log() -> Path:
+    return Path(os.environ.get("TESTSPRITE_SERVER_LOG") or REPO_ROOT / ".tmp_dev.log")
+
+
+def log_errors(path: Path | None = None, limit: int = 8) -> list[str]:
+    """The last error lines the dev server logged, if its log is readable."""
+    try:
+        lines = (path or server_log()).read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return []
+    return [line.rstrip() for line in lines if _LOG_ERROR.search(line)][-limit:]
+
+
+def _describe(response: HttpResponse) -> str:
+    """One line about a failed response: the health JSON or the error page title."""
+    text = response.text()
+    try:
+        health = json.loads(text)
+    except ValueError:
+        title = re.search(r"<title>(.*?)</title>", text, re.S)
+        snippet = title.group(1).strip() if title else " ".join(text.split())[:160]
+        return f"HTTP {response.status}: {snippet}"
+    if isinstance(health, dict) and "checks" in health:
+        return f"HTTP {response.status}: status={health.get('status')} checks={health.get('checks')}"
+    return f"HTTP {response.status}: {text[:160]}"
+
+
+def diagnose(origin: str, details: list[str], reason: str) -> str:
+    lines = [f"Server at {origin} is not usable: {reason}."]
+    lines += [f"  {detail}" for detail in details]
+    errors = log_errors()
+    if errors:
+        written = datetime.fromtimestamp(server_log().stat().st_mtime).isoformat(sep=" ", timespec="seconds")
+        lines.append(f"Last errors in {server_log()} (written {written}):")
+        lines += [f"  {line}" for line in errors]
+    if any("checks=" in detail for detail in details):
+        lines.append("The health check queries Supabase; check NEXT_PUBLIC_SUPABASE_URL and the project's status.")
+    return "\n".join(lines)
+
+
+async def wait_healthy(pool: ConnectionPool, policy: WarmupPolicy, breaker: CircuitBreaker) -> float:
+    """Poll the health endpoint; returns how long the server took to answer 200."""
+    start = time.monotonic()
+    deadline = start + policy.health_timeout_s
+    refused = None
+    while time.monotonic() < deadline:
+        try:
+            response = await pool.get(HEALTH_PATH)
+        except (HttpError, OSError, asyncio.TimeoutError) as exc:
+            refused = exc  # not listening yet, or still compiling the route
+        else:
+            if response.status == 200:
+                return (time.monotonic() - start) * 1000
+            breaker.record(response.status, f"{HEALTH_PATH} {_describe(response)}")
+            if breaker.tripped:
+                raise ServerUnavailable(diagnose(pool.origin, breaker.last, f"{HEALTH_PATH} keeps failing"))
+        await asyncio.sleep(policy.poll_interval_s)
+    reason = f"no healthy answer from {HEALTH_PATH} within {policy.health_timeout_s:.0f}s"
+    if refused is not None:
+        reason += f" (last error: {type(refused).__name__}: {refused})"
+    raise ServerUnavailable(diagnose(pool.origin, breaker.last, reason))
+
+
+async def warm_routes(
+    pool: ConnectionPool, routes: list[AppRoute], samples: dict[str, str] | None = None
+) -> list[RouteWarmup]:
+    samples = samples if samples is not None else route_samples()
+
+    async def warm(route: AppRoute, path: str) -> RouteWarmup:
+        start = time.monotonic()
+        detail = ""
+        try:
+            response = await pool.get(path, headers={"accept": "text/html"})
+        except asyncio.TimeoutError:
+            status: int | str = "timeout"
+        except (HttpError, OSError) as exc:
+            status, detail = type(exc).__name__, str(exc)
+        else:
+            status = response.status
+            if status >= 500:
+                detail = f"{path} {_describe(response)}"
+        return RouteWarmup(route.path, path, status, (time.monotonic() - start) * 1000, detail)
+
+    targets = [(route, route.concrete(samples)) for route in routes]
+    return list(await asyncio.gather(*(warm(route, path) for route, path in targets if path is not None)))
+
+
+async def warm_up(origin: str, routes: list[AppRoute], policy: WarmupPolicy | None = None) -> WarmupReport:
+    """Gate a run on a healthy, compiled server; raises ServerUnavailable otherwise."""
+    policy = policy or WarmupPolicy()
+    breaker = CircuitBreaker(policy.breaker_threshold)
+    report = WarmupReport()
+    async with ConnectionPool(origin, size=max(1, len(routes)), timeout=policy.route_timeout_s) as pool:
+        report.health_ms = await wait_healthy(pool, policy, breaker)
+        report.routes = await warm_routes(pool, routes)
+    # Routes compile concurrently, so "consecutive" means "this many of them".
+    failures = [route.detail for route in report.routes if route.server_error]
+    if len(failures) >= policy.breaker_threshold:
+        reason = f"{len(failures)} of {len(report.routes)} routes answered 5xx during warm-up"
+        raise ServerUnavailable(diagnose(origin, failures, reason))
+    return report
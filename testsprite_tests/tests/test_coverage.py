@@ -0,0 +1,59 @@
+"""V8 block ranges and source map decoding in ``harness.coverage``."""
+
+from __future__ import annotations
+
+from harness.coverage import UNMAPPED, decode_vlq, executed_ranges, mapping_points
+
+
+def block(start: int, end: int, count: int) -> dict[str, int]:
+    return {"startOffset": start, "endOffset": end, "count": count}
+
+
+def test_executed_ranges_takes_the_innermost_count() -> None:
+    # A function run once, with an untaken branch that itself contains a block reported as run.
+    functions = [{"ranges": [block(0, 100, 1), block(20, 40, 0), block(25, 30, 2)]}]
+    assert executed_ranges(functions) == [(0, 20), (25, 30), (40, 100)]
+
+
+def test_executed_ranges_skips_functions_never_called() -> None:
+    functions = [
+        {"ranges": [block(0, 50, 3)]},
+        {"ranges": [block(60, 90, 0)]},
+        {"ranges": [block(100, 150, 1), block(110, 120, 0), block(130, 140, 0)]},
+    ]
+    assert executed_ranges(functions) == [(0, 50), (100, 110), (120, 130), (140, 150)]
+
+
+def test_executed_ranges_merges_adjacent_blocks() -> None:
+    functions = [{"ranges": [block(0, 10, 1)]}, {"ranges": [block(10, 20, 1)]}]
+    assert executed_ranges(functions) == [(0, 20)]
+
+
+def test_decode_vlq() -> None:
+    assert decode_vlq("AAAA") == [0, 0, 0, 0]
+    assert decode_vlq("IACA") == [4, 0, 1, 0]
+    assert decode_vlq("D") == [-1]
+    # "g" sets the continuation bit, "B" adds 1 << 5; the lowest bit is the sign, so 32 is 16.
+    assert decode_vlq("gB") == [16]
+    assert decode_vlq("2Hw+B") == [123, 1000]
+
+
+def test_mapping_points_tracks_source_deltas_across_lines() -> None:
+    data = {"sourceRoot": "src/", "sources": ["a.ts", "b.ts"], "mappings": "AAAA,ICAA,C;ADAA"}
+    assert mapping_points(data) == [
+        (0, 0, "src/a.ts"),
+        (0, 4, "src/b.ts"),
+        (0, 5, UNMAPPED),
+        (1, 0, "src/a.ts"),
+    ]
+
+
+def test_mapping_points_offsets_index_map_sections() -> None:
+    data = {
+        "sections": [
+            {"offset": {"line": 0, "column": 10}, "map": {"sources": ["a.ts"], "mappings": "AAAA;EAAA"}},
+            {"offset": {"line": 3, "column": 2}, "map": {"sources": ["b.ts"], "mappings": "CAAA"}},
+        ]
+    }
+    # The section's column offset applies to its first line only.
+    assert mapping_points(data) == [(0, 10, "a.ts"), (1, 2, "a.ts"), (3, 3, "b.ts")]
@@ -0,0 +1,184 @@
+"""HTTP/1.1 framing and keep-alive reuse in ``harness.http``."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+
+import pytest
+
+from harness.http import ConnectionPool, HttpError, iter_body, read_body, read_headers
+
+
+def feed(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+async def collect(chunks) -> list[bytes]:
+    return [chunk async for chunk in chunks]
+
+
+def body_pieces(wire: bytes, headers: dict[str, str], size: int = 4) -> list[bytes]:
+    async def run():
+        return await collect(iter_body(feed(wire), headers, 1.0, size=size))
+
+    return asyncio.run(run())
+
+
+def test_read_headers_lowercases_and_joins_repeats() -> None:
+    async def run():
+        reader = feed(b"Content-Type: text/html\r\nSet-Cookie: a=1\r\nset-cookie: b=2\r\n\r\nbody")
+        headers, size = await read_headers(reader)
+        return headers, size, await reader.read()
+
+    headers, size, rest = asyncio.run(run())
+    assert headers == {"content-type": "text/html", "set-cookie": "a=1, b=2"}
+    assert size == len(b"Content-Type: text/html\r\nSet-Cookie: a=1\r\nset-cookie: b=2\r\n\r\n")
+    assert rest == b"body"
+
+
+def test_read_body_chunked_with_extensions_and_trailers() -> None:
+    wire = b"4;name=x\r\nWiki\r\n6\r\npedia \r\nE\r\nin \r\n\r\nchunks.\r\n0\r\nExpires: never\r\n\r\nNEXT"
+
+    async def run():
+        reader = feed(wire)
+        body = await read_body(reader, {"transfer-encoding": "chunked"})
+        return body, await reader.read()
+
+    body, rest = asyncio.run(run())
+    assert body == b"Wikipedia in \r\n\r\nchunks."
+    assert rest == b"NEXT"
+
+
+def test_read_body_content_length_leaves_the_next_response() -> None:
+    async def run():
+        reader = feed(b"hello world")
+        return await read_body(reader, {"content-length": "5"}), await reader.read()
+
+    assert asyncio.run(run()) == (b"hello", b" world")
+
+
+def test_read_body_rejects_bad_chunk_size() -> None:
+    async def run():
+        return await read_body(feed(b"zz\r\n"), {"transfer-encoding": "chunked"})
+
+    with pytest.raises(HttpError, match="bad chunk size"):
+        asyncio.run(run())
+
+
+def test_iter_body_splits_chunks_to_the_piece_size() -> None:
+    wire = b"a\r\n0123456789\r\n3\r\nabc\r\n0\r\n\r\n"
+    pieces = body_pieces(wire, {"transfer-encoding": "chunked"})
+    assert pieces == [b"0123", b"4567", b"89", b"abc"]
+
+
+def test_iter_body_reports_a_truncated_body() -> None:
+    with pytest.raises(HttpError, match="3 body bytes missing"):
+        body_pieces(b"12345", {"content-length": "8"})
+
+
+def test_iter_body_without_framing_reads_to_eof() -> None:
+    assert body_pieces(b"x" * 10, {}, size=3) == [b"xxx", b"xxx", b"xxx", b"x"]
+
+
+class Server:
+    """Answers each request on a connection in turn; counts connections and records request lines."""
+
+    def __init__(self, responses: list[bytes]) -> None:
+        self.responses = responses
+        self.connections = 0
+        self.request_lines: list[bytes] = []
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while self.responses:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.request_lines.append(line.rstrip())
+                await read_headers(reader)
+                writer.write(self.responses.pop(0))
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(server: Server, check) -> None:
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        async with ConnectionPool(f"http://127.0.0.1:{port}", size=1, timeout=5) as pool:
+            await check(pool)
+    finally:
+        listener.close()
+        await listener.wait_closed()
+
+
+def test_pool_reuses_a_keep_alive_connection() -> None:
+    server = Server([
+        b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n2\r\nhi\r\n0\r\n\r\n",
+    ])
+
+    async def check(pool: ConnectionPool) -> None:
+        first = await pool.get("/a")
+        second = await pool.get("/businesses/Fès")
+        assert (first.body, first.reused) == (b"ok", False)
+        assert (second.body, second.reused) == (b"hi", True)
+        assert pool.stats.opened == 1 and pool.stats.reused == 1
+
+    asyncio.run(serve(server, check))
+    assert server.connections == 1
+    assert server.request_lines[1] == b"GET /businesses/F%C3%A8s HTTP/1.1"
+
+
+def test_pool_does_not_reuse_after_connection_close() -> None:
+    server = Server([b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 1\r\n\r\na"])
+
+    async def check(pool: ConnectionPool) -> None:
+        response = await pool.get("/")
+        assert response.body == b"a"
+        assert pool._idle == []
+
+    asyncio.run(serve(server, check))
+
+
+def test_pool_stream_decodes_gzip_in_pieces() -> None:
+    payload = gzip.compress(b"<urlset>" + b"<url/>" * 1000 + b"</urlset>")
+    server = Server([
+        b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: %d\r\n\r\n" % len(payload) + payload
+    ])
+
+    async def check(pool: ConnectionPool) -> None:
+        async with pool.stream("/sitemap.xml") as response:
+            body = b"".join(await collect(response.chunks))
+        assert response.status == 200
+        assert body.startswith(b"<urlset>") and body.endswith(b"</urlset>")
+
+    asyncio.run(serve(server, check))
+
+
+def test_pool_retries_once_when_the_server_dropped_an_idle_socket() -> None:
+    # Keep-alive is advertised, but the server closes every connection after one response.
+    server = Server([b"HTTP/1.1 200 OK\r\nContent-Length: 1\r\n\r\na"])
+    handle = server.handle
+
+    async def one_response(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        server.responses = [b"HTTP/1.1 200 OK\r\nContent-Length: 1\r\n\r\na"]
+        await handle(reader, writer)
+
+    server.handle = one_response
+
+    async def check(pool: ConnectionPool) -> None:
+        await pool.get("/")
+        await asyncio.sleep(0.05)
+        response = await pool.get("/")
+        assert (response.body, response.reused) == (b"a", False)
+        assert pool.stats.errors == 0
+
+    asyncio.run(serve(server, check))
+    assert server.connections == 2
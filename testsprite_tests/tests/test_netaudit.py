@@ -0,0 +1,100 @@
+"""Per-visit Supabase findings in ``harness.netaudit``."""
+
+from __future__ import annotations
+
+from harness.netaudit import AuditedRequest, AuditThresholds, _longest_chain, find_issues
+
+SUPABASE = "https://project.supabase.co"
+
+
+def call(
+    path: str, started: float, finished: float, side: str = "server", key: str | None = None, size: int = 100
+) -> AuditedRequest:
+    return AuditedRequest(
+        visit="v1",
+        route="/businesses/[slug]",
+        page="/businesses/cafe",
+        side=side,
+        method="GET",
+        url=SUPABASE + path,
+        resource_type="fetch",
+        status=200,
+        started=started,
+        finished=finished,
+        bytes=size,
+        resource=path.split("?")[0].rsplit("/", 1)[-1],
+        key=key or path,
+    )
+
+
+def kinds(findings: list[dict]) -> list[str]:
+    return sorted(finding["kind"] for finding in findings)
+
+
+def test_no_calls_no_findings() -> None:
+    assert find_issues([], AuditThresholds()) == []
+
+
+def test_duplicate_counts_wasted_bytes_of_the_repeats() -> None:
+    path = "/rest/v1/businesses?select=id,name&slug=eq.cafe"
+    calls = [call(path, 0.0, 0.1), call(path, 0.0, 0.1, side="browser"), call(path, 1.0, 1.1)]
+    [finding] = find_issues(calls, AuditThresholds())
+    assert finding["kind"] == "duplicate"
+    assert finding["count"] == 3
+    assert finding["wasted_bytes"] == 200
+    assert finding["sides"] == ["browser", "server"]
+
+
+def test_n_plus_one_needs_distinct_values_of_one_shape() -> None:
+    calls = [call(f"/rest/v1/reviews?select=id&business_id=eq.{index}", 0.0, 0.05) for index in range(3)]
+    [finding] = find_issues(calls, AuditThresholds())
+    assert finding["kind"] == "n_plus_one"
+    assert finding["count"] == 3
+    assert finding["shape"] == "GET /rest/v1/reviews?business_id=eq.?&select=id"
+    assert find_issues(calls[:2], AuditThresholds()) == []
+
+
+def test_n_plus_one_is_per_side() -> None:
+    calls = [
+        call(f"/rest/v1/reviews?select=id&business_id=eq.{index}", 0.0, 0.05, side=side)
+        for index, side in enumerate(["server", "server", "browser"])
+    ]
+    assert find_issues(calls, AuditThresholds()) == []
+
+
+def test_waterfall_on_back_to_back_calls() -> None:
+    calls = [
+        call("/rest/v1/businesses?select=id&slug=eq.cafe", 0.00, 0.10),
+        call("/rest/v1/reviews?select=id&business_id=eq.1", 0.15, 0.30),
+        call("/rest/v1/profiles?select=id&id=eq.2", 0.35, 0.60),
+    ]
+    [finding] = find_issues(calls, AuditThresholds())
+    assert finding["kind"] == "waterfall"
+    assert finding["count"] == 3
+    assert finding["span_ms"] == 600.0
+    assert finding["longest_call_ms"] == 250.0
+    assert finding["chain"] == ["GET businesses", "GET reviews", "GET profiles"]
+
+
+def test_select_star_only_above_the_size_threshold() -> None:
+    small = call("/rest/v1/categories?select=*", 0.0, 0.1, size=2048)
+    large = call("/rest/v1/businesses?select=*", 0.0, 0.1, size=64 * 1024)
+    findings = find_issues([small, large], AuditThresholds())
+    assert [(finding["kind"], finding["resource"]) for finding in findings] == [("select_star", "businesses")]
+
+
+def test_longest_chain_skips_overlapping_and_slow_gaps() -> None:
+    first = call("/a", 0.0, 0.1)
+    overlapping = call("/b", 0.05, 0.2)  # starts before the first ends
+    second = call("/c", 0.15, 0.25)
+    late = call("/d", 1.0, 1.1)  # 750 ms after the previous end
+    third = call("/e", 0.3, 0.4)
+    chain = _longest_chain([late, third, overlapping, second, first], gap_s=0.1)
+    assert chain == [first, second, third]
+
+
+def test_longest_chain_respects_the_gap_threshold() -> None:
+    calls = [call("/a", 0.0, 0.1), call("/b", 0.25, 0.3), call("/c", 0.45, 0.5)]
+    assert len(_longest_chain(calls, gap_s=0.1)) == 1
+    assert len(_longest_chain(calls, gap_s=0.2)) == 3
+    assert kinds(find_issues(calls, AuditThresholds(gap_ms=200))) == ["waterfall"]
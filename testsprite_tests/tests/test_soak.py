@@ -0,0 +1,28 @@
+"""Least-squares trend fit in ``harness.soak``."""
+
+from __future__ import annotations
+
+import pytest
+
+from harness.soak import fit
+
+
+def test_fit_exact_line() -> None:
+    slope, r2 = fit([(x, 2.0 * x + 5.0) for x in range(10)])
+    assert slope == pytest.approx(2.0)
+    assert r2 == pytest.approx(1.0)
+
+
+def test_fit_noisy_growth_has_partial_r2() -> None:
+    slope, r2 = fit([(0, 0.0), (1, 2.0), (2, 1.0), (3, 3.0)])
+    assert slope == pytest.approx(0.8)
+    assert r2 == pytest.approx(0.64)
+
+
+def test_fit_flat_series_is_not_a_trend() -> None:
+    assert fit([(x, 7.0) for x in range(5)]) == (0.0, 0.0)
+
+
+def test_fit_needs_three_points_and_spread_in_x() -> None:
+    assert fit([(0, 1.0), (1, 2.0)]) == (0.0, 0.0)
+    assert fit([(3, 1.0), (3, 2.0), (3, 3.0)]) == (0.0, 0.0)